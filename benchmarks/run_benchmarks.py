@@ -0,0 +1,286 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+
+from analysis.coded_text import CodedText  # noqa: E402
+from analysis import frequency_data  # noqa: E402
+from ciphers import caesar, hill, vigenere  # noqa: E402
+
+CORPUS_PATH = os.path.join(ROOT_DIR, 'texts', 'hobbit.txt')
+DEFAULT_HISTORY = os.path.join(ROOT_DIR, 'benchmarks', 'history.json')
+DEFAULT_SIZES = ('1K', '100K', '1M')
+FULL_SIZES = ('1K', '100K', '1M', '10M', '100M')
+SOURCES = ('hobbit', 'synthetic')
+DEFAULT_THRESHOLD = 0.25  # Fractional slow-down against the previous run that counts as a regression
+SYNTHETIC_SEED = 2024
+CRIB_LENGTH = 1000  # Letters of known plaintext given to the Hill known-plaintext attacks
+
+HILL_KEYS = {
+    2: np.array([[3, 3], [2, 5]]),
+    3: np.array([[6, 24, 1], [13, 16, 10], [20, 17, 15]]),
+    4: np.array([[13, 7, 11, 21], [4, 1, 24, 22], [22, 10, 7, 7], [25, 3, 15, 22]]),
+}
+_UNITS = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+
+
+def _quiet(*args):
+    # Progress callback for the cipher functions; printing would distort the timings
+    pass
+
+
+def parse_size(size):
+    """
+    Converts a size such as '1K', '100M' or '4096' to a number of letters.
+
+    Args:
+        size (str): The size, with an optional K, M or G suffix (powers of 1024).
+
+    Returns:
+        int: The number of letters.
+    """
+    size = size.strip().upper().rstrip('B')
+    if size and size[-1] in _UNITS:
+        return int(float(size[:-1]) * _UNITS[size[-1]])
+    return int(size)
+
+
+def make_text(source, size):
+    """
+    Builds a benchmark plaintext of exactly size letters.
+
+    Args:
+        source (str): 'hobbit' repeats the corpus, 'synthetic' draws seeded letters with English frequencies.
+        size (int): The number of letters.
+
+    Returns:
+        CodedText: The plaintext.
+    """
+    if source == 'hobbit':
+        with open(CORPUS_PATH, 'r', encoding='utf-8') as file:
+            corpus = CodedText.from_text(file.read()).codes
+        return CodedText._wrap(np.resize(corpus, size))
+    probabilities = np.array([frequency_data.letter_frequencies[chr(65 + code)] for code in range(26)], dtype=np.float64)
+    generator = np.random.default_rng(SYNTHETIC_SEED)
+    return CodedText._wrap(generator.choice(26, size, p=probabilities / probabilities.sum()).astype(np.uint8))
+
+
+# --------------------------------------------------------------------------------
+# BENCHMARK CASES
+# --------------------------------------------------------------------------------
+# Each case is (name, params, max_size, prepare). prepare(plaintext) does the untimed setup, such as encoding
+# the ciphertext to attack, and returns the function that is timed. max_size skips sizes a case cannot scale to.
+def _hill_cryptanalyse(plain, n):
+    cipher = hill.encode(plain, HILL_KEYS[n], _quiet)
+    known, cipher_text = plain[:CRIB_LENGTH].to_text(), cipher.to_text()
+    return lambda: hill.cryptanalyse(known, cipher_text, n, 0, _quiet, _quiet)
+
+
+def _vigenere_cryptanalyse(plain, max_key_length, shift_guess):
+    cipher = vigenere.encode(plain, "LEMON", _quiet)
+
+    def run():
+        vigenere.clear_cache()  # Every repetition must do the full analysis
+        return vigenere.cryptanalyse(cipher, max_key_length, 2, shift_guess, _quiet, None, _quiet)
+    return run
+
+
+def build_cases():
+    """Returns every benchmark case, see the comment above."""
+    cases = [
+        ('normalize', {}, None, lambda plain: (lambda text=plain.to_text(): CodedText.from_text(text))),
+        ('caesar.encode', {}, None, lambda plain: lambda: caesar.encode(plain, 7, _quiet)),
+        ('caesar.decode', {}, None, lambda plain: lambda: caesar.decode(plain, 7, _quiet)),
+        ('vigenere.encode', {}, None, lambda plain: lambda: vigenere.encode(plain, "LEMON", _quiet)),
+        ('vigenere.decode', {}, None, lambda plain: lambda: vigenere.decode(plain, "LEMON", _quiet)),
+    ]
+    for rank_by in ('letters', 'quadgram'):
+        cases.append(('caesar.chi_cryptanalysis', {'rank_by': rank_by}, None,
+                      lambda plain, rank_by=rank_by: (lambda cipher=caesar.encode(plain, 7, _quiet):
+                                                      caesar.chi_cryptanalysis(cipher, *frequency_data.dense_tables(),
+                                                                               rank_by=rank_by))))
+    for max_key_length in (10, 20):
+        for shift_guess in (2, 3):
+            cases.append(('vigenere.cryptanalyse', {'max_key_length': max_key_length, 'shift_guess': shift_guess},
+                          None, lambda plain, m=max_key_length, s=shift_guess: _vigenere_cryptanalyse(plain, m, s)))
+    for n in sorted(HILL_KEYS):
+        params = {'n': n}
+        cases.extend([
+            ('hill.encode', params, None, lambda plain, n=n: lambda: hill.encode(plain, HILL_KEYS[n], _quiet)),
+            ('hill.decode', params, None, lambda plain, n=n: lambda: hill.decode(plain, HILL_KEYS[n], _quiet)),
+            ('hill.cryptanalyse', params, None, lambda plain, n=n: _hill_cryptanalyse(plain, n)),
+        ])
+    cases.append(('hill.crib_search', {'key_sizes': [2, 3, 4]}, 10 << 20,
+                  lambda plain: (lambda cipher=hill.encode(plain, HILL_KEYS[3], _quiet):
+                                 hill.crib_search(plain[1001:1041], cipher, range(2, 5)))))
+    cases.append(('hill.cryptanalyse_ciphertext_only', {'n': 2}, 1 << 20,
+                  lambda plain: (lambda cipher=hill.encode(plain, HILL_KEYS[2], _quiet):
+                                 hill.cryptanalyse_ciphertext_only(cipher, 2, _quiet, _quiet, workers=1))))
+    return cases
+
+
+def measure(function, repeat):
+    """
+    Times a function and measures its peak memory.
+
+    Args:
+        function (function): The benchmarked call.
+        repeat (int): The number of timed calls; the fastest is reported, as the least disturbed by other load.
+
+    Returns:
+        tuple: (seconds, peak_bytes). The peak comes from a separate traced call, since tracing slows
+        allocation-heavy code down; NumPy reports its buffers to tracemalloc, so they are included.
+    """
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def result_key(result):
+    """Returns what identifies a result across runs: the case, its parameters, the source and the size."""
+    return result['case'], json.dumps(result['params'], sort_keys=True), result['source'], result['size']
+
+
+def run_benchmarks(sizes, sources=SOURCES, case_filter=None, repeat=3, report=print):
+    """
+    Runs the benchmark matrix of cases x sources x sizes.
+
+    Args:
+        sizes (list): Text sizes in letters.
+        sources (tuple): The plaintext sources, see make_text.
+        case_filter (str): Only cases whose name contains this text are run. None runs every case.
+        repeat (int): Timed calls per measurement.
+        report (function): Called with a one-line summary of each result.
+
+    Returns:
+        list: One dict per measurement with the case, params, source, size, seconds, throughput in
+        MB/s (letters are bytes) and peak memory in MB.
+    """
+    results = []
+    cases = [case for case in build_cases() if not case_filter or case_filter in case[0]]
+    for source in sources:
+        for size in sizes:
+            plain = make_text(source, size)
+            for name, params, max_size, prepare in cases:
+                if max_size is not None and size > max_size:
+                    continue
+                seconds, peak = measure(prepare(plain), repeat)
+                result = {'case': name, 'params': params, 'source': source, 'size': size,
+                          'seconds': seconds, 'throughput_mb_s': size / (1 << 20) / max(seconds, 1e-9),
+                          'peak_mb': peak / (1 << 20)}
+                results.append(result)
+                report(f"{name:36} {json.dumps(params):44} {source:9} {size:>10}  {seconds * 1000:10.2f} ms  "
+                       f"{result['throughput_mb_s']:9.2f} MB/s  {result['peak_mb']:9.2f} MB peak")
+    return results
+
+
+# --------------------------------------------------------------------------------
+# HISTORY AND REGRESSIONS
+# --------------------------------------------------------------------------------
+def load_history(path):
+    """Returns the recorded runs in the history file, oldest first, or an empty list if there is none."""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)['runs']
+
+
+def save_history(path, runs):
+    """Writes the recorded runs to the history file, replacing it atomically."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'w', encoding='utf-8') as file:
+        json.dump({'runs': runs}, file, indent=1)
+    os.replace(temporary_path, path)
+
+
+def find_regressions(results, history, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares results with the most recent earlier measurement of the same case, source and size.
+
+    Args:
+        results (list): The current results, from run_benchmarks.
+        history (list): The earlier runs, oldest first.
+        threshold (float): The allowed fractional slow-down, e.g. 0.25 for 25 %.
+
+    Returns:
+        list: (result, baseline seconds, slow-down ratio) for every result slower than the threshold allows.
+    """
+    baselines = {}
+    for run in history:
+        for result in run['results']:
+            baselines[result_key(result)] = result['seconds']
+    regressions = []
+    for result in results:
+        baseline = baselines.get(result_key(result))
+        if baseline and result['seconds'] > baseline * (1 + threshold):
+            regressions.append((result, baseline, result['seconds'] / baseline))
+    return regressions
+
+
+def build_parser():
+    """Returns the argument parser of the benchmark runner."""
+    parser = argparse.ArgumentParser(description="Benchmark every cipher and cryptanalysis path and track "
+                                                 "wall time, throughput and peak memory across runs.")
+    parser.add_argument('--sizes', nargs='+', default=list(DEFAULT_SIZES),
+                        help=f"Text sizes, e.g. 1K 10M (default: {' '.join(DEFAULT_SIZES)}).")
+    parser.add_argument('--full', action='store_true', help=f"Use every size: {' '.join(FULL_SIZES)}.")
+    parser.add_argument('--sources', nargs='+', choices=SOURCES, default=list(SOURCES))
+    parser.add_argument('--filter', help="Only run cases whose name contains this text.")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed calls per measurement (fastest is kept).")
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help="The JSON history file.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Fail if a case is this fraction slower than in the previous run (default: 0.25).")
+    parser.add_argument('--no-record', action='store_true', help="Compare with the history without adding this run.")
+    return parser
+
+
+def main(argv=None):
+    """
+    Runs the benchmarks, records them and checks for regressions.
+
+    Args:
+        argv (list): The arguments, without the program name. None reads them from sys.argv.
+
+    Returns:
+        int: 0, or 1 if any case regressed beyond the threshold.
+    """
+    args = build_parser().parse_args(argv)
+    sizes = [parse_size(size) for size in (FULL_SIZES if args.full else args.sizes)]
+    history = load_history(args.history)
+
+    results = run_benchmarks(sizes, args.sources, args.filter, args.repeat)
+    regressions = find_regressions(results, history, args.threshold)
+    for result, baseline, ratio in regressions:
+        print(f"REGRESSION {result['case']} {json.dumps(result['params'])} {result['source']} {result['size']}: "
+              f"{result['seconds'] * 1000:.2f} ms vs {baseline * 1000:.2f} ms ({ratio:.2f}x)")
+
+    if not args.no_record:
+        history.append({'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                        'python': platform.python_version(), 'numpy': np.__version__,
+                        'machine': platform.platform(), 'results': results})
+        save_history(args.history, history)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def text_digest(coded):
+    """
+    Returns a short content hash of coded text, used to key cached analysis results.
+
+    Args:
+        coded (CodedText): The text to hash.
+
+    Returns:
+        str: A hex digest of the letter codes.
+    """
+    return hashlib.blake2b(coded.codes.tobytes(), digest_size=16).hexdigest()
+
+
+def array_digest(*arrays):
+    """
+    Returns a short content hash of one or more arrays, used to key results on the tables that produced them.
+
+    Args:
+        arrays (np.ndarray): The arrays to hash, in order.
+
+    Returns:
+        str: A hex digest of the dtypes, shapes and contents of the arrays.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+class StageCache:
+    """
+    A bounded least-recently-used cache for intermediate analysis results.
+
+    Entries are keyed by tuples such as (text digest, stage name, stage parameters), so each stage of an
+    analysis is stored separately and a re-run only computes the stages (or parts of stages) it has not
+    seen before. Hit, miss and eviction counters are kept so the cache can be sized.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Returns the cached value for key (marking it recently used), or default on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """Stores a value, evicting the least recently used entries beyond max_entries."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Returns the cached value for key, computing and storing it with compute() on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        """Removes every entry and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: hits, misses, evictions, the current number of entries and max_entries.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_MISSING = object()
@@ -0,0 +1,185 @@
+import string
+import numpy as np
+
+# The one byte-level table every text goes through on its way to 0-25 letter codes, whether it arrives as a
+# str or as raw file bytes: 'A'/'a' -> 0 ... 'Z'/'z' -> 25, every other byte is deleted. Only ASCII letters
+# count, and UTF-8 multi-byte characters never contain ASCII bytes, so a str and its UTF-8 bytes normalize
+# alike and raw bytes can be cut at any offset.
+_CODE_TABLE = bytes.maketrans((string.ascii_uppercase + string.ascii_lowercase).encode('ascii'),
+                              bytes(range(26)) * 2)
+_NON_LETTERS = bytes(b for b in range(256) if not (65 <= b <= 90 or 97 <= b <= 122))
+
+
+def bytes_to_codes(data):
+    """
+    Normalizes a block of ASCII/UTF-8 bytes straight to letter codes (A=0 ... Z=25).
+
+    Args:
+        data (bytes): The raw bytes to normalize.
+
+    Returns:
+        bytes: One byte per letter holding its code; everything that is not an ASCII letter is removed.
+    """
+    return data.translate(_CODE_TABLE, _NON_LETTERS)
+
+
+def codes_to_text(codes):
+    """
+    Converts an array of 0-25 letter codes back to an uppercase string.
+
+    Args:
+        codes (np.ndarray): The letter codes to convert.
+
+    Returns:
+        str: The uppercase string represented by the codes.
+    """
+    return (np.asarray(codes, dtype=np.uint8) + 65).tobytes().decode('ascii')
+
+
+class CodedText:
+    """
+    An immutable, normalized piece of text stored as a NumPy uint8 array of letter codes (A=0 ... Z=25).
+
+    Raw text is normalized once when the object is built, so the ciphers and the analysis functions can
+    work directly on the codes and only convert back to a string when the result is displayed.
+    """
+    __slots__ = ('_codes',)
+
+    def __init__(self, codes):
+        codes = np.array(codes, dtype=np.uint8)
+        if codes.ndim != 1:
+            raise ValueError("Coded text must be one dimensional.")
+        if codes.size and codes.max() > 25:
+            raise ValueError("Letter codes must be in the range 0-25.")
+        codes.flags.writeable = False
+        self._codes = codes
+
+    @classmethod
+    def from_text(cls, text):
+        """
+        Builds coded text from a raw string, keeping the letters A-Z in either case and dropping everything
+        else, including non-ASCII letters such as 'é' or 'ß'. This is the normalization ingest.ingest_file
+        applies to raw file bytes.
+        """
+        data = bytes_to_codes(text.encode('ascii', 'ignore'))
+        return cls._wrap(np.frombuffer(data, dtype=np.uint8))
+
+    @classmethod
+    def _wrap(cls, codes):
+        # Trusted constructor for arrays that are already valid 0-25 uint8 codes.
+        obj = cls.__new__(cls)
+        if codes.flags.writeable:
+            codes.flags.writeable = False
+        obj._codes = codes
+        return obj
+
+    @property
+    def codes(self):
+        """np.ndarray: The read-only array of letter codes."""
+        return self._codes
+
+    def to_text(self):
+        """Converts the coded text back to an uppercase string."""
+        return codes_to_text(self._codes)
+
+    def __len__(self):
+        return len(self._codes)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return CodedText._wrap(self._codes[item])
+        return chr(int(self._codes[item]) + 65)
+
+    def __iter__(self):
+        return iter(self.to_text())
+
+    def __str__(self):
+        return self.to_text()
+
+    def __repr__(self):
+        preview = codes_to_text(self._codes[:20])
+        suffix = '...' if len(self._codes) > 20 else ''
+        return f"CodedText('{preview}{suffix}', length={len(self._codes)})"
+
+    def __eq__(self, other):
+        if isinstance(other, CodedText):
+            return np.array_equal(self._codes, other._codes)
+        if isinstance(other, str):
+            return self.to_text() == other
+        return NotImplemented
+
+    def __hash__(self):
+        # Hash the decoded string so that a CodedText and the str it equals share a hash
+        return hash(self.to_text())
+
+
+def as_coded(text):
+    """
+    Returns the given text as CodedText, normalizing it only if it is not already coded.
+
+    Args:
+        text (str or CodedText): The text to convert.
+
+    Returns:
+        CodedText: The normalized coded text.
+    """
+    if isinstance(text, CodedText):
+        return text
+    return CodedText.from_text(text)
+
+
+def like_input(source, codes):
+    """
+    Wraps result codes to match the type of the original input, so coded input stays coded
+    and plain string input gets a plain string back at the output edge.
+
+    Args:
+        source (str or CodedText): The original input given to the caller.
+        codes (np.ndarray): The result letter codes.
+
+    Returns:
+        str or CodedText: The result in the same form as the input.
+    """
+    if isinstance(source, CodedText):
+        return CodedText._wrap(codes.astype(np.uint8, copy=False))
+    return codes_to_text(codes)
+
+
+def pack_texts(texts):
+    """
+    Normalizes many texts into one flat array of letter codes with offsets (a ragged array).
+
+    Args:
+        texts (list): The texts, as str or CodedText.
+
+    Returns:
+        tuple: (codes, offsets) where codes is a uint8 array of every text's letter codes back to back and
+        offsets has len(texts) + 1 entries, so text i is codes[offsets[i]:offsets[i + 1]].
+
+    Each string is normalized on its own, exactly as CodedText.from_text does, so any character may appear in
+    the texts; the pieces are then joined with a single concatenation.
+    """
+    pieces = [text.codes if isinstance(text, CodedText)
+              else np.frombuffer(bytes_to_codes(str(text).encode('ascii', 'ignore')), dtype=np.uint8)
+              for text in texts]
+    lengths = np.array([len(piece) for piece in pieces], dtype=np.int64)
+    codes = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.uint8)
+    offsets = np.zeros(len(pieces) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return codes, offsets
+
+
+def as_packed(texts):
+    """
+    Returns texts as a (codes, offsets) ragged array, packing them only if they are not packed already.
+
+    Args:
+        texts (list or tuple): A list of str or CodedText, or a (codes, offsets) tuple from pack_texts.
+
+    Returns:
+        tuple: (codes, offsets) as described in pack_texts.
+    """
+    if isinstance(texts, tuple) and len(texts) == 2 and isinstance(texts[1], np.ndarray):
+        codes, offsets = texts
+        return np.asarray(codes, dtype=np.uint8), np.asarray(offsets, dtype=np.int64)
+    return pack_texts(texts)
@@ -0,0 +1,142 @@
+import os
+
+import numpy as np
+
+from analysis import models, ngrams
+from analysis.coded_text import as_coded
+
+QUADGRAM_TABLE_SIZE = 26 ** 4
+
+# Corpus used to build the quadgram table when no prebuilt table has been loaded
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'texts', 'hobbit.txt')
+
+_quadgram_table = None  # Table explicitly loaded with load_quadgram_table
+_corpus_table = None  # Fallback table built from DEFAULT_CORPUS
+
+
+def quadgram_table_from_counts(counts):
+    """
+    Builds a quadgram log-probability table from quadgram counts.
+
+    Args:
+        counts (np.ndarray): Dense quadgram counts of length 26 ** 4.
+
+    Returns:
+        np.ndarray: A float32 table of log10 probabilities indexed by quadgram index. Quadgrams that never
+        occur get a floor of log10(0.01 / total) so a single unseen quadgram does not rule out a candidate.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    total = counts.sum()
+    if total == 0:
+        raise ValueError("Cannot build a quadgram table from an empty corpus.")
+    table = np.full(QUADGRAM_TABLE_SIZE, np.log10(0.01 / total))
+    seen = counts > 0
+    table[seen] = np.log10(counts[seen] / total)
+    return table.astype(np.float32)
+
+
+def build_quadgram_table(corpus):
+    """
+    Builds a quadgram log-probability table from a corpus text.
+
+    Args:
+        corpus (str or CodedText): The training text.
+
+    Returns:
+        np.ndarray: The float32 log-probability table (see quadgram_table_from_counts).
+    """
+    return quadgram_table_from_counts(ngrams.count_ngrams(as_coded(corpus), 4, sparse=False))
+
+
+def save_quadgram_table(table, file_path):
+    """
+    Saves a quadgram table as a binary .npy file (26 ** 4 float32 values, about 1.8 MB).
+
+    Args:
+        table (np.ndarray): The table to save.
+        file_path (str): The destination path.
+    """
+    np.save(file_path, np.asarray(table, dtype=np.float32))
+
+
+def load_quadgram_table(file_path, set_default=True):
+    """
+    Loads a quadgram table saved with save_quadgram_table, memory-mapped read-only.
+
+    Args:
+        file_path (str): The path of the .npy table.
+        set_default (bool): Whether to use the loaded table for all later scoring calls.
+
+    Returns:
+        np.ndarray: The loaded table.
+    """
+    global _quadgram_table
+    table = np.load(file_path, mmap_mode='r')
+    if table.shape != (QUADGRAM_TABLE_SIZE,) or table.dtype != np.float32:
+        raise ValueError(f"{file_path} is not a quadgram table.")
+    if set_default:
+        _quadgram_table = table
+    return table
+
+
+def get_quadgram_table():
+    """
+    Returns the default quadgram table, loaded on first use.
+
+    Returns:
+        np.ndarray: The float32 log-probability table. A table loaded with load_quadgram_table comes first,
+        then the table of the model directory selected with models.set_model_dir (memory-mapped), and
+        otherwise the table is built from DEFAULT_CORPUS.
+    """
+    global _corpus_table
+    if _quadgram_table is not None:
+        return _quadgram_table
+    table = models.load_quadgram_table()
+    if table is not None:
+        return table
+    if _corpus_table is None:
+        with open(DEFAULT_CORPUS, 'r', encoding='utf-8') as file:
+            _corpus_table = build_quadgram_table(file.read())
+    return _corpus_table
+
+
+def quadgram_score(text, table=None, normalize=False):
+    """
+    Scores how English-like a text is by summing the log probabilities of its quadgrams.
+
+    Args:
+        text (str or CodedText or np.ndarray): The text or its letter codes.
+        table (np.ndarray): The quadgram table to use. Defaults to get_quadgram_table().
+        normalize (bool): Whether to return the mean per quadgram instead of the sum, which makes
+            scores of different lengths comparable.
+
+    Returns:
+        float: The log-likelihood fitness (higher is better). Texts shorter than 4 letters score 0.
+    """
+    table = get_quadgram_table() if table is None else table
+    codes = text if isinstance(text, np.ndarray) else as_coded(text).codes
+    indices = ngrams.ngram_indices(codes, 4)
+    if len(indices) == 0:
+        return 0.0
+    score = float(table[indices].sum(dtype=np.float64))
+    return score / len(indices) if normalize else score
+
+
+def quadgram_score_batch(code_matrix, table=None, normalize=False):
+    """
+    Scores many equal-length candidate plaintexts at once with one gather and sum.
+
+    Args:
+        code_matrix (np.ndarray): A K x N array of letter codes, one candidate per row.
+        table (np.ndarray): The quadgram table to use. Defaults to get_quadgram_table().
+        normalize (bool): Whether to return the mean per quadgram instead of the sum.
+
+    Returns:
+        np.ndarray: The fitness of each row (higher is better).
+    """
+    table = get_quadgram_table() if table is None else table
+    indices = ngrams.ngram_indices(np.atleast_2d(code_matrix), 4)
+    if indices.shape[-1] == 0:
+        return np.zeros(indices.shape[0])
+    scores = table[indices].sum(axis=-1, dtype=np.float64)
+    return scores / indices.shape[-1] if normalize else scores
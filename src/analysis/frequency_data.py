@@ -1,3 +1,8 @@
+from functools import lru_cache
+
+from analysis import models
+from analysis import utility as util
+
 # Letter Frequencies
 letter_frequencies = {
     'E': 12.575645, 'T': 9.085226, 'A': 8.000395, 'O': 7.591270, 'I': 6.920007,
@@ -23,3 +28,65 @@ trigram_frequencies = {
     'ION': 0.506454, 'TER': 0.461099, 'WAS': 0.460487, 'YOU': 0.437213, 'ITH': 0.431250,
     'VER': 0.430732, 'ALL': 0.422758, 'WIT': 0.397290, 'THI': 0.394796, 'TIO': 0.378058
 }
+
+
+frequency_tables = {1: letter_frequencies, 2: bigram_frequencies, 3: trigram_frequencies}
+
+_dense_tables = {}
+
+
+def dense_table(n):
+    """
+    Returns the expected n-gram frequencies (percentages) as a dense array indexed by n-gram index.
+
+    Args:
+        n (int): The n-gram order (1 to 5 with a model selected, otherwise 1 to 3).
+
+    Returns:
+        np.ndarray: A read-only dense array of percentages, built once per model.
+
+    The counts of the model selected with models.set_model_dir are used when there is one; otherwise the
+    hard-coded tables above are laid out as dense arrays.
+    """
+    if n not in _dense_tables:
+        counts = models.load_counts(n)
+        if counts is not None and counts.sum() > 0:
+            table = counts * (100 / counts.sum())
+        elif models.get_model_dir() is None and n in frequency_tables:
+            table = util.dense_frequencies(frequency_tables[n], n)
+        else:
+            raise ValueError(f"No {n}-gram frequency table available; build one with analysis.model_builder.")
+        table.flags.writeable = False
+        _dense_tables[n] = table
+    return _dense_tables[n]
+
+
+def dense_tables():
+    """Returns the dense letter, bigram and trigram tables (see dense_table)."""
+    return dense_table(1), dense_table(2), dense_table(3)
+
+
+@lru_cache(maxsize=256)
+def expected_counts(n, text_length):
+    """
+    Returns the expected n-gram counts for a text of the given length, cached per length.
+
+    Args:
+        n (int): The n-gram order.
+        text_length (int): The number of items the counts are scaled to.
+
+    Returns:
+        np.ndarray: A read-only dense array of expected counts indexed by n-gram index.
+    """
+    counts = dense_table(n) * (text_length / 100)
+    counts.flags.writeable = False
+    return counts
+
+
+def _clear_caches():
+    # Dense tables and expected counts belong to the model they were built from
+    _dense_tables.clear()
+    expected_counts.cache_clear()
+
+
+models.add_change_callback(_clear_caches)
@@ -0,0 +1,161 @@
+import functools
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from analysis.coded_text import CodedText, bytes_to_codes
+
+DEFAULT_CHUNK_SIZE = 1 << 24  # Bytes normalized per chunk
+DEFAULT_STREAM_CHUNK_SIZE = 1 << 20  # Characters read per chunk when streaming through a cipher
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'cipher_normalized_cache')
+DEFAULT_CACHE_MAX_BYTES = 1 << 30  # Normalized copies kept on disk before the least recently used are removed
+
+
+def normalize_chunk(data):
+    """
+    Normalizes a chunk of raw file bytes straight to letter codes (A=0 ... Z=25).
+
+    Args:
+        data (bytes): The raw bytes.
+
+    Returns:
+        bytes: One byte per letter holding its code; everything that is not a letter is removed, with the
+        same table CodedText.from_text uses.
+    """
+    return bytes_to_codes(data)
+
+
+def iter_code_chunks(source, chunk_size=DEFAULT_STREAM_CHUNK_SIZE):
+    """
+    Streams letter codes from a file object or an iterable of text chunks.
+
+    Args:
+        source: A file object opened in text or binary mode, a single str, bytes or CodedText, or an
+            iterable of them (for example a generator of lines).
+        chunk_size (int): The number of characters or bytes read at a time from a file object.
+
+    Yields:
+        np.ndarray: The letter codes of each chunk; chunks without any letters are skipped.
+    """
+    if isinstance(source, (str, bytes, bytearray, CodedText)):
+        source = [source]
+    elif hasattr(source, 'read'):
+        source = iter(functools.partial(source.read, chunk_size), source.read(0))
+    for chunk in source:
+        if isinstance(chunk, CodedText):
+            codes = chunk.codes
+        elif isinstance(chunk, (bytes, bytearray, memoryview)):
+            codes = np.frombuffer(normalize_chunk(bytes(chunk)), dtype=np.uint8)
+        else:
+            codes = CodedText.from_text(chunk).codes
+        if len(codes):
+            yield codes
+
+
+def cache_path(file_path, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Returns where the normalized copy of a file is cached.
+
+    Args:
+        file_path (str): The input file.
+        cache_dir (str): The cache directory.
+
+    Returns:
+        str: The cache file path, keyed by the file's real path, size and modification time so an
+        edited file is normalized again.
+    """
+    stat = os.stat(file_path)
+    identity = f"{os.path.realpath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}".encode('utf-8')
+    return os.path.join(cache_dir, hashlib.blake2b(identity, digest_size=16).hexdigest() + '.codes')
+
+
+def _open_codes(path):
+    # Map a cached code file read-only; np.memmap cannot map an empty file
+    if os.path.getsize(path) == 0:
+        return CodedText(np.zeros(0, dtype=np.uint8))
+    return CodedText._wrap(np.memmap(path, dtype=np.uint8, mode='r'))
+
+
+def _normalize_into(file_path, output, chunk_size):
+    # Stream the memory-mapped input through the translation table one chunk at a time
+    with open(file_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for start in range(0, len(mapped), chunk_size):
+                output.write(normalize_chunk(mapped[start:start + chunk_size]))
+
+
+def _evict(cache_dir, max_bytes, keep):
+    # Remove the least recently used normalized copies until the cache fits in max_bytes, never the one just made
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith('.codes') and entry.path != keep:
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue  # Removed by another process in the meantime
+            entries.append((stat.st_atime_ns, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries) + os.path.getsize(keep)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+            total -= size
+        except OSError:
+            pass  # Still mapped on a platform that locks mapped files, or already removed
+
+
+def ingest_file(file_path, cache_dir=DEFAULT_CACHE_DIR, chunk_size=DEFAULT_CHUNK_SIZE, use_cache=True,
+                cache_max_bytes=DEFAULT_CACHE_MAX_BYTES):
+    """
+    Reads and normalizes a text file of any size into coded text with bounded memory.
+
+    Args:
+        file_path (str): The file to read.
+        cache_dir (str): Directory for normalized copies. A second ingestion of the same unchanged file
+            maps the cached copy and skips normalization entirely.
+        chunk_size (int): The number of bytes normalized at a time.
+        use_cache (bool): Whether to read and write the on-disk cache. Without it the codes are built in memory.
+        cache_max_bytes (int): The size the cache directory is kept under. Writing a new copy removes the least
+            recently used ones beyond it. None never removes anything.
+
+    Returns:
+        CodedText or None: The normalized text (memory-mapped when cached), or None if the file does not exist.
+
+    The input is memory-mapped and translated in fixed-size chunks with a precompiled byte table, so peak
+    memory depends on chunk_size rather than on the file size.
+    """
+    if not os.path.exists(file_path):
+        print(f"File not found: {file_path}")
+        return None
+
+    if not use_cache:
+        output = io.BytesIO()
+        _normalize_into(file_path, output, chunk_size)
+        return CodedText._wrap(np.frombuffer(output.getvalue(), dtype=np.uint8))
+
+    path = cache_path(file_path, cache_dir)
+    if os.path.exists(path):
+        # Mark the copy as recently used; the modification time stays the time it was written
+        os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+    else:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a temporary file first so a concurrent or interrupted run never sees a partial cache file
+        descriptor, temporary_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as output:
+                _normalize_into(file_path, output, chunk_size)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+        if cache_max_bytes is not None:
+            _evict(cache_dir, cache_max_bytes, path)
+    return _open_codes(path)
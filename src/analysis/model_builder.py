@@ -0,0 +1,198 @@
+"""
+Builds n-gram frequency models from a directory of corpus texts.
+
+Usage:
+    python src/analysis/model_builder.py texts --output models --max-order 5 --workers 8
+
+The corpus is streamed in fixed-size chunks, each chunk is counted in a process pool and the partial
+count arrays are summed as they come back. The result is written as versioned .npy files that
+analysis.models memory-maps on first use.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+if __name__ in ('__main__', '__mp_main__'):
+    # Allow running the builder as a script (and spawned workers to re-import it) from the src directory
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis import models, ngrams
+from analysis.coded_text import CodedText
+from analysis.fitness import quadgram_table_from_counts
+
+DEFAULT_CHUNK_SIZE = 1 << 23  # Characters read per chunk
+MAX_ORDER = 5
+
+
+def find_corpus_files(paths):
+    """
+    Expands a list of files and directories into the sorted list of corpus text files.
+
+    Args:
+        paths (list): File or directory paths. Directories are searched recursively for .txt files.
+
+    Returns:
+        list: The corpus file paths.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, names in os.walk(path):
+                files.extend(os.path.join(directory, name) for name in names if name.lower().endswith('.txt'))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            raise FileNotFoundError(f"Corpus path not found: {path}")
+    return sorted(files)
+
+
+def iter_corpus_chunks(file_paths, chunk_size=DEFAULT_CHUNK_SIZE, overlap=MAX_ORDER - 1):
+    """
+    Streams corpus files as chunks of letter codes.
+
+    Args:
+        file_paths (list): The corpus files to read.
+        chunk_size (int): The number of characters to read per chunk.
+        overlap (int): How many codes from the end of the previous chunk of the same file to repeat at
+            the start of the next one, so n-grams spanning a chunk boundary are not lost.
+
+    Yields:
+        tuple: (codes, carried) where carried is the number of leading codes repeated from the previous chunk.
+    """
+    empty = np.zeros(0, dtype=np.uint8)
+    for path in file_paths:
+        tail = empty
+        with open(path, 'r', encoding='utf-8', errors='ignore') as file:
+            while True:
+                text = file.read(chunk_size)
+                if not text:
+                    break
+                chunk = np.concatenate([tail, CodedText.from_text(text).codes])
+                yield chunk, len(tail)
+                tail = chunk[max(len(chunk) - overlap, 0):] if overlap else empty
+
+
+def count_chunk(chunk, carried, max_order):
+    """
+    Counts the 1- to max_order-grams of one chunk (the map step, run in a worker process).
+
+    Args:
+        chunk (np.ndarray): The letter codes of the chunk.
+        carried (int): The number of leading codes already counted as part of the previous chunk.
+        max_order (int): The highest n-gram order to count.
+
+    Returns:
+        list: For each order, a dense count array (orders up to ngrams.DENSE_MAX_ORDER) or a
+        ngrams.SparseCounts of the n-grams that occur.
+    """
+    partial = []
+    for n in range(1, max_order + 1):
+        # Only count n-grams that end in the new part of the chunk; the rest were counted last time
+        start = max(carried - n + 1, 0)
+        partial.append(ngrams.count_ngrams(chunk[start:], n))
+    return partial
+
+
+def _merge(totals, partial):
+    # The reduce step: add one chunk's partial counts into the running totals
+    for total, counts in zip(totals, partial):
+        if isinstance(counts, ngrams.SparseCounts):
+            total[counts.indices] += counts.counts  # Sparse indices are unique, so fancy += is safe
+        else:
+            total += counts
+
+
+def _compact(counts):
+    # Store counts in 32 bits unless the corpus is large enough to need 64
+    return counts.astype(np.uint32) if counts.max(initial=0) < 2 ** 32 else counts
+
+
+def _save_array(output_dir, file_name, array):
+    # Write to a temporary file first so readers never see a half-written model
+    path = os.path.join(output_dir, file_name)
+    temporary_path = path + '.tmp.npy'
+    np.save(temporary_path, array)
+    os.replace(temporary_path, path)
+
+
+def build_models(corpus_paths, output_dir=None, max_order=MAX_ORDER, chunk_size=DEFAULT_CHUNK_SIZE, workers=None,
+                 progress_callback=lambda message: None):
+    """
+    Counts the 1- to max_order-grams of a corpus across a process pool and writes the model files.
+
+    Args:
+        corpus_paths (list): Corpus files or directories.
+        output_dir (str): Where to write the models. Defaults to models.DEFAULT_MODEL_DIR.
+        max_order (int): The highest n-gram order to count (1 to 5).
+        chunk_size (int): The number of characters per chunk.
+        workers (int): The number of worker processes. Defaults to the number of CPUs.
+        progress_callback (function): Callback for progress messages.
+
+    Returns:
+        dict: The manifest written alongside the model files.
+    """
+    if not 1 <= max_order <= MAX_ORDER:
+        raise ValueError(f"max_order must be between 1 and {MAX_ORDER}.")
+    output_dir = output_dir or models.DEFAULT_MODEL_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    files = find_corpus_files(corpus_paths)
+    workers = workers or os.cpu_count() or 1
+
+    totals = [np.zeros(26 ** n, dtype=np.int64) for n in range(1, max_order + 1)]
+    started = time.time()
+    chunks_done = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for chunk, carried in iter_corpus_chunks(files, chunk_size, max_order - 1):
+            # Keep a bounded number of chunks in flight so memory does not grow with the corpus size
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    _merge(totals, future.result())
+                    chunks_done += 1
+                progress_callback(f"Counted {chunks_done} chunks")
+            pending.add(executor.submit(count_chunk, chunk, carried, max_order))
+        for future in pending:
+            _merge(totals, future.result())
+            chunks_done += 1
+
+    for n, counts in enumerate(totals, start=1):
+        _save_array(output_dir, models.counts_file_name(n), _compact(counts))
+    if max_order >= 4:
+        _save_array(output_dir, models.quadgram_file_name(), quadgram_table_from_counts(totals[3]))
+
+    manifest = {
+        'version': models.MODEL_FORMAT_VERSION,
+        'max_order': max_order,
+        'corpus_files': files,
+        'letters': int(totals[0].sum()),
+        'chunks': chunks_done,
+        'seconds': round(time.time() - started, 3),
+    }
+    with open(os.path.join(output_dir, models.manifest_file_name()), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2)
+    progress_callback(f"Wrote {max_order} n-gram models from {manifest['letters']} letters to {output_dir}")
+    # The files may have replaced the selected model, which must not keep being served from the old mapping
+    models.reload()
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build n-gram frequency models from corpus texts.")
+    parser.add_argument('corpus', nargs='+', help="Corpus files or directories of .txt files")
+    parser.add_argument('--output', default=models.DEFAULT_MODEL_DIR, help="Directory to write the models to")
+    parser.add_argument('--max-order', type=int, default=MAX_ORDER, help="Highest n-gram order to count")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Characters per chunk")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes")
+    args = parser.parse_args(argv)
+    build_models(args.corpus, args.output, args.max_order, args.chunk_size, args.workers, print)
+
+
+if __name__ == '__main__':
+    main()
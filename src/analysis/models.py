@@ -0,0 +1,117 @@
+import json
+import os
+
+import numpy as np
+
+# Bump when the layout of the model files changes; older files are then ignored rather than misread.
+MODEL_FORMAT_VERSION = 1
+
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'models')
+
+# Models are opt-in: until a directory is selected the built-in tables are used, so building models into
+# DEFAULT_MODEL_DIR never changes results by itself
+_model_dir = None
+_loaded = {}
+_change_callbacks = []
+
+
+def counts_file_name(n):
+    """Returns the file name used for the n-gram count model of order n."""
+    return f"ngrams_{n}.v{MODEL_FORMAT_VERSION}.npy"
+
+
+def quadgram_file_name():
+    """Returns the file name used for the quadgram log-probability table."""
+    return f"quadgrams.v{MODEL_FORMAT_VERSION}.npy"
+
+
+def manifest_file_name():
+    """Returns the file name of the manifest describing a model directory."""
+    return f"manifest.v{MODEL_FORMAT_VERSION}.json"
+
+
+def set_model_dir(model_dir):
+    """
+    Selects the model directory every analysis module reads from, and drops everything built from the old one.
+
+    Args:
+        model_dir (str): The directory containing files written by analysis.model_builder, or None to go
+            back to the built-in tables.
+    """
+    global _model_dir
+    _model_dir = model_dir
+    reload()
+
+
+def get_model_dir():
+    """Returns the selected model directory, or None if the built-in tables are in use."""
+    return _model_dir
+
+
+def add_change_callback(callback):
+    """
+    Registers a function to call whenever the model changes, so caches built from the old model are dropped.
+
+    Args:
+        callback (function): Called without arguments by set_model_dir and reload.
+    """
+    _change_callbacks.append(callback)
+
+
+def reload():
+    """
+    Forgets every loaded model file and notifies the registered callbacks.
+
+    analysis.model_builder calls this after writing, so files rewritten in the selected directory are
+    mapped again instead of being served from the old mapping.
+    """
+    _loaded.clear()
+    for callback in _change_callbacks:
+        callback()
+
+
+def _load(file_name):
+    # Models are memory-mapped on first use and shared by every later caller in the process
+    if _model_dir is None:
+        return None
+    if file_name not in _loaded:
+        path = os.path.join(_model_dir, file_name)
+        _loaded[file_name] = np.load(path, mmap_mode='r') if os.path.exists(path) else None
+    return _loaded[file_name]
+
+
+def load_counts(n):
+    """
+    Returns the n-gram count model of order n from the selected directory, memory-mapped read-only.
+
+    Args:
+        n (int): The n-gram order (1 to 5).
+
+    Returns:
+        np.ndarray or None: Dense counts indexed by base-26 n-gram index, or None if there is no model.
+    """
+    return _load(counts_file_name(n))
+
+
+def load_quadgram_table():
+    """
+    Returns the prebuilt quadgram log-probability table from the selected directory, memory-mapped read-only.
+
+    Returns:
+        np.ndarray or None: The float32 table, or None if there is no model.
+    """
+    return _load(quadgram_file_name())
+
+
+def load_manifest():
+    """
+    Returns the manifest of the selected model directory.
+
+    Returns:
+        dict or None: The manifest written by the builder, or None if there is none.
+    """
+    path = os.path.join(_model_dir, manifest_file_name()) if _model_dir else None
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
@@ -0,0 +1,303 @@
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+
+
+def prime_factors(modulus):
+    """
+    Returns the distinct prime factors of a modulus.
+
+    Args:
+        modulus (int): The modulus.
+
+    Returns:
+        list: The prime factors in increasing order.
+
+    Raises:
+        ValueError: If a prime divides the modulus more than once. Matrices are inverted one prime at a time
+            and recombined with the Chinese remainder theorem, which needs a squarefree modulus (26 = 2 x 13).
+    """
+    factors = []
+    remaining = modulus
+    factor = 2
+    while factor * factor <= remaining:
+        if remaining % factor == 0:
+            factors.append(factor)
+            remaining //= factor
+            if remaining % factor == 0:
+                raise ValueError(f"Modulus {modulus} is not squarefree.")
+        factor += 1
+    if remaining > 1:
+        factors.append(remaining)
+    return factors
+
+
+def _inverse_mod_prime(matrices, prime):
+    # Gauss-Jordan elimination over the field of integers mod prime, for a whole K x n x n stack at once
+    count, size = matrices.shape[0], matrices.shape[-1]
+    reciprocal = np.array([pow(value, -1, prime) if value else 0 for value in range(prime)], dtype=np.int64)
+    augmented = np.concatenate([matrices % prime, np.broadcast_to(np.eye(size, dtype=np.int64),
+                                                                  matrices.shape)], axis=2)
+    invertible = np.ones(count, dtype=bool)
+    stack = np.arange(count)
+
+    for column in range(size):
+        # Choose the first row at or below the diagonal with a nonzero entry in this column
+        candidates = augmented[:, column:, column] != 0
+        invertible &= candidates.any(axis=1)
+        pivot_rows = column + candidates.argmax(axis=1)
+        pivot = augmented[stack, pivot_rows].copy()
+        augmented[stack, pivot_rows] = augmented[:, column]
+        # Scale the pivot row to a leading 1, then clear the column from every other row
+        pivot = pivot * reciprocal[pivot[:, column]][:, None] % prime
+        augmented -= augmented[:, :, column:column + 1] * pivot[:, None, :]
+        augmented[:, column] = pivot
+        augmented %= prime
+
+    return augmented[:, :, size:], invertible
+
+
+def inverse_mod_matrices(matrices, modulus=26):
+    """
+    Inverts a stack of integer matrices modulo a squarefree modulus, exactly and in a single vectorized pass.
+
+    Args:
+        matrices (np.ndarray): A K x n x n stack of integer matrices (a single n x n matrix is also accepted).
+        modulus (int): The modulus, 26 for the Hill cipher.
+
+    Returns:
+        tuple: (inverses, invertible) where inverses has the shape of matrices and invertible is a boolean
+        array telling which matrices have an inverse. Rows of non-invertible matrices are meaningless.
+
+    Each matrix is inverted by Gauss-Jordan elimination modulo every prime factor of the modulus, and the
+    results are combined with the Chinese remainder theorem (for 26: x = 13a + 14b mod 26 from a mod 2 and
+    b mod 13). All arithmetic stays in small int64 values, so there is no floating point error.
+    """
+    matrices = np.asarray(matrices, dtype=np.int64)
+    single = matrices.ndim == 2
+    stack = matrices[None] if single else matrices
+
+    inverses = np.zeros(stack.shape, dtype=np.int64)
+    invertible = np.ones(stack.shape[0], dtype=bool)
+    for prime in prime_factors(modulus):
+        prime_inverses, prime_invertible = _inverse_mod_prime(stack, prime)
+        invertible &= prime_invertible
+        # CRT coefficient: 1 mod this prime and 0 mod every other factor
+        cofactor = modulus // prime
+        inverses += prime_inverses * (cofactor * pow(cofactor, -1, prime))
+    inverses %= modulus
+
+    return (inverses[0], bool(invertible[0])) if single else (inverses, invertible)
+
+
+def _solve_mod_prime(coefficients, values, prime):
+    # Gauss-Jordan on the m x (n + k) system [A | B] over the integers mod prime
+    size = coefficients.shape[1]
+    reciprocal = np.array([pow(value, -1, prime) if value else 0 for value in range(prime)], dtype=np.int64)
+    augmented = np.concatenate([coefficients, values], axis=1) % prime
+
+    for column in range(size):
+        nonzero = np.flatnonzero(augmented[column:, column])
+        if not len(nonzero):
+            return None  # A does not have full column rank: the solution is not unique
+        pivot_row = column + nonzero[0]
+        pivot = augmented[pivot_row] * reciprocal[augmented[pivot_row, column]] % prime
+        augmented[pivot_row] = augmented[column]
+        augmented -= np.outer(augmented[:, column], pivot)
+        augmented[column] = pivot
+        augmented %= prime
+
+    # Every equation beyond the first n must now read 0 = 0, otherwise the system is inconsistent
+    if augmented[size:, size:].any():
+        return None
+    return augmented[:size, size:]
+
+
+def solve_mod(coefficients, values, modulus=26):
+    """
+    Solves an overdetermined linear system A X = B modulo a squarefree modulus in one pass.
+
+    Args:
+        coefficients (np.ndarray): The m x n matrix A, with m >= n (one row per known equation).
+        values (np.ndarray): The m x k matrix B.
+        modulus (int): The modulus, 26 for the Hill cipher.
+
+    Returns:
+        np.ndarray or None: The unique n x k solution X, or None if the equations are inconsistent or do not
+        determine X uniquely modulo every prime factor of the modulus.
+
+    All m equations are eliminated together modulo each prime factor and the solutions are combined with the
+    Chinese remainder theorem, which costs O(m n (n + k)). Unlike inverting n x n sub-blocks, this succeeds
+    whenever the rows of A span the full space, even if no n of them form an invertible matrix modulo 26.
+    """
+    coefficients = np.asarray(coefficients, dtype=np.int64)
+    values = np.asarray(values, dtype=np.int64)
+    solution = np.zeros((coefficients.shape[1], values.shape[1]), dtype=np.int64)
+    for prime in prime_factors(modulus):
+        prime_solution = _solve_mod_prime(coefficients, values, prime)
+        if prime_solution is None:
+            return None
+        cofactor = modulus // prime
+        solution += prime_solution * (cofactor * pow(cofactor, -1, prime))
+    return solution % modulus
+
+
+def determinants(matrices):
+    """
+    Computes exact integer determinants of a stack of integer matrices with fraction-free Bareiss elimination.
+
+    Args:
+        matrices (np.ndarray): A K x n x n stack of integer matrices (a single n x n matrix is also accepted).
+
+    Returns:
+        np.ndarray or int: The K determinants, or a Python int for a single matrix.
+
+    Every division in the Bareiss recurrence is exact, so unlike np.linalg.det there is no rounding at any
+    size. The work is done in int64 when the Hadamard bound shows no intermediate value can overflow, and in
+    Python integers (object arrays) otherwise, still vectorized across the stack.
+    """
+    matrices = np.asarray(matrices)
+    single = matrices.ndim == 2
+    stack = matrices[None] if single else matrices
+    count, size = stack.shape[0], stack.shape[-1]
+
+    # Intermediate Bareiss values are minors, bounded by the Hadamard bound; their pairwise products must fit
+    largest = int(np.abs(stack).max()) if stack.size else 0
+    bound = (largest * largest * size) ** size  # Square of the Hadamard bound (max |entry| * sqrt(n)) ** n
+    dtype = np.int64 if bound < 2 ** 62 else object
+    work = stack.astype(dtype)
+    sign = np.ones(count, dtype=dtype)
+    previous = np.ones(count, dtype=dtype)
+    singular = np.zeros(count, dtype=bool)
+    rows = np.arange(count)
+
+    for column in range(size - 1):
+        # Swap the first nonzero entry at or below the diagonal into the pivot position
+        candidates = work[:, column:, column] != 0
+        singular |= ~candidates.any(axis=1)
+        pivot_rows = column + candidates.argmax(axis=1)
+        swapped = pivot_rows != column
+        pivot_copy = work[rows, pivot_rows].copy()
+        work[rows, pivot_rows] = work[:, column]
+        work[:, column] = pivot_copy
+        sign[swapped] = -sign[swapped]
+
+        pivot = work[:, column, column]
+        lower = work[:, column + 1:, column + 1:]
+        outer = work[:, column + 1:, column][:, :, None] * work[:, column, column + 1:][:, None, :]
+        update = lower * pivot[:, None, None] - outer
+        work[:, column + 1:, column + 1:] = update // previous[:, None, None]
+        # A singular matrix has a zero pivot; keep dividing by 1 so the remaining (ignored) work stays defined
+        previous = np.where(pivot == 0, 1, pivot).astype(dtype)
+
+    result = sign * work[:, size - 1, size - 1] if size else np.ones(count, dtype=dtype)
+    result = np.where(singular, 0, result).astype(dtype)
+    return int(result[0]) if single else result
+
+
+@lru_cache(maxsize=None)
+def invertible_2x2_mask(modulus=26):
+    """
+    Returns a lookup table of which 2 x 2 matrices are invertible modulo the modulus.
+
+    Args:
+        modulus (int): The modulus.
+
+    Returns:
+        np.ndarray: A read-only boolean array of length modulus ** 4, indexed by the entries a, b, c, d of
+        [[a, b], [c, d]] read as the base-modulus number abcd.
+    """
+    a, b, c, d = np.indices((modulus,) * 4).reshape(4, -1)
+    coprime = np.array([gcd(value, modulus) == 1 for value in range(modulus)])
+    mask = coprime[(a * d - b * c) % modulus]
+    mask.flags.writeable = False
+    return mask
+
+
+@lru_cache(maxsize=None)
+def _invertible_2x2_indices(modulus, low):
+    # Table indices of the invertible 2 x 2 matrices whose entries are all at least low
+    indices = np.flatnonzero(invertible_2x2_mask(modulus))
+    digits = indices[:, None] // modulus ** np.arange(3, -1, -1) % modulus
+    indices = indices[(digits >= low).all(axis=1)]
+    indices.flags.writeable = False
+    return indices
+
+
+def is_invertible(matrix, modulus=26):
+    """
+    Tells whether an integer matrix is invertible modulo the modulus, exactly.
+
+    Args:
+        matrix (np.ndarray): An n x n integer matrix.
+        modulus (int): The modulus.
+
+    Returns:
+        bool: True if the determinant is coprime with the modulus. 2 x 2 matrices are a single table lookup.
+    """
+    matrix = np.asarray(matrix, dtype=np.int64) % modulus
+    if matrix.shape == (2, 2):
+        return bool(invertible_2x2_mask(modulus)[matrix.ravel() @ modulus ** np.arange(3, -1, -1)])
+    return gcd(determinants(matrix) % modulus, modulus) == 1
+
+
+def random_invertible_matrices(size, count, modulus=26, low=0):
+    """
+    Draws random matrices that are invertible modulo the modulus, in bulk.
+
+    Args:
+        size (int): The matrix size n.
+        count (int): How many matrices to draw.
+        modulus (int): The modulus.
+        low (int): The smallest allowed entry; entries are drawn uniformly from low to modulus - 1.
+
+    Returns:
+        np.ndarray: A count x n x n int64 stack, uniformly distributed over the allowed invertible matrices.
+
+    2 x 2 matrices are drawn straight from the precomputed table. Larger ones are drawn in batches and
+    filtered by the batched inverse, which keeps roughly a third of the draws modulo 26 for any n.
+    """
+    if size == 2:
+        indices = _invertible_2x2_indices(modulus, low)
+        chosen = indices[np.random.randint(0, len(indices), count)]
+        return (chosen[:, None] // modulus ** np.arange(3, -1, -1) % modulus).reshape(count, 2, 2)
+
+    batches = []
+    found = 0
+    while found < count:
+        drawn = np.random.randint(low, modulus, (max(4 * (count - found), 16), size, size))
+        drawn = drawn[inverse_mod_matrices(drawn, modulus)[1]]
+        batches.append(drawn)
+        found += len(drawn)
+    return np.concatenate(batches)[:count].astype(np.int64)
+
+
+@lru_cache(maxsize=4096)
+def _cached_inverse(matrix_bytes, size, modulus):
+    matrix = np.frombuffer(matrix_bytes, dtype=np.int64).reshape(size, size)
+    inverse, invertible = inverse_mod_matrices(matrix, modulus)
+    if not invertible:
+        return None
+    inverse.flags.writeable = False
+    return inverse
+
+
+def matrix_mod_inverse(matrix, modulus=26):
+    """
+    Returns the inverse of one integer matrix modulo the given modulus, cached by the matrix contents.
+
+    Args:
+        matrix (np.ndarray): An n x n integer matrix.
+        modulus (int): The modulus.
+
+    Returns:
+        np.ndarray or None: The read-only inverse, or None if the matrix is not invertible modulo modulus.
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.int64) % modulus
+    return _cached_inverse(matrix.tobytes(), matrix.shape[0], modulus)
+
+
+def cache_info():
+    """Returns the hit and miss statistics of the inverse cache."""
+    return _cached_inverse.cache_info()
@@ -0,0 +1,126 @@
+from collections import namedtuple
+
+import numpy as np
+
+from analysis.coded_text import as_coded
+
+# Orders up to this size are counted into dense arrays (26, 676 and 17576 cells).
+# Higher orders default to the sparse representation below.
+DENSE_MAX_ORDER = 3
+
+SparseCounts = namedtuple('SparseCounts', ['indices', 'counts'])
+SparseCounts.__doc__ = "Sparse n-gram counts: sorted base-26 n-gram indices and the count of each."
+
+
+def ngram_index(ngram):
+    """
+    Converts an n-gram string such as 'THE' to its base-26 integer index.
+
+    Args:
+        ngram (str): The uppercase n-gram.
+
+    Returns:
+        int: The base-26 index of the n-gram (A=0, so 'AA' = 0 and 'ZZ' = 675).
+    """
+    index = 0
+    for char in ngram:
+        index = index * 26 + (ord(char) - 65)
+    return index
+
+
+def ngram_string(index, n):
+    """
+    Converts a base-26 n-gram index back to its n-gram string.
+
+    Args:
+        index (int): The base-26 index of the n-gram.
+        n (int): The length of the n-gram.
+
+    Returns:
+        str: The uppercase n-gram.
+    """
+    chars = []
+    for _ in range(n):
+        index, remainder = divmod(int(index), 26)
+        chars.append(chr(remainder + 65))
+    return ''.join(reversed(chars))
+
+
+def ngram_indices(codes, n):
+    """
+    Encodes every overlapping n-gram of a code array as a base-26 integer.
+
+    Args:
+        codes (np.ndarray): Letter codes (0-25). A 2-D array is treated as one text per row.
+        n (int): The n-gram length.
+
+    Returns:
+        np.ndarray: An int64 array with one index per n-gram position (len - n + 1 along the last axis).
+    """
+    codes = np.asarray(codes)
+    count = codes.shape[-1] - n + 1
+    if count <= 0:
+        return np.zeros(codes.shape[:-1] + (0,), dtype=np.int64)
+    indices = codes[..., :count].astype(np.int64)
+    for offset in range(1, n):
+        indices *= 26
+        indices += codes[..., offset:offset + count]
+    return indices
+
+
+def count_ngrams(text, n, sparse=None):
+    """
+    Counts the n-grams of a text.
+
+    Args:
+        text (str or CodedText or np.ndarray): The text or its letter codes.
+        n (int): The n-gram length.
+        sparse (bool): Whether to return sparse counts. Defaults to dense for n <= 3 and sparse above that.
+
+    Returns:
+        np.ndarray or SparseCounts: A dense int64 array of length 26 ** n indexed by n-gram index,
+        or the sparse indices and counts of the n-grams that occur.
+    """
+    codes = text if isinstance(text, np.ndarray) else as_coded(text).codes
+    indices = ngram_indices(codes, n)
+    if sparse is None:
+        sparse = n > DENSE_MAX_ORDER
+    if sparse:
+        unique, counts = np.unique(indices, return_counts=True)
+        return SparseCounts(unique, counts)
+    return np.bincount(indices, minlength=26 ** n)
+
+
+def count_ngrams_batch(code_matrix, n):
+    """
+    Counts the n-grams of many equal-length texts in one pass.
+
+    Args:
+        code_matrix (np.ndarray): A K x N array of letter codes, one text per row.
+        n (int): The n-gram length (dense, so intended for n <= 3).
+
+    Returns:
+        np.ndarray: A K x 26 ** n array of n-gram counts, one row per text.
+    """
+    code_matrix = np.atleast_2d(code_matrix)
+    rows = code_matrix.shape[0]
+    size = 26 ** n
+    indices = ngram_indices(code_matrix, n)
+    # Offset each row into its own block of the flat count array so one bincount covers every row
+    indices += (np.arange(rows, dtype=np.int64) * size)[:, None]
+    return np.bincount(indices.ravel(), minlength=rows * size).reshape(rows, size)
+
+
+def dense_to_dict(counts, n):
+    """
+    Converts dense n-gram values to a dict keyed by n-gram string, skipping zero entries.
+
+    Args:
+        counts (np.ndarray): Dense values indexed by n-gram index.
+        n (int): The n-gram length.
+
+    Returns:
+        dict: The non-zero values keyed by n-gram string.
+    """
+    nonzero = np.flatnonzero(counts)
+    return {ngram_string(index, n): value for index, value in zip(nonzero, counts[nonzero].tolist())}
@@ -0,0 +1,201 @@
+import numpy as np
+
+from analysis import ngrams
+from analysis.coded_text import as_coded
+
+ENGLISH_IC = 0.0686  # Expected coincidence rate of English text
+RANDOM_IC = 1 / 26  # Coincidence rate of uniformly random letters
+
+KASISKI_MIN_LENGTH = 3  # Shortest repeated substring used by the Kasiski examination
+KASISKI_MAX_LENGTH = 13  # Longest substring whose base-26 index fits in 64 bits
+
+# Key-length statistics settle long before this many letters, so longer texts are estimated from a prefix
+DEFAULT_SAMPLE_SIZE = 1 << 18
+
+
+def coincidence_counts(text, sample_size=DEFAULT_SAMPLE_SIZE):
+    """
+    Counts letter coincidences at every shift of the text against itself, using the FFT.
+
+    Args:
+        text (str or CodedText): The text to analyze.
+        sample_size (int): The maximum number of letters used, taken from the start of the text.
+
+    Returns:
+        np.ndarray: counts[d] is the number of positions i where letter i equals letter i + d, for every
+        shift d from 0 to n - 1. Computed as the sum of the autocorrelations of each letter's indicator
+        sequence in O(n log n), so every shift (and therefore every period) comes from one pass.
+    """
+    codes = as_coded(text).codes[:sample_size]
+    n = len(codes)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # Zero-pad to at least 2n so the circular correlation does not wrap around
+    size = 1 << (2 * n - 1).bit_length()
+    power = np.zeros(size // 2 + 1)
+    for letter in np.unique(codes):
+        spectrum = np.fft.rfft(codes == letter, size)
+        power += spectrum.real ** 2 + spectrum.imag ** 2
+    return np.rint(np.fft.irfft(power, size)[:n]).astype(np.int64)
+
+
+def period_statistics(counts, max_period):
+    """
+    Computes the column IC and the autocorrelation for every period from 1 to max_period.
+
+    Args:
+        counts (np.ndarray): Coincidence counts from coincidence_counts.
+        max_period (int): The largest period to evaluate.
+
+    Returns:
+        tuple: (column_ic, autocorrelation), two arrays of length max_period indexed by period - 1.
+        column_ic is the IC of the text split into period columns (pairs of letters a multiple of the
+        period apart), and autocorrelation is the coincidence rate at a shift of exactly the period.
+        Periods as long as the text score 0.
+    """
+    n = len(counts)
+    column_ic = np.zeros(max_period)
+    autocorrelation = np.zeros(max_period)
+    for period in range(1, min(max_period, n - 1) + 1):
+        # Letters in the same column are a multiple of the period apart
+        shifts = np.arange(period, n, period)
+        column_ic[period - 1] = counts[shifts].sum() / (n - shifts).sum()
+        autocorrelation[period - 1] = counts[period] / (n - period)
+    return column_ic, autocorrelation
+
+
+def rank_key_lengths(column_ic, autocorrelation):
+    """
+    Ranks candidate key lengths by how English-like their columns are.
+
+    Args:
+        column_ic (np.ndarray): Column IC per period, from period_statistics.
+        autocorrelation (np.ndarray): Autocorrelation per period, from period_statistics.
+
+    Returns:
+        list: Rows of (key length, column IC, autocorrelation, confidence), closest column IC to English
+        first. Confidence is the mean of both signals scaled so that random text gives 0 and English gives 1.
+    """
+    scaled = (np.stack([column_ic, autocorrelation]) - RANDOM_IC) / (ENGLISH_IC - RANDOM_IC)
+    confidence = np.clip(scaled, 0, 1).mean(axis=0)
+    order = np.argsort(np.abs(column_ic - ENGLISH_IC), kind='stable')
+    return [(int(index) + 1, float(column_ic[index]), float(autocorrelation[index]), float(confidence[index]))
+            for index in order]
+
+
+def estimate_key_lengths(text, max_period, sample_size=DEFAULT_SAMPLE_SIZE):
+    """
+    Estimates the key length of a periodic polyalphabetic cipher for every period from 1 to max_period.
+
+    Args:
+        text (str or CodedText): The ciphertext.
+        max_period (int): The largest key length to consider.
+        sample_size (int): The maximum number of letters used.
+
+    Returns:
+        list: The ranked table from rank_key_lengths.
+    """
+    return rank_key_lengths(*period_statistics(coincidence_counts(text, sample_size), max_period))
+
+
+def repeat_spacings(text, min_length=KASISKI_MIN_LENGTH, sample_size=DEFAULT_SAMPLE_SIZE):
+    """
+    Finds the spacings between repeats of every substring of a given length (the Kasiski examination).
+
+    Args:
+        text (str or CodedText): The ciphertext.
+        min_length (int): The substring length (3 to 13). A longer repeat is counted once for each of its
+            substrings of this length, so long repeats weigh more.
+        sample_size (int): The maximum number of letters used.
+
+    Returns:
+        np.ndarray: The distance from each occurrence of a substring to its next occurrence.
+
+    Every substring is indexed by its base-26 value, and sorting the indices brings repeats next to each
+    other, so all repeats are found in one O(n log n) pass without building any strings.
+    """
+    if not KASISKI_MIN_LENGTH <= min_length <= KASISKI_MAX_LENGTH:
+        raise ValueError(f"min_length must be between {KASISKI_MIN_LENGTH} and {KASISKI_MAX_LENGTH}.")
+    indices = ngrams.ngram_indices(as_coded(text).codes[:sample_size], min_length)
+    # A stable sort keeps the occurrences of each substring in text order
+    positions = np.argsort(indices, kind='stable')
+    sorted_indices = indices[positions]
+    repeated = sorted_indices[1:] == sorted_indices[:-1]
+    return positions[1:][repeated] - positions[:-1][repeated]
+
+
+def factor_statistics(spacings, max_period):
+    """
+    Counts how many repeat spacings each period from 1 to max_period divides.
+
+    Args:
+        spacings (np.ndarray): Repeat spacings from repeat_spacings.
+        max_period (int): The largest period to evaluate.
+
+    Returns:
+        tuple: (divisible, excess), two arrays of length max_period indexed by period - 1. excess is the
+        fraction of spacings divisible by the period minus the 1 / period expected by chance, so the true
+        key length scores higher than its factors and its multiples.
+    """
+    divisible = np.zeros(max_period, dtype=np.int64)
+    if len(spacings):
+        # Histogram the spacings once, then each period sums every period-th bin
+        histogram = np.bincount(spacings)
+        for period in range(1, max_period + 1):
+            divisible[period - 1] = histogram[period::period].sum()
+    periods = np.arange(1, max_period + 1)
+    excess = divisible / max(len(spacings), 1) - 1 / periods
+    return divisible, np.where(divisible > 0, excess, 0)
+
+
+def rank_kasiski(divisible, excess):
+    """
+    Ranks candidate key lengths by the Kasiski examination.
+
+    Args:
+        divisible (np.ndarray): Spacings divisible by each period, from factor_statistics.
+        excess (np.ndarray): Excess divisibility per period, from factor_statistics.
+
+    Returns:
+        list: Rows of (key length, spacings divided, excess, confidence), highest excess first. Confidence
+        estimates the fraction of repeats explained by the key length rather than by chance.
+    """
+    periods = np.arange(1, len(excess) + 1)
+    confidence = np.clip(excess / np.maximum(1 - 1 / periods, 1 / periods), 0, 1)
+    order = np.argsort(-excess, kind='stable')
+    return [(int(index) + 1, int(divisible[index]), float(excess[index]), float(confidence[index]))
+            for index in order]
+
+
+def kasiski_key_lengths(text, max_period, min_length=KASISKI_MIN_LENGTH, sample_size=DEFAULT_SAMPLE_SIZE):
+    """
+    Estimates the key length with the Kasiski examination for every period from 1 to max_period.
+
+    Args:
+        text (str or CodedText): The ciphertext.
+        max_period (int): The largest key length to consider.
+        min_length (int): The repeated substring length.
+        sample_size (int): The maximum number of letters used.
+
+    Returns:
+        list: The ranked table from rank_kasiski.
+    """
+    return rank_kasiski(*factor_statistics(repeat_spacings(text, min_length, sample_size), max_period))
+
+
+def combine_rankings(*rankings):
+    """
+    Merges several key-length rankings by their summed rank positions.
+
+    Args:
+        *rankings (list): Ranked tables whose rows start with the key length.
+
+    Returns:
+        list: The key lengths, best combined rank first. Ties keep the order of the first ranking.
+    """
+    positions = {}
+    for ranking in rankings:
+        for position, row in enumerate(ranking):
+            positions[row[0]] = positions.get(row[0], 0) + position
+    return sorted(positions, key=positions.get)
@@ -0,0 +1,48 @@
+import numpy as np
+
+DEFAULT_PREFIX_LENGTHS = (1000, 3000)  # Letters scored at each pruning stage before the full text
+DEFAULT_PRUNE_MARGIN = 0.5  # How far from the current K-th best towards the median a candidate may score and survive
+
+
+def prune_by_prefix(candidates, score_prefix, top_k, text_length, prefix_lengths=DEFAULT_PREFIX_LENGTHS,
+                    prune_margin=DEFAULT_PRUNE_MARGIN):
+    """
+    Discards candidates whose score on a prefix of the text is already far behind the best ones.
+
+    Args:
+        candidates (list): The candidates (keys or shifts).
+        score_prefix (function): Called as score_prefix(candidates, prefix_length) and returns one value per
+            candidate, lower is better, computed on the first prefix_length letters only.
+        top_k (int): The number of best candidates the caller needs. At least this many always survive.
+        text_length (int): The length of the full text. Prefixes at least this long are skipped, since
+            scoring them costs as much as scoring the full text.
+        prefix_lengths (tuple): Increasing prefix lengths, one pruning stage each.
+        prune_margin (float): A candidate survives a stage if its value is at most the top_k-th best value
+            plus prune_margin times the gap between that value and the median. Measuring against the spread
+            of the stage's own values makes the rule independent of the scale of the score.
+
+    Returns:
+        tuple: (survivors, stats) where survivors keeps the input order and stats has one dict per stage
+        with the prefix_length, the number of candidates scored and the number pruned.
+    """
+    survivors = list(candidates)
+    stats = []
+    for prefix_length in prefix_lengths:
+        if prefix_length >= text_length or len(survivors) <= top_k:
+            break
+        values = np.asarray(score_prefix(survivors, prefix_length), dtype=np.float64)
+        # The running threshold comes from the current top-K, so at least top_k candidates survive
+        threshold = np.partition(values, top_k - 1)[top_k - 1]
+        keep = values <= threshold + prune_margin * max(np.median(values) - threshold, 0)
+        stats.append({'prefix_length': prefix_length, 'candidates': len(survivors),
+                      'pruned': int(len(survivors) - keep.sum())})
+        survivors = [candidate for candidate, kept in zip(survivors, keep) if kept]
+    return survivors, stats
+
+
+def format_stats(stats):
+    """Returns a one-line summary of the pruning stages, for status messages."""
+    if not stats:
+        return "No candidates pruned"
+    return "; ".join(f"{stage['pruned']} of {stage['candidates']} pruned at {stage['prefix_length']} letters"
+                     for stage in stats)
@@ -0,0 +1,62 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+_attached_blocks = []  # Shared memory attached by this (worker) process, kept open for the process lifetime
+
+
+class SharedArrays:
+    """
+    Publishes NumPy arrays in shared memory so worker processes can map them instead of receiving copies.
+
+    The owning process creates one block per array and passes the small specs dict to the workers (for
+    example through a pool initializer); each worker then calls attach_arrays once. Use as a context
+    manager so the blocks are always released.
+    """
+
+    def __init__(self, arrays):
+        self._blocks = []
+        self.specs = {}
+        try:
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                self._blocks.append(block)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+                self.specs[name] = (block.name, array.shape, array.dtype.str)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        """Releases every block. Workers must be finished with them first."""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def attach_arrays(specs):
+    """
+    Maps the arrays published by a SharedArrays instance into this process.
+
+    Args:
+        specs (dict): The specs attribute of the SharedArrays instance.
+
+    Returns:
+        dict: Read-only arrays by name, backed by the shared memory rather than by copies.
+    """
+    arrays = {}
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _attached_blocks.append(block)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = False
+        arrays[name] = array
+    return arrays
@@ -1,7 +1,10 @@
 import os
 import string
 import numpy as np
-from math import gcd, sqrt
+from math import gcd
+
+from analysis import modular, ngrams
+from analysis.coded_text import as_coded
 
 
 def matrix_effectively_equal(matrix_a, matrix_b, modulus=26):
@@ -18,7 +21,6 @@ def matrix_effectively_equal(matrix_a, matrix_b, modulus=26):
 def validate_and_convert_hill_key(key):
     import numpy as np
     import re
-    from math import gcd
 
     # Normalize input by removing brackets and commas, and splitting
     if isinstance(key, str):
@@ -33,9 +35,8 @@ def validate_and_convert_hill_key(key):
     else:
         return False, None
 
-    # Validate the determinant of the matrix
-    determinant = int(np.round(np.linalg.det(key_matrix))) % 26
-    if determinant == 0 or gcd(determinant, 26) != 1:
+    # Validate the determinant of the matrix exactly (a table lookup for 2 x 2 keys)
+    if not modular.is_invertible(key_matrix, 26):
         return False, None
 
     return True, key_matrix
@@ -127,21 +128,16 @@ def frequency_analysis(text):
     Performs frequency analysis on the text, counting the occurrence of each alphabetic character.
 
     Args:
-        text (str): The input text to analyze.
+        text (str or CodedText): The input text to analyze.
 
     Returns:
         list: A list of 26 integers representing the frequency of each letter (A-Z) in the text.
 
-    This function prepares the text by removing non-alphabetic characters and converting to uppercase,
+    This function normalizes the text to letter codes (unless it is already coded text),
     then counts the frequency of each letter in the text, storing the counts in a list of length 26.
     """
-    text = prepare_text(text)
-    freq = [0] * 26
-    for char in text:
-        if char.isalpha():
-            index = ord(char) - ord('A')
-            freq[index] += 1
-    return freq
+    codes = as_coded(text).codes
+    return np.bincount(codes, minlength=26).tolist()
 
 
 def compute_ic(text):
@@ -149,7 +145,7 @@ def compute_ic(text):
     Computes the Index of Coincidence (IC) of the given text.
 
     Args:
-        text (str): The input text for which to calculate the IC.
+        text (str or CodedText): The input text for which to calculate the IC.
 
     Returns:
         float: The Index of Coincidence of the text.
@@ -204,15 +200,14 @@ def most_common_character(text):
     Identifies the most common character in the text after processing.
 
     Args:
-        text (str): The input text to analyze.
+        text (str or CodedText): The input text to analyze.
 
     Returns:
         str: The most common character in the processed text.
 
     This function performs a frequency analysis on the prepared text to find the most frequently occurring alphabetic character.
     """
-    text = prepare_text(text)
-    chars = frequency_analysis(text)
+    chars = frequency_analysis(as_coded(text))
     most_common = [0] * 10
     for i in range(10):
         highest_index = chars.index(max(chars))
@@ -222,54 +217,142 @@ def most_common_character(text):
     return most_common
 
 
+def generate_frequency_arrays(text):
+    """
+    Generate dense frequency arrays for letters, bigrams, and trigrams in a given text.
+
+    Parameters:
+    - text (str or CodedText): The input text to analyze.
+
+    Returns:
+    - tuple of three np.ndarrays, indexed by base-26 n-gram index (see analysis.ngrams):
+        - letter_frequencies (26): Frequencies of each letter in the text as percentages.
+        - bigram_frequencies (676): Frequencies of each bigram in the text as percentages.
+        - trigram_frequencies (17576): Frequencies of each trigram in the text as percentages.
+
+    N-grams are counted with one bincount over their base-26 indices instead of Python dict loops,
+    so the results can be handed straight to compute_chi_squared.
+    """
+    codes = as_coded(text).codes  # Normalize raw text once; coded text is already uppercase letters only.
+    frequencies = []
+    for n in (1, 2, 3):
+        counts = ngrams.count_ngrams(codes, n)
+        total = counts.sum()
+        # Convert counts to frequencies (percentages).
+        frequencies.append(counts * (100 / total) if total else counts.astype(float))
+    return tuple(frequencies)
+
+
 def generate_frequency_data(text):
     """
     Generate frequency data for letters, bigrams, and trigrams in a given text.
 
     Parameters:
-    - text (str): The input text to analyze.
+    - text (str or CodedText): The input text to analyze.
 
     Returns:
     - tuple of three dicts:
         - letter_frequencies (dict): Frequencies of each letter in the text as percentages.
         - bigram_frequencies (dict): Frequencies of each bigram (pair of letters) in the text as percentages.
         - trigram_frequencies (dict): Frequencies of each trigram (three consecutive letters) in the text as percentages.
+
+    This is the dict form of generate_frequency_arrays; hot paths should use the arrays directly.
+    """
+    letter_array, bigram_array, trigram_array = generate_frequency_arrays(text)
+    letter_frequencies = dict(zip(string.ascii_uppercase, letter_array.tolist()))
+    return letter_frequencies, ngrams.dense_to_dict(bigram_array, 2), ngrams.dense_to_dict(trigram_array, 3)
+
+
+def dense_frequencies(frequencies, n=1):
+    """
+    Convert n-gram frequencies into a dense array indexed by base-26 n-gram index.
+
+    Parameters:
+    - frequencies (dict or np.ndarray): Frequencies keyed by uppercase n-gram (missing n-grams count as 0), or
+      an array that is already dense, such as frequency_data.dense_table(n).
+    - n (int): The n-gram order of the keys.
+
+    Returns:
+    - np.ndarray: A float array of length 26 ** n with the frequency of each n-gram.
+    """
+    if isinstance(frequencies, np.ndarray):
+        if len(frequencies) != 26 ** n:
+            raise ValueError(f"A dense {n}-gram table has {26 ** n} entries, not {len(frequencies)}.")
+        return np.asarray(frequencies, dtype=np.float64)
+    table = np.zeros(26 ** n)
+    for ngram, frequency in frequencies.items():
+        table[ngrams.ngram_index(ngram)] = frequency
+    return table
+
+
+def expected_count_vector(expected, n, text_length):
+    """
+    Scale expected n-gram percentages to expected counts for a text of the given length.
+
+    Parameters:
+    - expected (dict or np.ndarray): Expected frequencies of n-grams as percentages (see dense_frequencies).
+    - n (int): The n-gram order of the keys.
+    - text_length (int): Total number of items considered in the observed text.
+
+    Returns:
+    - np.ndarray: Dense expected counts, computed from the contents of expected.
     """
-    text = prepare_text(text)  # Normalize text, e.g., converting to uppercase and removing non-alphabetic characters.
+    return dense_frequencies(expected, n) * (text_length / 100)
 
-    # Initialize counters with all letters in the alphabet, and empty dictionaries for bigrams and trigrams.
-    letter_counts = {letter: 0 for letter in string.ascii_uppercase}
-    bigram_counts = {}
-    trigram_counts = {}
 
-    # Count occurrences of each letter.
-    for letter in text:
-        if letter in letter_counts:
-            letter_counts[letter] += 1
+def compute_chi_squared_batch(observed, expected_counts, text_length):
+    """
+    Compute normalized chi-squared statistics for a whole matrix of observed histograms at once.
+
+    Parameters:
+    - observed (np.ndarray): Observed counts, one histogram per row (e.g. 26 shifts x 26 letters,
+      or K candidates x 676 bigrams). A single 1-D histogram is also accepted.
+    - expected_counts (np.ndarray): Dense expected counts, as returned by expected_count_vector.
+    - text_length (int): Total number of items considered in each observed text.
 
-    # Count occurrences of each bigram.
-    for i in range(len(text) - 1):
-        bigram = text[i:i + 2]
-        if bigram.isalpha():  # Ensure bigram consists of letters only.
-            bigram_counts[bigram] = bigram_counts.get(bigram, 0) + 1
+    Returns:
+    - np.ndarray or float: The chi-squared statistic of each row normalized by text length.
+      Items with an expected count of zero are skipped, as in compute_chi_squared.
+    """
+    support = np.flatnonzero(expected_counts)
+    expected = expected_counts[support]
+    deviation = observed[..., support] - expected
+    chi_squared = (deviation * deviation / expected).sum(axis=-1)
+    # Normalize chi-squared by text length to account for text size variations.
+    return chi_squared / text_length
 
-    # Count occurrences of each trigram.
-    for i in range(len(text) - 2):
-        trigram = text[i:i + 3]
-        if trigram.isalpha():  # Ensure trigram consists of letters only.
-            trigram_counts[trigram] = trigram_counts.get(trigram, 0) + 1
 
-    # Convert counts to frequencies (percentages).
-    total_letters = sum(letter_counts.values())
-    letter_frequencies = {letter: (count / total_letters) * 100 for letter, count in letter_counts.items()}
+def shift_chi_squared_matrix(letter_counts, expected):
+    """
+    Compute the normalized letter chi-squared statistic of all 26 Caesar shifts for many texts at once.
 
-    total_bigrams = sum(bigram_counts.values())
-    bigram_frequencies = {bigram: (count / total_bigrams) * 100 for bigram, count in bigram_counts.items()}
+    Parameters:
+    - letter_counts (np.ndarray): Letter counts, one row of 26 per text (e.g. one row per Vigenère column).
+    - expected (dict): Expected letter frequencies as percentages.
 
-    total_trigrams = sum(trigram_counts.values())
-    trigram_frequencies = {trigram: (count / total_trigrams) * 100 for trigram, count in trigram_counts.items()}
+    Returns:
+    - np.ndarray: A rows x 26 matrix whose entry [r, s] is the score of text r decoded with shift s
+      (lower is better), as compute_chi_squared would give for the decoded letter counts. Rows with no
+      letters score 0.
 
-    return letter_frequencies, bigram_frequencies, trigram_frequencies
+    Decoding with shift s turns letter (i + s) into letter i, so each shifted histogram is a rotation of
+    the counted one. Expanding the chi-squared sum gives Σ O² / E - 2 Σ O + Σ E, and the O² / E and O
+    terms of all 26 rotations are two products with 26 x 26 circulant matrices.
+    """
+    letter_counts = np.atleast_2d(letter_counts).astype(np.float64)
+    probabilities = dense_frequencies(expected, 1) / 100
+    support = probabilities > 0
+    weights = np.divide(1, probabilities, out=np.zeros(26), where=support)
+
+    # rotation[i, s] is the letter that letter i decodes to with shift s
+    rotation = (np.arange(26)[:, None] - np.arange(26)[None, :]) % 26
+    lengths = letter_counts.sum(axis=1, keepdims=True)
+    safe_lengths = np.maximum(lengths, 1)
+    chi_squared = ((letter_counts ** 2) @ weights[rotation] / safe_lengths
+                   - 2 * (letter_counts @ support[rotation].astype(np.float64))
+                   + lengths * probabilities[support].sum())
+    # Normalize chi-squared by text length to account for text size variations.
+    return np.where(lengths > 0, chi_squared / safe_lengths, 0)
 
 
 def compute_chi_squared(observed, expected, text_length):
@@ -277,14 +360,23 @@ def compute_chi_squared(observed, expected, text_length):
     Compute the chi-squared statistic for observed vs. expected frequencies.
 
     Parameters:
-    - observed (dict): Observed counts of items (letters, bigrams, trigrams).
-    - expected (dict): Expected frequencies of items as percentages.
+    - observed (dict or np.ndarray): Observed counts of items (letters, bigrams, trigrams), either keyed by
+      n-gram string or as a dense array indexed by base-26 n-gram index.
+    - expected (dict or np.ndarray): Expected frequencies of items as percentages, keyed by n-gram string
+      or dense (see dense_frequencies).
     - text_length (int): Total number of items considered in the observed text.
 
     Returns:
     - normalized_chi_squared (float): The chi-squared statistic normalized by text length,
-      indicating the deviation of observed from expected frequencies.
+      indicating the deviation of observed from expected frequencies. Both forms of each argument give
+      the same value.
     """
+    if isinstance(observed, np.ndarray) or isinstance(expected, np.ndarray):
+        dense = observed if isinstance(observed, np.ndarray) else expected
+        n = round(np.log(len(dense)) / np.log(26))
+        return float(compute_chi_squared_batch(dense_frequencies(observed, n),
+                                               expected_count_vector(expected, n, text_length), text_length))
+
     chi_squared = 0
     for key in expected:
         observed_freq = observed.get(key, 0)  # Get observed count, defaulting to 0 if not found.
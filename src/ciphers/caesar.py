@@ -1,5 +1,15 @@
+import numpy as np
 from tabulate import tabulate
+from analysis import fitness, frequency_data, pruning
 from analysis import utility as util
+from analysis.coded_text import as_coded, as_packed, codes_to_text, like_input
+from analysis.ingest import DEFAULT_STREAM_CHUNK_SIZE, iter_code_chunks
+
+# Upper bound on the number of decoded letters held at once when scoring shifts by quadgram fitness
+SCORING_CHUNK_CELLS = 1 << 22
+
+# One row per message returned by crack_batch
+BATCH_RESULT_DTYPE = np.dtype([('shift', np.uint8), ('score', np.float64), ('length', np.int64)])
 
 
 # --------------------------------------------------------------------------------
@@ -10,39 +20,27 @@ def encode(plain_text, key, update_terminal_callback):
     Encode plaintext using a Caesar cipher and display the encoding process.
 
     Args:
-        plain_text (str): The text to be encoded.
+        plain_text (str or CodedText): The text to be encoded.
         key (int): The cipher key (shift value).
         update_terminal_callback (function): Callback function to update GUI.
 
     Returns:
-        str: The encoded ciphertext.
+        str or CodedText: The encoded ciphertext, in the same form as the input.
 
     This function prepares the plain text for encoding, performs the encoding
     by shifting each alphabetical character by the specified key, and displays
     the encoding process step by step using a callback. The function handles
     up to the first 10 characters for detailed display in tabular format.
     """
-    # First, normalize the input text by removing non-standard characters and formatting
-    plain_text = util.prepare_text(plain_text)
-    cipher_text = ''
-
-    # Initialize an empty list to hold data for visualization
-    data = []
-    count = 0  # Counter to limit detailed display to the first 10 characters
-
-    # Iterate over each character in the prepared plaintext
-    for i, char in enumerate(plain_text):
-        if char.isalpha():  # Check if the character is an alphabetical character
-            # Calculate the new character position using Caesar cipher formula
-            shift_value = (ord(char) - ord('A') + key) % 26
-            new_char = chr(shift_value + ord('A'))
-            if count < 10:  # Append data for display if within the first 10 characters
-                data.append([char, f"+{key}", new_char])
-        else:
-            # For non-alphabetical characters, keep them unchanged
-            new_char = char
-        cipher_text += new_char  # Append the new character to the output ciphertext
-        count += 1  # Increment the counter
+    # First, normalize the input text once into letter codes (coded text is used as-is)
+    coded = as_coded(plain_text)
+
+    # Shift every letter code at once using a lookup table for the Caesar cipher formula
+    shift_table = ((np.arange(26) + key) % 26).astype(np.uint8)
+    cipher_codes = shift_table[coded.codes]
+
+    # Collect data for visualization of the first 10 characters
+    data = [[chr(p + 65), f"+{key}", chr(c + 65)] for p, c in zip(coded.codes[:10], cipher_codes[:10])]
 
     # Generate a tabulated string of the data for visualization if available
     table_str = tabulate(data, headers=["Char", "Shift", "Result"], tablefmt="plain") if data else ""
@@ -51,7 +49,7 @@ def encode(plain_text, key, update_terminal_callback):
     # Call the provided callback function to display the encoding process in the GUI
     update_terminal_callback(display_message if table_str else "Encoding process (text too short for detailed display)")
 
-    return cipher_text  # Return the final encoded ciphertext
+    return like_input(plain_text, cipher_codes)  # Return the final encoded ciphertext
 
 
 # --------------------------------------------------------------------------------
@@ -62,12 +60,12 @@ def decode(cipher_text, key, update_terminal_callback):
     Decode ciphertext using a Caesar cipher and display the decoding process.
 
     Args:
-        cipher_text (str): The text to be decoded.
+        cipher_text (str or CodedText): The text to be decoded.
         key (int): The cipher key (shift value).
         update_terminal_callback (function): Callback function to update GUI.
 
     Returns:
-        str: The decoded plaintext.
+        str or CodedText: The decoded plaintext, in the same form as the input.
 
     This function prepares the cipher text for decoding, performs the decoding
     by shifting each alphabetical character backwards by the specified key, and
@@ -75,26 +73,14 @@ def decode(cipher_text, key, update_terminal_callback):
     handles up to the first 10 characters for detailed display in tabular format.
     """
     # Normalize the input text similarly as in encoding
-    cipher_text = util.prepare_text(cipher_text)
-    plaintext = ''
-
-    # Initialize an empty list for visualization data, and a counter
-    data = []
-    count = 0  # Counter for limiting the detailed display
-
-    # Process each character in the normalized cipher text
-    for i, char in enumerate(cipher_text):
-        if char.isalpha():  # Ensure the character is alphabetical
-            # Calculate the original character position using reverse Caesar cipher formula
-            shift_value = (ord(char) - ord('A') - key) % 26
-            new_char = chr(shift_value + ord('A'))
-            if count < 10:  # Collect data for display for the first 10 characters
-                data.append([char, f"-{key}", new_char])
-        else:
-            # Non-alphabetical characters remain unchanged
-            new_char = char
-        plaintext += new_char  # Build the decoded plaintext
-        count += 1  # Increment the counter for detailed display
+    coded = as_coded(cipher_text)
+
+    # Reverse the shift for every letter code at once using a lookup table
+    shift_table = ((np.arange(26) - key) % 26).astype(np.uint8)
+    plain_codes = shift_table[coded.codes]
+
+    # Collect data for visualization of the first 10 characters
+    data = [[chr(c + 65), f"-{key}", chr(p + 65)] for c, p in zip(coded.codes[:10], plain_codes[:10])]
 
     # Create a tabulated string from the data if available
     table_str = tabulate(data, headers=["Char", "Shift", "Result"], tablefmt="plain") if data else ""
@@ -104,56 +90,189 @@ def decode(cipher_text, key, update_terminal_callback):
     update_terminal_callback(
         display_message if table_str else "Decoding process (text too short for detailed display)")
 
-    return plaintext  # Return the fully decoded plaintext
+    return like_input(cipher_text, plain_codes)  # Return the fully decoded plaintext
+
+
+# --------------------------------------------------------------------------------
+# STREAMING FUNCTIONS
+# --------------------------------------------------------------------------------
+def encode_stream(source, key, chunk_size=DEFAULT_STREAM_CHUNK_SIZE):
+    """
+    Encode a stream of text with a Caesar cipher in constant memory.
+
+    Args:
+        source: A file object or an iterable of text chunks (see ingest.iter_code_chunks).
+        key (int): The cipher key (shift value).
+        chunk_size (int): The number of characters read at a time from a file object.
+
+    Yields:
+        str: The encoded ciphertext of each chunk, letters only.
+    """
+    shift_table = ((np.arange(26) + key) % 26).astype(np.uint8)
+    for codes in iter_code_chunks(source, chunk_size):
+        yield codes_to_text(shift_table[codes])
+
+
+def decode_stream(source, key, chunk_size=DEFAULT_STREAM_CHUNK_SIZE):
+    """
+    Decode a stream of Caesar ciphertext in constant memory.
+
+    Args:
+        source: A file object or an iterable of text chunks (see ingest.iter_code_chunks).
+        key (int): The cipher key (shift value).
+        chunk_size (int): The number of characters read at a time from a file object.
+
+    Yields:
+        str: The decoded plaintext of each chunk.
+    """
+    return encode_stream(source, -key, chunk_size)
+
+
+# --------------------------------------------------------------------------------
+# SHIFT SCORING FUNCTION
+# --------------------------------------------------------------------------------
+def shift_chi_scores(text, exp_letter):
+    """
+    Score every Caesar shift from a single letter count of the ciphertext.
+
+    Args:
+        text (str or CodedText): The ciphertext to score.
+        exp_letter (dict): Expected letter frequencies as percentages.
+
+    Returns:
+        np.ndarray: 26 normalized Chi-Squared letter scores, indexed by shift (lower is better).
+
+    Decoding with shift s turns ciphertext letter (i + s) into plaintext letter i, so the
+    letter histogram of every candidate plaintext is just a rotation of the ciphertext
+    histogram. The text is counted once and all 26 rotations are scored against the
+    expected distribution, which costs O(n + 26²) instead of decoding the text 26 times.
+    """
+    codes = as_coded(text).codes
+    text_length = len(codes)
+    if text_length == 0:
+        return np.zeros(26)
+
+    # Score all 26 rotated histograms against the expected counts in one call
+    return util.shift_chi_squared_matrix(np.bincount(codes, minlength=26), exp_letter)[0]
+
+
+def shift_quadgram_scores(text, shifts, length=None, chunk_cells=SCORING_CHUNK_CELLS):
+    """
+    Score Caesar shifts by the quadgram fitness of the decoded text, in bounded memory.
+
+    Args:
+        text (CodedText): The ciphertext.
+        shifts (list): The shifts to score.
+        length (int): Only the first length letters are scored. None scores the whole text.
+        chunk_cells (int): The maximum number of decoded letters (shifts x chunk length) held at once.
+
+    Returns:
+        np.ndarray: The quadgram log-likelihood of each shift (higher is better).
+
+    The text is decoded and scored one chunk at a time for all shifts together. Each chunk carries the
+    3 letters that follow it, so every quadgram crossing a chunk edge is counted exactly once.
+    """
+    codes = text.codes[:length]
+    shifts = (26 - np.asarray(shifts, dtype=np.uint8)) % 26
+    step = max(chunk_cells // max(len(shifts), 1), 1)
+    scores = np.zeros(len(shifts))
+    for start in range(0, max(len(codes) - 3, 0), step):
+        chunk = codes[start:start + step + 3]
+        scores += fitness.quadgram_score_batch((chunk[None, :] + shifts[:, None]) % 26)
+    return scores
 
 
 # --------------------------------------------------------------------------------
 # CHI-SQUARE CRYPTANALYSIS FUNCTION
 # --------------------------------------------------------------------------------
-def chi_cryptanalysis(text, exp_letter, exp_bi, exp_tri):
+def chi_cryptanalysis(text, exp_letter, exp_bi, exp_tri, top_n=3, rank_by='letters',
+                      prefix_lengths=pruning.DEFAULT_PREFIX_LENGTHS):
     """
     Perform a Chi-Square Cryptanalysis on the given text using Caesar cipher.
 
     Args:
-        text (str): The text to analyze.
+        text (str or CodedText): The text to analyze.
         exp_letter (dict): Expected letter frequencies.
-        exp_bi (dict): Expected bigram frequencies.
-        exp_tri (dict): Expected trigram frequencies.
-        update_terminal_callback (function): Callback function to update GUI.
+        exp_bi (dict): Expected bigram frequencies (unused, kept for interface compatibility).
+        exp_tri (dict): Expected trigram frequencies (unused, kept for interface compatibility).
+        top_n (int): Number of best shifts to decode and preview.
+        rank_by (str): 'letters' to rank by the letter Chi-Squared score, or 'quadgram' to rank all 26
+            decodings by quadgram log-likelihood fitness, which is more reliable on short texts.
+        prefix_lengths (tuple): When ranking by quadgrams, shifts that score far behind the best top_n on
+            these prefixes of the text are dropped before the full text is scored (see pruning.prune_by_prefix).
+            None scores every shift on the full text.
 
     Returns:
         str: Summary of cryptanalysis results.
 
-    This function analyzes the given text using Chi-Square testing to estimate
-    the most likely Caesar cipher keys based on letter, bigram, and trigram
-    frequency distributions. It presents the top 3 guesses based on Chi-Squared
-    scores for letters.
+    This function scores all 26 possible Caesar cipher keys from one letter
+    histogram of the ciphertext (see shift_chi_scores) and only decodes the
+    top-ranked keys to build the previews. It presents the top_n guesses based
+    on the chosen ranking.
     """
-    results = []  # Initialize a list to store results for each key
-
-    # Iterate over all possible Caesar cipher keys (0-25)
-    for key in range(26):
-        # Decode the text with the current key using a dummy callback to suppress output
-        decoded_text = decode(text, key, lambda x: None)
-        # Calculate frequency data for the decoded text
-        letter_freqs, bigram_freqs, trigram_freqs = util.generate_frequency_data(decoded_text)
+    text = as_coded(text)  # Normalize the ciphertext once for all 26 keys
 
-        # Compute Chi-Squared scores for letter, bigram, and trigram frequencies
-        chi_letter = util.compute_chi_squared(letter_freqs, exp_letter, len(decoded_text))
-        chi_bi = util.compute_chi_squared(bigram_freqs, exp_bi, len(decoded_text))
-        chi_tri = util.compute_chi_squared(trigram_freqs, exp_tri, len(decoded_text))
+    if rank_by == 'quadgram':
+        def negative_fitness(shifts, length):
+            # Lower is better for the pruning and the ranking
+            return -shift_quadgram_scores(text, shifts, length)
 
-        # Append the results including the key and the computed scores
-        results.append((key, chi_letter, chi_bi, chi_tri, decoded_text))
+        shifts = list(range(26))
+        if prefix_lengths:
+            shifts, _ = pruning.prune_by_prefix(shifts, negative_fitness, top_n, len(text), prefix_lengths)
+        # Rank the surviving keys by fitness on the full text, highest first
+        ranked_keys = np.asarray(shifts)[np.argsort(negative_fitness(shifts, len(text)), kind='stable')]
+        output_str = f"Top {top_n} guesses based on Quadgram Fitness:\n"
+    elif rank_by == 'letters':
+        # Score every key from a single count of the ciphertext and rank them, ascending
+        scores = shift_chi_scores(text, exp_letter)
+        ranked_keys = np.argsort(scores, kind='stable')
+        output_str = f"Top {top_n} guesses based on Chi-Squared Letters Score:\n"
+    else:
+        raise ValueError(f"Unknown ranking: {rank_by}")
 
-    # Sort results by the Chi-Squared score for letters, ascending
-    results.sort(key=lambda x: x[1])
-
-    # Prepare the output string showing the top 3 results
-    output_str = "Top 3 guesses based on Chi-Squared Letters Score:\n"
-    for i in range(min(3, len(results))):  # Limit to the top 3 guesses
-        key, chi_letter, chi_bi, chi_tri, decoded_text = results[i]
+    # Prepare the output string showing the top results, decoding only those keys
+    for key in ranked_keys[:top_n]:
+        # Decode the preview with the current key using a dummy callback to suppress output
+        decoded_text = decode(text[:100], int(key), lambda x: None)
         # Format and append each result to the output string
-        output_str += f"\nKey: {key}\nDecoded Text Preview: {decoded_text[:100]}...\n"
+        output_str += f"\nKey: {key}\nDecoded Text Preview: {decoded_text.to_text()}...\n"
 
     return output_str  # Return the summary of cryptanalysis results
+
+
+# --------------------------------------------------------------------------------
+# BATCH CRACKING
+# --------------------------------------------------------------------------------
+def crack_batch(messages, exp_letter=None):
+    """
+    Find the most likely Caesar shift of many independent messages at once.
+
+    Args:
+        messages (list or tuple): The ciphertexts, as a list of str or CodedText or as a (codes, offsets)
+            ragged array from coded_text.pack_texts.
+        exp_letter (dict or np.ndarray): Expected letter frequencies as percentages. Defaults to the letter
+            table of the selected model (see frequency_data.dense_table).
+
+    Returns:
+        np.ndarray: A structured array with one row per message (BATCH_RESULT_DTYPE): the best shift, its
+        normalized Chi-Squared letter score (lower is better) and the number of letters. Messages without
+        letters get shift 0 and score 0.
+
+    The letter histograms of all messages come from one bincount over (message, letter) pairs, and all 26
+    shifts of every message are scored together (see utility.shift_chi_squared_matrix), so there is no
+    Python work per message.
+    """
+    exp_letter = frequency_data.dense_table(1) if exp_letter is None else exp_letter
+    codes, offsets = as_packed(messages)
+    count = len(offsets) - 1
+    lengths = np.diff(offsets)
+    message_ids = np.repeat(np.arange(count), lengths)
+    letter_counts = np.bincount(message_ids * 26 + codes, minlength=count * 26).reshape(count, 26)
+    scores = util.shift_chi_squared_matrix(letter_counts, exp_letter)
+
+    results = np.zeros(count, dtype=BATCH_RESULT_DTYPE)
+    results['shift'] = scores.argmin(axis=1)
+    results['score'] = scores.min(axis=1)
+    results['length'] = lengths
+    return results
@@ -1,41 +1,56 @@
+import heapq
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-from numpy.random import randint
-from math import gcd
-from sympy import Matrix
+from analysis import fitness, frequency_data, modular, ngrams
 from analysis import utility as util
-from numpy.linalg import det
+from analysis.coded_text import CodedText, as_coded, codes_to_text, like_input
+from analysis.ingest import DEFAULT_STREAM_CHUNK_SIZE, ingest_file, iter_code_chunks
 
 
 def matrix_mod_inv(matrix, modulus):
     """Returns the modular inverse of a matrix modulo the given modulus if it exists."""
-    sympy_matrix = Matrix(matrix)
-    try:
-        inv_mod_matrix = sympy_matrix.inv_mod(modulus)
-        return np.array(inv_mod_matrix).astype(int)
-    except ValueError as e:
-        print(f"Matrix inversion error: {e}")
+    inverse = modular.matrix_mod_inverse(matrix, modulus)
+    if inverse is None:
+        print(f"Matrix inversion error: Matrix det == 0; not invertible modulo {modulus}.")
         return None
+    return inverse.astype(int)
 
 
 def text_to_vector(text):
-    return [ord(char) - ord('A') for char in text]
+    """Returns the letter codes (A=0 ... Z=25) of the text as a NumPy array."""
+    return as_coded(text).codes
 
 
 def vector_to_text(vector):
-    return ''.join(chr(num + ord('A')) for num in vector)
+    """Converts a vector of letter codes back to an uppercase string."""
+    return codes_to_text(np.asarray(vector) % 26)
 
 
 def is_invertible(matrix):
-    det = int(np.round(np.linalg.det(matrix)))
-    return gcd(det, 26) == 1
+    """Tells whether a key matrix is invertible modulo 26, using exact integer arithmetic."""
+    return modular.is_invertible(matrix, 26)
 
 
 def generate_key(n):
-    while True:
-        # Generate random matrix with values from 1 to 25 (inclusive)
-        matrix = randint(1, 26, (n, n))
-        if is_invertible(matrix):
-            return matrix
+    # Random invertible matrix with values from 1 to 25 (inclusive)
+    return generate_keys(n, 1)[0]
+
+
+def generate_keys(n, count):
+    """
+    Generates many random invertible n x n keys with values from 1 to 25 at once.
+
+    Args:
+        n (int): The key size.
+        count (int): The number of keys.
+
+    Returns:
+        np.ndarray: A count x n x n stack of keys. 2 x 2 keys come from the precomputed table of all
+        invertible keys; larger ones are drawn in batches and filtered by the batched modular inverse.
+    """
+    return modular.random_invertible_matrices(n, count, 26, low=1)
 
 
 def reshape_or_adjust_matrix(vector, blocksize):
@@ -53,9 +68,10 @@ def solve_linear_equation(A, B):
 
 
 def read_and_prepare_text(file_path):
-    plaintext = util.read_from_file(file_path)
+    """Read and normalize a file in bounded memory, returning coded text (or None if it is missing or empty)."""
+    plaintext = ingest_file(file_path)
     if plaintext:
-        return util.prepare_text(plaintext)
+        return plaintext
     else:
         return None
 
@@ -77,13 +93,25 @@ def extract_and_trim(plaintext, start_index, key_size):
     return trimmed_text
 
 
+def pad_codes(codes, block_size):
+    """Pads an array of letter codes with 'X' (23) up to a multiple of the block size."""
+    padding_length = -len(codes) % block_size
+    if padding_length:
+        codes = np.concatenate([codes, np.full(padding_length, 23, dtype=codes.dtype)])
+    return codes
+
+
+def remove_padding_codes(codes):
+    """Strips trailing 'X' (23) padding codes, matching util.remove_padding for coded text."""
+    non_padding = np.flatnonzero(codes != 23)
+    return codes[:non_padding[-1] + 1] if len(non_padding) else codes[:0]
+
+
 def encode(text, key_matrix, terminal_callbacl):
     """Encode text using the Hill cipher with a given key matrix."""
-    text = util.prepare_text(text)
-    text = util.add_padding(text, key_matrix.shape[1])
-    text_vector = np.array(text_to_vector(text))
+    text_vector = pad_codes(as_coded(text).codes, key_matrix.shape[1]).astype(np.int64)
     encoded_vector = np.dot(key_matrix, text_vector.reshape(-1, key_matrix.shape[0]).T).T.flatten() % 26
-    return vector_to_text(encoded_vector)  # Make sure to return the encoded_text
+    return like_input(text, encoded_vector)  # Make sure to return the encoded_text
 
 
 def decode(text, key_matrix, terminal_callback):
@@ -94,28 +122,147 @@ def decode(text, key_matrix, terminal_callback):
         print("Error: Key matrix inversion failed. Decryption cannot proceed.")
         return None  # Or handle the error as appropriate for your application
 
-    # print(f"Processed text: {text}")
-    text = util.prepare_text(text)
-    text = util.add_padding(text, key_matrix.shape[1])
-    text_vector = np.array(text_to_vector(text))
+    text_vector = pad_codes(as_coded(text).codes, key_matrix.shape[1]).astype(np.int64)
 
     decoded_vector = np.dot(key_inv_matrix, text_vector.reshape(-1, key_matrix.shape[0]).T).T.flatten() % 26
-    decoded_text = vector_to_text(decoded_vector)
 
     # Consider smarter padding removal if needed
-    return util.remove_padding(decoded_text)  # Adjust based on your padding strategy
+    decoded_vector = remove_padding_codes(decoded_vector)  # Adjust based on your padding strategy
+    return like_input(text, decoded_vector)
+
+
+def apply_key_batch(codes, key_matrices):
+    """
+    Multiplies the blocks of one code array by a whole stack of key matrices at once, mod 26.
+
+    Args:
+        codes (np.ndarray): Letter codes whose length is a multiple of the block size.
+        key_matrices (np.ndarray): A K x n x n stack of matrices.
+
+    Returns:
+        np.ndarray: A K x N uint8 array; row k holds the codes transformed by key_matrices[k].
+    """
+    key_matrices = np.asarray(key_matrices, dtype=np.int32)
+    block_size = key_matrices.shape[-1]
+    blocks = np.asarray(codes, dtype=np.int32).reshape(-1, block_size)
+    # products[k, b, i] = sum_j key_matrices[k, i, j] * blocks[b, j]: every key times every block in one call
+    products = np.einsum('kij,bj->kbi', key_matrices, blocks, optimize=True)
+    return (products % 26).astype(np.uint8).reshape(len(key_matrices), -1)
+
+
+def encode_batch(text, key_matrices):
+    """
+    Encode one text under many Hill keys at once.
+
+    Args:
+        text (str or CodedText): The text to be encoded.
+        key_matrices (np.ndarray): A K x n x n stack of key matrices.
+
+    Returns:
+        np.ndarray: A K x N array of ciphertext codes (the text padded with 'X' to whole blocks).
+    """
+    key_matrices = np.asarray(key_matrices)
+    return apply_key_batch(pad_codes(as_coded(text).codes, key_matrices.shape[-1]), key_matrices)
+
+
+def decode_batch(text, key_matrices):
+    """
+    Decode one ciphertext under many Hill keys at once, ready for vectorized scoring.
+
+    Args:
+        text (str or CodedText): The ciphertext to be decoded.
+        key_matrices (np.ndarray): A K x n x n stack of key matrices, all invertible modulo 26.
+
+    Returns:
+        np.ndarray: A K x N array of plaintext codes. Padding is kept so every row has the same length.
+
+    Raises:
+        ValueError: If a key matrix is not invertible modulo 26.
+    """
+    key_matrices = np.asarray(key_matrices)
+    # Invert the whole stack in one vectorized pass
+    inverses, invertible = modular.inverse_mod_matrices(key_matrices, 26)
+    if not invertible.all():
+        raise ValueError(f"Key matrix {int(np.argmin(invertible))} is not invertible modulo 26.")
+    return apply_key_batch(pad_codes(as_coded(text).codes, key_matrices.shape[-1]), inverses)
+
+
+def _block_stream(source, matrix, chunk_size, strip_padding):
+    # Multiply complete blocks as they arrive; an incomplete block is carried into the next chunk
+    block_size = matrix.shape[0]
+    remainder = np.zeros(0, dtype=np.int64)
+    held_padding = 0  # Trailing 'X' codes held back until it is known whether they end the stream
+    for codes in iter_code_chunks(source, chunk_size):
+        codes = np.concatenate([remainder, codes])
+        complete = len(codes) // block_size * block_size
+        remainder = codes[complete:]
+        if not complete:
+            continue
+        output = np.dot(matrix, codes[:complete].reshape(-1, block_size).T).T.flatten() % 26
+        if strip_padding:
+            kept = remove_padding_codes(output)
+            if len(kept):
+                output = np.concatenate([np.full(held_padding, 23), output])
+                kept = output[:len(kept) + held_padding]
+                held_padding = 0
+            held_padding += len(output) - len(kept)
+            output = kept
+        if len(output):
+            yield vector_to_text(output)
+    if len(remainder):
+        # Padding is only ever added to the final block of the stream
+        output = np.dot(matrix, pad_codes(remainder, block_size)) % 26
+        if strip_padding:
+            output = remove_padding_codes(output)
+            output = np.concatenate([np.full(held_padding, 23), output]) if len(output) else output
+        if len(output):
+            yield vector_to_text(output)
+
+
+def encode_stream(source, key_matrix, chunk_size=DEFAULT_STREAM_CHUNK_SIZE):
+    """
+    Encode a stream of text with the Hill cipher in constant memory.
+
+    Args:
+        source: A file object or an iterable of text chunks (see ingest.iter_code_chunks).
+        key_matrix (np.ndarray): The key matrix.
+        chunk_size (int): The number of characters read at a time from a file object.
+
+    Yields:
+        str: The ciphertext of every complete block received so far. Letters that do not fill a block are
+        carried into the next chunk, and only the last block of the stream is padded with 'X'.
+    """
+    return _block_stream(source, np.asarray(key_matrix, dtype=np.int64), chunk_size, strip_padding=False)
+
+
+def decode_stream(source, key_matrix, chunk_size=DEFAULT_STREAM_CHUNK_SIZE):
+    """
+    Decode a stream of Hill ciphertext in constant memory.
+
+    Args:
+        source: A file object or an iterable of text chunks (see ingest.iter_code_chunks).
+        key_matrix (np.ndarray): The key matrix used for encoding.
+        chunk_size (int): The number of characters read at a time from a file object.
+
+    Yields:
+        str: The plaintext of every complete block received so far. Trailing 'X' padding is only removed
+        at the end of the stream, as decode() does for the whole text.
+
+    Raises:
+        ValueError: If the key matrix is not invertible modulo 26.
+    """
+    key_inv_matrix = matrix_mod_inv(key_matrix, 26)
+    if key_inv_matrix is None:
+        raise ValueError("Key matrix is not invertible modulo 26.")
+    return _block_stream(source, key_inv_matrix.astype(np.int64), chunk_size, strip_padding=True)
 
 
 def inv_mod_matrix(matrix, modulus):
-    """Calculate the inverse of a matrix modulo a given modulus using SymPy."""
-    det_matrix = int(round(det(matrix)))  # Compute the determinant
-    det_inv_mod = pow(det_matrix, -1, modulus)  # Find the modular inverse of the determinant
-
-    if det_inv_mod is None:
+    """Calculate the inverse of a matrix modulo a given modulus with exact integer arithmetic."""
+    inverse = modular.matrix_mod_inverse(matrix, modulus)
+    if inverse is None:
         raise ValueError("Matrix is not invertible modulo {}".format(modulus))
-
-    matrix_mod_inv = Matrix(matrix).inv_mod(modulus)  # Using SymPy for precise matrix inversion modulo
-    return np.array(matrix_mod_inv).astype(int)
+    return inverse.astype(int)
 
 
 def matrix_to_string(matrix):
@@ -124,55 +271,42 @@ def matrix_to_string(matrix):
 
 
 def perform_cryptanalysis(known_plaintext, ciphertext, blocksize, output_callback, terminal_callback):
-    """Perform cryptanalysis to find valid Hill cipher keys."""
+    """
+    Perform cryptanalysis to find the Hill cipher key from aligned known plaintext and ciphertext.
+
+    Every complete block of the crib gives n equations C_block = K P_block, so all of them are stacked into a
+    single overdetermined system P K^T = C (blocks as rows) and solved at once modulo 2 and 13 (see
+    modular.solve_mod). This needs no individual group of blocks to be invertible.
+
+    Returns:
+        list: The key matrix as a nested list, or an empty list if the crib does not determine a valid key.
+    """
     if not known_plaintext or not ciphertext:
         terminal_callback("Invalid input provided.")
         return []
 
-    valid_keys = []
-    seen_hashes = set()
-
-    P_full_vector = np.array(text_to_vector(known_plaintext))
-    C_full_vector = np.array(text_to_vector(ciphertext))
+    P_full_vector = text_to_vector(known_plaintext).astype(np.int64)
+    C_full_vector = text_to_vector(ciphertext).astype(np.int64)
 
     max_length = min(len(P_full_vector), len(C_full_vector))
-    max_complete_blocks = max_length // (blocksize ** 2) * (blocksize ** 2)
-
-    P_full_vector = P_full_vector[:max_complete_blocks]
-    C_full_vector = C_full_vector[:max_complete_blocks]
-
-    terminal_callback(f"Processing {len(P_full_vector) // (blocksize ** 2)} blocks.")
-    try:
-        num_matrices = len(P_full_vector) // (blocksize ** 2)
-        for i in range(num_matrices):
-            P_matrix = P_full_vector[i * blocksize ** 2:(i + 1) * blocksize ** 2].reshape(blocksize, blocksize)
-            C_matrix = C_full_vector[i * blocksize ** 2:(i + 1) * blocksize ** 2].reshape(blocksize, blocksize)
+    max_complete_blocks = max_length // blocksize * blocksize
 
-            det_P = int(np.round(det(P_matrix))) % 26
-            if det_P == 0 or gcd(det_P, 26) != 1:
-                terminal_callback("Non-invertible P matrix skipped.")
-                continue  # Skip non-invertible matrices
+    P_blocks = P_full_vector[:max_complete_blocks].reshape(-1, blocksize)
+    C_blocks = C_full_vector[:max_complete_blocks].reshape(-1, blocksize)
 
-            P_inv_mod_26 = inv_mod_matrix(P_matrix, 26)
-            K_matrix = (np.dot(P_inv_mod_26, C_matrix) % 26).astype(int)
-
-            if int(np.round(det(K_matrix))) % 26 == 0 or gcd(int(np.round(det(K_matrix))), 26) != 1:
-                terminal_callback("Non-invertible K matrix skipped.")
-                continue  # Skip non-invertible key matrices
-
-            matrix_hash = tuple(map(tuple, K_matrix))
-            if matrix_hash not in seen_hashes:
-                seen_hashes.add(matrix_hash)
-                K_matrix = K_matrix.transpose()
-                valid_keys.append(K_matrix.tolist())
-                terminal_callback(f"Unique key matrix found and added: {K_matrix.tolist()}")
+    terminal_callback(f"Solving {len(P_blocks)} blocks as one system.")
+    K_transpose = modular.solve_mod(P_blocks, C_blocks, 26)
+    if K_transpose is None:
+        terminal_callback("Known plaintext is inconsistent or does not determine the key uniquely.")
+        return []
 
-    except Exception as e:
-        terminal_callback(f"Error encountered: {e}")
+    K_matrix = K_transpose.T
+    if modular.matrix_mod_inverse(K_matrix, 26) is None:
+        terminal_callback("Non-invertible K matrix skipped.")
+        return []
 
-    if not valid_keys:
-        terminal_callback("No valid key matrices found after complete analysis.")
-    return valid_keys
+    terminal_callback(f"Unique key matrix found and added: {K_matrix.tolist()}")
+    return [K_matrix.tolist()]
 
 
 def cryptanalyse(known_text, cipher_text, key_size, start_index, output_callback, terminal_callback):
@@ -209,4 +343,270 @@ def cryptanalyse(known_text, cipher_text, key_size, start_index, output_callback
     else:
         output_str += "No valid keys found."
 
-    return output_str
\ No newline at end of file
+    return output_str
+
+# --------------------------------------------------------------------------------
+# CIPHERTEXT-ONLY CRYPTANALYSIS
+# --------------------------------------------------------------------------------
+# Each row of the decryption matrix turns every ciphertext block into one plaintext letter, independently of
+# the other rows. The 26 ** n candidate rows can therefore be scored one at a time by the letter statistics of
+# the column of letters they produce, and only the best rows are combined into full matrices.
+ROW_SEARCH_BATCH_CELLS = 1 << 22  # Upper bound on the decoded letters held per row-scoring batch
+DEFAULT_TOP_ROWS = 8  # Best rows kept from the row search and combined into matrices
+
+
+def row_candidates(start, stop, block_size):
+    """Returns the candidate decryption rows numbered start to stop - 1, as base-26 digit vectors."""
+    indices = np.arange(start, stop, dtype=np.int64)
+    return indices[:, None] // 26 ** np.arange(block_size - 1, -1, -1, dtype=np.int64) % 26
+
+
+def score_row_range(blocks, start, stop, top_rows):
+    """
+    Score a range of candidate decryption rows by the letter Chi-Squared statistic of the letters they produce.
+
+    Args:
+        blocks (np.ndarray): The ciphertext as a B x n array of blocks.
+        start (int): The first candidate row number.
+        stop (int): One past the last candidate row number.
+        top_rows (int): How many of the best rows to return.
+
+    Returns:
+        tuple: (row numbers, scores) of the best rows of the range, best first.
+    """
+    block_count, block_size = blocks.shape
+    expected = frequency_data.expected_counts(1, block_count)
+    batch_size = max(1, ROW_SEARCH_BATCH_CELLS // block_count)
+    best_rows, best_scores = np.zeros(0, dtype=np.int64), np.zeros(0)
+
+    for batch_start in range(start, stop, batch_size):
+        batch_stop = min(batch_start + batch_size, stop)
+        # One matrix product gives the letter each candidate row produces for every block
+        letters = row_candidates(batch_start, batch_stop, block_size) @ blocks.T % 26
+        scores = util.compute_chi_squared_batch(ngrams.count_ngrams_batch(letters, 1), expected, block_count)
+        best_rows = np.concatenate([best_rows, np.arange(batch_start, batch_stop)])
+        best_scores = np.concatenate([best_scores, scores])
+        if len(best_scores) > top_rows:
+            keep = np.argpartition(best_scores, top_rows - 1)[:top_rows]
+            best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+    order = np.argsort(best_scores, kind='stable')
+    return best_rows[order], best_scores[order]
+
+
+def search_decryption_rows(cipher_codes, block_size, top_rows=DEFAULT_TOP_ROWS, workers=None):
+    """
+    Search all 26 ** n candidate decryption rows for the ones that produce English-like letters.
+
+    Args:
+        cipher_codes (np.ndarray): Ciphertext letter codes, trimmed to whole blocks.
+        block_size (int): The key size n.
+        top_rows (int): How many of the best rows to return.
+        workers (int): The number of processes to search with. Defaults to the number of CPUs; the search is
+            only spread over processes for n >= 3, where there are at least 17576 rows.
+
+    Returns:
+        tuple: (rows, scores) where rows is a top_rows x n array of the best rows, best first.
+    """
+    blocks = np.asarray(cipher_codes, dtype=np.int64).reshape(-1, block_size)
+    total = 26 ** block_size
+    workers = workers or os.cpu_count() or 1
+
+    if block_size < 3 or workers == 1:
+        indices, scores = score_row_range(blocks, 0, total, top_rows)
+    else:
+        # Each worker searches one range of row numbers and returns only its local best rows
+        bounds = np.linspace(0, total, workers * 4 + 1, dtype=np.int64)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            partial = list(executor.map(score_row_range, [blocks] * (len(bounds) - 1), bounds[:-1], bounds[1:],
+                                        [top_rows] * (len(bounds) - 1)))
+        indices = np.concatenate([part[0] for part in partial])
+        scores = np.concatenate([part[1] for part in partial])
+        order = np.argsort(scores, kind='stable')[:top_rows]
+        indices, scores = indices[order], scores[order]
+
+    rows = np.concatenate([row_candidates(index, index + 1, block_size) for index in indices])
+    return rows, scores
+
+
+def combine_rows(cipher_codes, rows, block_size, top_keys=3):
+    """
+    Combine the best decryption rows into invertible matrices and rank them by quadgram fitness.
+
+    Args:
+        cipher_codes (np.ndarray): Ciphertext letter codes, trimmed to whole blocks.
+        rows (np.ndarray): Candidate decryption rows, best first.
+        block_size (int): The key size n.
+        top_keys (int): How many keys to return.
+
+    Returns:
+        list: Tuples of (key matrix, decryption matrix, fitness), best first.
+    """
+    # Every ordered choice of n distinct rows is a candidate decryption matrix
+    choices = np.array(list(itertools.permutations(range(len(rows)), block_size)), dtype=np.int64)
+    if len(choices) == 0:
+        return []
+    decryption_matrices = rows[choices]
+    keys, invertible = modular.inverse_mod_matrices(decryption_matrices, 26)
+    decryption_matrices, keys = decryption_matrices[invertible], keys[invertible]
+    if len(keys) == 0:
+        return []
+
+    fitness_values = fitness.quadgram_score_batch(apply_key_batch(cipher_codes, decryption_matrices))
+    order = np.argsort(-fitness_values, kind='stable')[:top_keys]
+    return [(keys[index], decryption_matrices[index], float(fitness_values[index])) for index in order]
+
+
+def cryptanalyse_ciphertext_only(cipher_text, key_size, output_callback, terminal_callback,
+                                 top_rows=DEFAULT_TOP_ROWS, top_keys=3, workers=None):
+    """
+    Recover a Hill key from ciphertext alone by searching the decryption matrix one row at a time.
+
+    Args:
+        cipher_text (str or CodedText): The ciphertext.
+        key_size (int): The key size n. n = 2 and n = 3 are practical; the search grows as 26 ** n.
+        output_callback (function): Callback for the results.
+        terminal_callback (function): Callback for progress messages.
+        top_rows (int): How many of the best rows are combined into matrices.
+        top_keys (int): How many keys to report.
+        workers (int): The number of processes used for the row search when n >= 3.
+
+    Returns:
+        str: Summary of the best keys found, with a preview of each decryption.
+    """
+    codes = as_coded(cipher_text).codes
+    codes = codes[:len(codes) // key_size * key_size].astype(np.int64)
+    terminal_callback(f"Starting ciphertext-only cryptanalysis of {len(codes) // key_size} blocks...")
+    if len(codes) < key_size * 10:
+        terminal_callback("Insufficient cipher text length for analysis.")
+        return "Results:\nNo valid keys found."
+
+    rows, scores = search_decryption_rows(codes, key_size, max(top_rows, key_size), workers)
+    terminal_callback(f"Searched {26 ** key_size} decryption rows; best scores: {np.round(scores, 3).tolist()}")
+    candidates = combine_rows(codes, rows, key_size, top_keys)
+
+    output_str = "Results:\n"
+    if not candidates:
+        output_str += "No valid keys found."
+    for key_matrix, decryption_matrix, fitness_value in candidates:
+        preview = vector_to_text(apply_key_batch(codes[:100 // key_size * key_size], decryption_matrix[None])[0])
+        output_str += f"Found key: {matrix_to_string(key_matrix)}\nFitness: {fitness_value:.1f}\n" \
+                      f"Decoded Text Preview: {preview}...\n"
+    output_callback(output_str)
+    return output_str
+
+
+# --------------------------------------------------------------------------------
+# CRIB SEARCH
+# --------------------------------------------------------------------------------
+DEFAULT_CRIB_SAMPLE_LENGTH = 300  # Letters decoded to verify each key found from a crib
+CRIB_CHUNK_CELLS = 1 << 22  # Upper bound on the cells of the products computed per chunk of crib offsets
+
+
+def _crib_keys_for_phase(crib_blocks, cipher_blocks, block_size, chunk_cells=CRIB_CHUNK_CELLS):
+    # Solve K for every block-aligned offset of one phase of the crib, one chunk of offsets at a time, so memory
+    # stays bounded on long texts. Yields (offsets, keys) of the keys that map every crib block correctly.
+    crib_block_count = len(crib_blocks)
+    offsets = len(cipher_blocks) - crib_block_count + 1
+    if offsets <= 0:
+        return
+
+    # Find n consecutive crib blocks whose matrix is invertible; P does not depend on the offset
+    plain_windows = np.lib.stride_tricks.sliding_window_view(crib_blocks, block_size, axis=0)
+    plain_inverses, invertible = modular.inverse_mod_matrices(plain_windows, 26)
+    if not invertible.any():
+        return
+    window = int(np.argmax(invertible))
+    plain_inverse = plain_inverses[window].astype(np.int32)
+    crib_columns = crib_blocks.T.astype(np.int32)
+
+    # Windows of cipher blocks as matrix columns: C for the chosen crib window, and every block under the crib
+    cipher_windows = np.lib.stride_tricks.sliding_window_view(cipher_blocks, block_size, axis=0)
+    aligned = np.lib.stride_tricks.sliding_window_view(cipher_blocks, crib_block_count, axis=0)
+    step = max(1, chunk_cells // (block_size * crib_block_count))
+    for start in range(0, offsets, step):
+        stop = min(start + step, offsets)
+        # C = K P with blocks as columns, so K = C P^-1. Entries stay far below 2^31, so int32 products suffice.
+        keys = cipher_windows[window + start:window + stop].astype(np.int32) @ plain_inverse % 26
+        # Verify each key against every block of the crib, not only the ones it was solved from
+        consistent = (keys @ crib_columns % 26 == aligned[start:stop]).all(axis=(1, 2))
+        if consistent.any():
+            yield np.arange(start, stop)[consistent], keys[consistent].astype(np.int64)
+
+
+def crib_search(crib, cipher_text, key_sizes=range(2, 5), top_keys=5, sample_length=DEFAULT_CRIB_SAMPLE_LENGTH):
+    """
+    Find Hill keys from a known phrase whose position in the plaintext and whose block size are unknown.
+
+    Args:
+        crib (str or CodedText): The known plaintext phrase. It must span at least n whole blocks.
+        cipher_text (str or CodedText): The ciphertext.
+        key_sizes (iterable): The key sizes n to try.
+        top_keys (int): How many keys to return.
+        sample_length (int): How many letters of the ciphertext are decoded to rank each key.
+
+    Returns:
+        list: Tuples of (key size, start index of the crib in the text, key matrix, fitness), best first.
+        Only keys that map every whole block of the crib onto the ciphertext are returned.
+
+    For every key size and every phase of the crib relative to the block boundaries, the crib is slid over
+    the block-aligned offsets in fixed-size chunks: K = C P^-1 is solved for a whole chunk with one batched
+    product and checked against the rest of the crib. The surviving keys decode a sample with the batched
+    decoder and only the best top_keys are kept as the search goes.
+    """
+    crib_codes = as_coded(crib).codes
+    cipher_codes = as_coded(cipher_text).codes
+    results = []
+
+    for block_size in key_sizes:
+        cipher_blocks = cipher_codes[:len(cipher_codes) // block_size * block_size].reshape(-1, block_size)
+        sample = cipher_codes[:max(sample_length // block_size, 1) * block_size]
+        sample = CodedText._wrap(sample[:len(sample) // block_size * block_size])
+        for phase in range(block_size):
+            # The crib starts phase letters before a block boundary, so its whole blocks begin at index phase
+            whole = (len(crib_codes) - phase) // block_size
+            if whole < block_size:
+                continue
+            crib_blocks = crib_codes[phase:phase + whole * block_size].reshape(-1, block_size).astype(np.int64)
+            for offsets, keys in _crib_keys_for_phase(crib_blocks, cipher_blocks, block_size):
+                _, invertible = modular.inverse_mod_matrices(keys, 26)
+                start_indexes = offsets * block_size - phase
+                keep = invertible & (start_indexes >= 0)
+                if not keep.any():
+                    continue
+                # Rank the verified keys by the quadgram fitness of a decoded sample
+                fitness_values = fitness.quadgram_score_batch(decode_batch(sample, keys[keep]), normalize=True)
+                found = [(block_size, int(start), key, float(value))
+                         for start, key, value in zip(start_indexes[keep], keys[keep], fitness_values)]
+                results = heapq.nlargest(top_keys, results + found, key=lambda result: result[3])
+
+    return results
+
+
+def cryptanalyse_with_crib(known_text, cipher_text, key_sizes, output_callback, terminal_callback):
+    """
+    Known-plaintext cryptanalysis without a start index or an exact key size (see crib_search).
+
+    Args:
+        known_text (str): A phrase known to occur somewhere in the plaintext.
+        cipher_text (str): The ciphertext.
+        key_sizes (iterable): The key sizes to try.
+        output_callback (function): Callback for the results.
+        terminal_callback (function): Callback for progress messages.
+
+    Returns:
+        str: Summary of the keys found.
+    """
+    key_sizes = list(key_sizes)  # Listed once, so a generator is not exhausted before the search
+    terminal_callback(f"Sliding a crib of {len(as_coded(known_text))} letters over the cipher text "
+                      f"for key sizes {key_sizes}...")
+    results = crib_search(known_text, cipher_text, key_sizes)
+
+    output_str = "Results:\n"
+    if not results:
+        output_str += "No valid keys found."
+    for block_size, start_index, key_matrix, fitness_value in results:
+        output_str += f"Found key (size {block_size}, crib at {start_index}): {matrix_to_string(key_matrix)}\n" \
+                      f"Fitness: {fitness_value:.2f}\n"
+    output_callback(output_str)
+    return output_str
@@ -1,16 +1,48 @@
-import itertools
-import tkinter as tk
+import heapq
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from tabulate import tabulate
 from functools import reduce
 import operator
+import numpy as np
 
+from analysis import ngrams
+from analysis.cache import StageCache, array_digest, text_digest
+from analysis import fitness, frequency_data, models, periodicity, pruning
 from analysis import utility as util
-from analysis.frequency_data import (
-    letter_frequencies as exp_letter,
-    bigram_frequencies as exp_bi,
-    trigram_frequencies as exp_tri,
-)
-from ciphers.caesar import decode as c_decode
+from analysis.coded_text import CodedText, as_coded, as_packed, codes_to_text, like_input
+from analysis.ingest import DEFAULT_STREAM_CHUNK_SIZE, iter_code_chunks
+from analysis.shared_arrays import SharedArrays, attach_arrays
+
+# Upper bound on the number of array cells (decoded letters or histogram bins) held per scoring batch
+SCORING_BATCH_CELLS = 1 << 22
+
+# Default number of candidate keys scored per key length
+DEFAULT_CANDIDATE_BUDGET = 10000
+
+# Batch cracking picks the shortest key length whose pooled column IC reaches this fraction of the way from
+# random to English text; periods that leave fewer than BATCH_MIN_COLUMN_LETTERS letters per column are skipped
+BATCH_PERIOD_CONFIDENCE = 0.6
+BATCH_MIN_COLUMN_LETTERS = 4
+
+
+def key_to_codes(key):
+    """
+    Converts a Vigenère key to an array of shift values (A=0 ... Z=25).
+
+    Args:
+        key (str): The cipher key.
+
+    Returns:
+        np.ndarray: The shift value for each letter of the key.
+
+    Raises:
+        ValueError: If the key does not contain any letters.
+    """
+    key_codes = as_coded(key).codes
+    if len(key_codes) == 0:
+        raise ValueError("Vigenère key must contain at least one letter.")
+    return key_codes
 
 
 # --------------------------------------------------------------------------------
@@ -23,29 +55,21 @@ def encode(plain_text, key, update_terminal_callback):
     and shifting each letter of the plaintext by the corresponding letter in the key.
 
     Args:
-        plain_text (str): The text to be encoded.
+        plain_text (str or CodedText): The text to be encoded.
         key (str): The cipher key.
         update_terminal_callback (function): Callback function for UI updates.
 
     Returns:
-        str: The encoded ciphertext.
+        str or CodedText: The encoded ciphertext, in the same form as the input.
     """
-    # Prepare the plaintext by removing non-alphabetic characters and converting to uppercase
-    plain_text = util.prepare_text(plain_text)
-    cipher_text = ''  # Initialize the output variable for the encoded text
-    key_index = 0  # Initialize key index to cycle through each character of the key
+    # Prepare the plaintext once as letter codes (coded text is used as-is)
+    coded = as_coded(plain_text)
+    key_codes = key_to_codes(key)
 
-    for char in plain_text:
-        if char.isalpha():  # Process only alphabetic characters
-            # Calculate the shift amount from the current character in the key
-            shift = ord(key[key_index].upper()) - ord('A')
-            # Shift the plaintext character within the bounds of uppercase English letters
-            new_char = chr((ord(char) - ord('A') + shift) % 26 + ord('A'))
-            cipher_text += new_char  # Append the shifted character to the output ciphertext
-            key_index = (key_index + 1) % len(
-                key)  # Move to the next character in the key, wrapping around if necessary
+    # Repeat the key to the length of the text and shift every letter at once
+    cipher_codes = (coded.codes + np.resize(key_codes, len(coded))) % 26
 
-    return cipher_text  # Return the fully encoded text
+    return like_input(plain_text, cipher_codes)  # Return the fully encoded text
 
 
 # --------------------------------------------------------------------------------
@@ -57,36 +81,285 @@ def decode(cipher_text, key, update_terminal_callback):
     This reverses the encoding process by using the negative shift associated with each letter of the key.
 
     Args:
-        cipher_text (str): The text to be decoded.
+        cipher_text (str or CodedText): The text to be decoded.
         key (str): The cipher key.
         update_terminal_callback (function): Callback function for UI updates.
 
     Returns:
-        str: The decoded plaintext.
+        str or CodedText: The decoded plaintext, in the same form as the input.
     """
     # Prepare the ciphertext for decoding
-    cipher_text = util.prepare_text(cipher_text)
-    plaintext = ''  # Initialize the output variable for the decoded text
-    key_index = 0  # Initialize key index to cycle through each character of the key
+    coded = as_coded(cipher_text)
+    key_codes = key_to_codes(key)
+
+    # Reverse the shift applied during encryption for every letter at once
+    plain_codes = (coded.codes + 26 - np.resize(key_codes, len(coded))) % 26
+
+    return like_input(cipher_text, plain_codes)  # Return the fully decoded text
+
+
+# --------------------------------------------------------------------------------
+# BATCH DECODING FUNCTION
+# --------------------------------------------------------------------------------
+def decode_batch(cipher_text, keys):
+    """
+    Decode one ciphertext under many Vigenère keys at once.
+
+    Args:
+        cipher_text (str or CodedText): The text to be decoded.
+        keys (list): The candidate keys. They may have different lengths.
+
+    Returns:
+        np.ndarray: A K x N uint8 array of letter codes, row i holding the text decoded with keys[i].
+    """
+    codes = as_coded(cipher_text).codes
+    key_codes = [key_to_codes(key) for key in keys]
+    if not key_codes:
+        return np.zeros((0, len(codes)), dtype=np.uint8)
+    lengths = np.array([len(key) for key in key_codes])
+
+    # Stack the keys into a K x max_length matrix, then tile each row to the text length with one gather
+    key_matrix = np.zeros((len(key_codes), lengths.max()), dtype=np.uint8)
+    for row, key in zip(key_matrix, key_codes):
+        row[:len(key)] = key
+    positions = np.arange(len(codes)) % lengths[:, None]
+    tiled = np.take_along_axis(key_matrix, positions, axis=1)
+
+    return (codes + 26 - tiled) % 26
+
+
+# --------------------------------------------------------------------------------
+# STREAMING FUNCTIONS
+# --------------------------------------------------------------------------------
+def _shift_stream(source, shifts, chunk_size):
+    # Apply the repeating shifts chunk by chunk, carrying the key position across chunk boundaries
+    position = 0
+    for codes in iter_code_chunks(source, chunk_size):
+        tiled = np.resize(np.roll(shifts, -position), len(codes))
+        yield codes_to_text((codes + tiled) % 26)
+        position = (position + len(codes)) % len(shifts)
+
+
+def encode_stream(source, key, chunk_size=DEFAULT_STREAM_CHUNK_SIZE):
+    """
+    Encode a stream of text with a Vigenère cipher in constant memory.
+
+    Args:
+        source: A file object or an iterable of text chunks (see ingest.iter_code_chunks).
+        key (str): The cipher key.
+        chunk_size (int): The number of characters read at a time from a file object.
+
+    Yields:
+        str: The encoded ciphertext of each chunk. The key continues where the previous chunk left off,
+        so the joined output equals encode() of the whole text.
+    """
+    return _shift_stream(source, key_to_codes(key).astype(np.int16), chunk_size)
+
 
-    for char in cipher_text:
-        if char.isalpha():  # Process only alphabetic characters
-            # Calculate the negative shift amount from the current character in the key
-            shift = ord(key[key_index].upper()) - ord('A')
-            # Reverse the shift applied during encryption
-            new_char = chr((ord(char) - ord('A') - shift) % 26 + ord('A'))
-            plaintext += new_char  # Append the reversed character to the output plaintext
-            key_index = (key_index + 1) % len(
-                key)  # Move to the next character in the key, wrapping around if necessary
+def decode_stream(source, key, chunk_size=DEFAULT_STREAM_CHUNK_SIZE):
+    """
+    Decode a stream of Vigenère ciphertext in constant memory.
+
+    Args:
+        source: A file object or an iterable of text chunks (see ingest.iter_code_chunks).
+        key (str): The cipher key.
+        chunk_size (int): The number of characters read at a time from a file object.
 
-    return plaintext  # Return the fully decoded text
+    Yields:
+        str: The decoded plaintext of each chunk.
+    """
+    return _shift_stream(source, 26 - key_to_codes(key).astype(np.int16), chunk_size)
+
+
+# --------------------------------------------------------------------------------
+# CACHED ANALYSIS STAGES
+# --------------------------------------------------------------------------------
+# Intermediate results are cached per ciphertext so re-running the analysis with different
+# max_key_length, key_guess or shift_guess values only computes what has not been seen before.
+# Candidate scores are cached per key, so the cache holds several full candidate budgets.
+analysis_cache = StageCache(max_entries=8 * DEFAULT_CANDIDATE_BUDGET)
+
+# Cached in place of the scores of a candidate that was pruned on a prefix or dropped from a worker's local
+# top-K, with the (top_k, prefix_lengths, prune_margin) settings and the candidates it lost against
+PrunedCandidate = namedtuple('PrunedCandidate', ['settings', 'candidates'])
+
+
+def cache_stats():
+    """
+    Returns the hit, miss and eviction counters of the Vigenère analysis cache.
+
+    Returns:
+        dict: The counters and current size of analysis_cache.
+    """
+    return analysis_cache.stats()
+
+
+def clear_cache():
+    """Empties the Vigenère analysis cache and resets its counters."""
+    analysis_cache.clear()
+
+
+def tables_digest(tables, rank_by='trigram'):
+    """
+    Returns a content digest of the expected tables (and quadgram table) that scores were computed with.
+
+    Args:
+        tables (list): Expected frequencies for orders 1, 2, ... as dicts or dense arrays.
+        rank_by (str): The ranking; the quadgram table is included when it is 'quadgram'.
+
+    Returns:
+        str: A hex digest that changes whenever the contents of any table change.
+    """
+    arrays = [util.dense_frequencies(table, n) for n, table in enumerate(tables, start=1)]
+    if rank_by == 'quadgram':
+        arrays.append(fitness.get_quadgram_table())
+    return array_digest(*arrays)
+
+
+def calculate_ic(column_text):
+    """
+    Calculate the Index of Coincidence (IC) for a column of text.
+
+    Args:
+        column_text (CodedText): The column to analyze.
+
+    Returns:
+        float: The IC of the column, using the formula IC = Σ(ni(ni-1)) / (N(N-1)).
+    """
+    freq = np.bincount(column_text.codes, minlength=26)  # Frequency array for each letter A-Z
+    IC_sum = int(np.dot(freq, freq - 1))
+    return IC_sum / (len(column_text) * (len(column_text) - 1)) if len(column_text) > 1 else 0
+
+
+def create_matrix(n, text):
+    """Split the text into n columns, one for each position of a key of length n."""
+    return [text[i::n] for i in range(n)]
+
+
+def coincidence_counts(cipher_text, digest=None):
+    """
+    Letter coincidence counts of the ciphertext at every shift, cached per ciphertext.
+
+    Args:
+        cipher_text (CodedText): The ciphertext.
+        digest (str): The ciphertext digest, if already computed.
+
+    Returns:
+        np.ndarray: The counts from periodicity.coincidence_counts. They do not depend on the key lengths
+        being tested, so a re-run with a larger max_key_length reuses them.
+    """
+    digest = digest or text_digest(cipher_text)
+    return analysis_cache.get_or_compute((digest, 'coincidences'),
+                                         lambda: periodicity.coincidence_counts(cipher_text))
+
+
+def repeat_spacings(cipher_text, digest=None):
+    """
+    Spacings between repeated trigrams of the ciphertext (the Kasiski examination), cached per ciphertext.
+
+    Args:
+        cipher_text (CodedText): The ciphertext.
+        digest (str): The ciphertext digest, if already computed.
+
+    Returns:
+        np.ndarray: The spacings from periodicity.repeat_spacings.
+    """
+    digest = digest or text_digest(cipher_text)
+    return analysis_cache.get_or_compute((digest, 'kasiski'), lambda: periodicity.repeat_spacings(cipher_text))
+
+
+def key_length_ic(cipher_text, key_length, digest=None):
+    """
+    Column IC of the ciphertext for one key length.
+
+    Args:
+        cipher_text (CodedText): The ciphertext.
+        key_length (int): The key length to test.
+        digest (str): The ciphertext digest, if already computed.
+
+    Returns:
+        float: The IC of the ciphertext split into key_length columns.
+    """
+    column_ic, _ = periodicity.period_statistics(coincidence_counts(cipher_text, digest), key_length)
+    return float(column_ic[-1])
+
+
+def column_shift_scores(cipher_text, key_length, digest=None, expected=None):
+    """
+    Chi-squared letter score of all 26 shifts for every column, cached per ciphertext and key length.
+
+    Args:
+        cipher_text (CodedText): The ciphertext.
+        key_length (int): The key length whose columns are scored.
+        digest (str): The ciphertext digest, if already computed.
+        expected (dict or np.ndarray): Expected letter frequencies as percentages. Defaults to the letter
+            table of the selected model (see frequency_data.dense_table).
+
+    Returns:
+        np.ndarray: A key_length x 26 matrix of scores (lower is better). The full matrix is kept so a
+        re-run with a larger shift_guess does not recompute anything.
+    """
+    expected = frequency_data.dense_table(1) if expected is None else expected
+
+    def compute():
+        # Count the letters of every column in one pass, then score all 26 shifts of each column at once
+        codes = cipher_text.codes
+        columns = np.arange(len(codes)) % key_length
+        letter_counts = np.bincount(columns * 26 + codes, minlength=key_length * 26).reshape(key_length, 26)
+        return util.shift_chi_squared_matrix(letter_counts, expected)
+
+    digest = digest or text_digest(cipher_text)
+    return analysis_cache.get_or_compute((digest, 'shifts', key_length, tables_digest([expected])), compute)
+
+
+# --------------------------------------------------------------------------------
+# KEY CANDIDATE GENERATION
+# --------------------------------------------------------------------------------
+def best_first_keys(shift_scores, shift_guess=26, budget=None):
+    """
+    Lazily yields keys in order of increasing combined column score.
+
+    Args:
+        shift_scores (np.ndarray): A key_length x 26 matrix of column shift scores (lower is better).
+        shift_guess (int): How many of the best shifts of each column to consider.
+        budget (int): The maximum number of keys to yield. None yields every combination.
+
+    Yields:
+        tuple: (key, score) where score is the sum of the chosen shifts' column scores.
+
+    The search walks the combinations with a priority queue. Each state holds a rank per column, and a
+    state only advances columns at or after the last one it advanced, so every combination is reached
+    exactly once. Memory and time grow with the number of keys taken, not with shift_guess ** key_length.
+    """
+    shift_scores = np.asarray(shift_scores)
+    key_length, shift_guess = len(shift_scores), min(shift_guess, 26)
+    if key_length == 0 or shift_guess < 1:
+        return
+    # Rank the shifts of every column from best to worst
+    ranked_shifts = np.argsort(shift_scores, axis=1, kind='stable')[:, :shift_guess]
+    ranked_scores = np.take_along_axis(shift_scores, ranked_shifts, axis=1)
+
+    start = (0,) * key_length
+    queue = [(float(ranked_scores[:, 0].sum()), start, 0)]
+    produced = 0
+    while queue and (budget is None or produced < budget):
+        score, ranks, first_column = heapq.heappop(queue)
+        yield ''.join(chr(65 + ranked_shifts[column, rank]) for column, rank in enumerate(ranks)), score
+        produced += 1
+        for column in range(first_column, key_length):
+            rank = ranks[column] + 1
+            if rank < shift_guess:
+                successor = ranks[:column] + (rank,) + ranks[column + 1:]
+                step = ranked_scores[column, rank] - ranked_scores[column, rank - 1]
+                heapq.heappush(queue, (score + float(step), successor, column))
 
 
 # --------------------------------------------------------------------------------
 # CRYPTANALYSIS FUNCTION
 # --------------------------------------------------------------------------------
 def cryptanalyse(cipher_text, max_key_length, key_guess, shift_guess, update_terminal_callback, output_text,
-                 update_status_callback):
+                 update_status_callback, candidate_budget=DEFAULT_CANDIDATE_BUDGET, workers=1,
+                 prefix_lengths=pruning.DEFAULT_PREFIX_LENGTHS):
     """
     Perform cryptanalysis on a given ciphertext using a Vigenère cipher.
     This involves estimating the key length and possible keys to attempt decrypting the ciphertext.
@@ -99,117 +372,307 @@ def cryptanalyse(cipher_text, max_key_length, key_guess, shift_guess, update_ter
         update_terminal_callback (function): Callback function for terminal updates.
         output_text (tk.Text): The Text widget to display the analysis results.
         update_status_callback (function): Callback function for status updates.
+        candidate_budget (int): The maximum number of keys scored per key length, best combined column
+            score first. None scores every combination of the top shift_guess shifts.
+        workers (int): The number of processes used to score the candidate keys.
+        prefix_lengths (tuple): Prefix lengths used to prune candidates before full-text scoring, or None to
+            score every candidate on the full text.
     """
-    # Prepare the ciphertext by normalizing it
-    cipher_text = util.prepare_text(cipher_text)
-
-    # Function to calculate the Index of Coincidence (IC) for a column of text
-    def calculate_ic(column_text):
-        freq = [0] * 26  # Frequency array for each letter A-Z
-        for char in column_text:
-            if char.isalpha():
-                freq[ord(char) - ord('A')] += 1
-        # Compute the IC using the formula IC = Σ(ni(ni-1)) / (N(N-1))
-        IC_sum = sum(f * (f - 1) for f in freq)
-        return IC_sum / (len(column_text) * (len(column_text) - 1)) if len(column_text) > 1 else 0
-
-    # Function to create a matrix of text columns based on the assumed key length
-    def create_matrix(n, text):
-        return [text[i::n] for i in range(n)]
-
-    # Function to generate all possible keys from the shift combinations found in cryptanalysis
-    def generate_all_possible_keys(all_stream_shifts, all_possible_keys, update_terminal_callback,
+    # Prepare the ciphertext once; every later stage works on the coded text
+    cipher_text = as_coded(cipher_text)
+    if not len(cipher_text):
+        # Every score is normalized by the text length, so a text without letters has nothing to rank
+        update_terminal_callback("The ciphertext contains no letters to analyse.")
+        return "Results:\nNo valid keys found."
+
+    # Function to generate the best keys from the column shift scores found in cryptanalysis
+    def generate_all_possible_keys(shift_scores, all_possible_keys, update_terminal_callback,
                                    update_status_callback):
         update_terminal_callback("Generating a Keyset...")
-        alphabet = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
-        shift_combinations = [list(map(lambda x: x[0], stream_shifts)) for stream_shifts in all_stream_shifts]
-        total_combinations = reduce(operator.mul, [len(shifts) for shifts in shift_combinations], 1)
+        total_combinations = reduce(operator.mul, [min(shift_guess, 26)] * len(shift_scores), 1)
         update_status_callback(f"Total Combinations: {total_combinations}")
+        target = min(total_combinations, candidate_budget) if candidate_budget else total_combinations
 
-        for count, combination in enumerate(itertools.product(*shift_combinations)):
-            key = ''.join(alphabet[shift] for shift in combination)
+        for count, (key, _) in enumerate(best_first_keys(shift_scores, shift_guess, candidate_budget)):
             all_possible_keys.append(key)
             if count % 1000 == 0:
-                update_status_callback(f"Generated {count} of {total_combinations} keys")
-        update_terminal_callback("Done! Generated all possible keys for this key length.")
+                update_status_callback(f"Generated {count} of {target} keys")
+        update_terminal_callback("Done! Generated the best keys for this key length.")
 
-    # Estimate the most likely key lengths based on the Index of Coincidence
+    # Estimate the most likely key lengths based on the Index of Coincidence and a Kasiski examination
     update_terminal_callback("Estimating Key Length...")
-    data = [[i, 0] for i in range(1, max_key_length + 1)]
-    for key_length in range(1, max_key_length + 1):
-        matrix = create_matrix(key_length, cipher_text)
-        ic_values = [calculate_ic(column) for column in matrix]
-        average_ic = sum(ic_values) / len(ic_values) if ic_values else 0
-        data[key_length - 1][1] = average_ic
-
-    sorted_data = sorted(data, key=lambda row: abs(row[1] - 0.0686))[:key_guess]
+    digest = text_digest(cipher_text)
+    # Column IC and autocorrelation of every key length come from one set of coincidence counts
+    ic_ranking = periodicity.rank_key_lengths(
+        *periodicity.period_statistics(coincidence_counts(cipher_text, digest), max_key_length))
+    spacings = repeat_spacings(cipher_text, digest)
+    kasiski_ranking = periodicity.rank_kasiski(*periodicity.factor_statistics(spacings, max_key_length))
+
+    # Short texts may have no repeats at all, in which case the Kasiski ranking carries no information
+    key_lengths = periodicity.combine_rankings(ic_ranking, kasiski_ranking) if len(spacings) else \
+        [row[0] for row in ic_ranking]
+    ic_rows = {row[0]: row for row in ic_ranking}
+    kasiski_rows = {row[0]: row for row in kasiski_ranking}
+    sorted_data = [[length, ic_rows[length][1], ic_rows[length][2], kasiski_rows[length][2],
+                    (ic_rows[length][3] + kasiski_rows[length][3]) / 2 if len(spacings) else ic_rows[length][3]]
+                   for length in key_lengths[:key_guess]]
     update_terminal_callback("Key Length Estimation Complete")
-    table_str = tabulate(sorted_data, headers=["Key Length", "IC Value"], tablefmt="outline")
+    table_str = tabulate(sorted_data, headers=["Key Length", "IC Value", "Autocorrelation", "Kasiski", "Confidence"],
+                         tablefmt="outline")
     update_terminal_callback(table_str)
 
     # Analyze each key length guess to find possible shifts for each stream of characters
     all_possible_keys = []
-    for key_length, _ in sorted_data:
-        matrix = create_matrix(key_length, cipher_text)
-        all_stream_shifts = []
-        for stream_index, stream in enumerate(matrix):
-            shift_scores = []
-            for shift in range(26):
-                decrypted_stream = c_decode(stream, shift, lambda x: None)  # Decode using each possible shift
-                letter_frequencies = util.generate_frequency_data(decrypted_stream)
-                chi_squared = util.compute_chi_squared(letter_frequencies[0], exp_letter, len(decrypted_stream))
-                shift_scores.append((shift, chi_squared))
-            top_shifts = sorted(shift_scores, key=lambda x: x[1])[:shift_guess]
-            all_stream_shifts.append(top_shifts)
-
-        generate_all_possible_keys(all_stream_shifts, all_possible_keys, update_terminal_callback,
-                                   update_status_callback)
+    for length_guess, *_ in sorted_data:
+        shift_scores = column_shift_scores(cipher_text, length_guess, digest)
+        generate_all_possible_keys(shift_scores, all_possible_keys, update_terminal_callback, update_status_callback)
 
     update_terminal_callback(f"Generated {len(all_possible_keys)} keys!")
 
     # Use the possible keys to attempt decrypting the ciphertext and analyze results
-    results = vigenere_chi_cryptanalysis(cipher_text, all_possible_keys, exp_letter, exp_bi, exp_tri,
-                                         update_status_callback)
+    # Only the top three results are displayed, so only those are kept and decoded, and candidates that are
+    # clearly worse on a prefix of a long ciphertext are dropped before full-text scoring
+    # The expected tables are those of the selected model (see analysis.models.set_model_dir)
+    results = vigenere_chi_cryptanalysis(cipher_text, all_possible_keys,
+                                         update_status_callback=update_status_callback, workers=workers, top_k=3,
+                                         prefix_lengths=prefix_lengths)
 
     # Display results and final decryption tables for top key guesses
     return finalize_cryptanalysis(cipher_text, results, update_terminal_callback)
 
 
-def vigenere_chi_cryptanalysis(text, all_possible_keys, exp_letter, exp_bi, exp_tri, update_status_callback):
+def score_key_batch(text, keys, expected, rank_by, quadgram_table=None):
+    """
+    Score a batch of candidate keys with vectorized decoding and n-gram counting.
+
+    Args:
+        text (CodedText): The ciphertext.
+        keys (list): The candidate keys.
+        expected (dict): Expected count vectors for orders 1 to 3, sized for the text length.
+        rank_by (str): 'trigram' or 'quadgram'. Quadgram fitness is only computed when ranking by it.
+        quadgram_table (np.ndarray): The quadgram table to use. Defaults to fitness.get_quadgram_table().
+
+    Returns:
+        list: One (chi letter, chi bigram, chi trigram, quadgram fitness or None) tuple per key.
+    """
+    text_length = len(text)
+    # Decode the text using every key of the batch without updating the terminal
+    decoded = decode_batch(text, keys)
+
+    # Count letters, bigrams and trigrams of the whole batch, then score every candidate in one call per order
+    chi_letter, chi_bi, chi_tri = (
+        util.compute_chi_squared_batch(ngrams.count_ngrams_batch(decoded, n), expected[n], text_length)
+        for n in (1, 2, 3)
+    )
+    fitness_values = fitness.quadgram_score_batch(decoded, quadgram_table) if rank_by == 'quadgram' \
+        else [None] * len(keys)
+    return [(float(letter_score), float(bigram_score), float(trigram_score),
+             None if quadgram_fitness is None else float(quadgram_fitness))
+            for letter_score, bigram_score, trigram_score, quadgram_fitness in
+            zip(chi_letter, chi_bi, chi_tri, fitness_values)]
+
+
+def rank_value(score, rank_by):
+    """Returns the value a score tuple is sorted by (lower is better) for the given ranking."""
+    return -score[3] if rank_by == 'quadgram' else score[2]
+
+
+# Per-process state of the scoring workers, set up once by _init_scoring_worker
+_worker_state = {}
+
+
+def _init_scoring_worker(specs, rank_by):
+    # Map the ciphertext and the model tables from shared memory instead of receiving them with every task
+    arrays = attach_arrays(specs)
+    _worker_state.update(
+        text=CodedText._wrap(arrays['codes']),
+        expected={n: arrays[f'expected_{n}'] for n in (1, 2, 3)},
+        quadgram_table=arrays.get('quadgrams'),
+        rank_by=rank_by,
+    )
+
+
+def _score_partition(keys, batch_size, top_k):
+    # Score one partition of the candidates in a worker and return only its local top-K
+    state = _worker_state
+    scored = []
+    for start in range(0, len(keys), batch_size):
+        batch_keys = keys[start:start + batch_size]
+        scored.extend(zip(batch_keys, score_key_batch(state['text'], batch_keys, state['expected'],
+                                                      state['rank_by'], state['quadgram_table'])))
+    if top_k is None:
+        return scored
+    return heapq.nsmallest(top_k, scored, key=lambda item: rank_value(item[1], state['rank_by']))
+
+
+def score_keys_parallel(text, keys, expected, rank_by, workers, batch_size, top_k=None,
+                        update_status_callback=lambda message: None):
+    """
+    Score candidate keys across a process pool.
+
+    Args:
+        text (CodedText): The ciphertext.
+        keys (list): The candidate keys.
+        expected (dict): Expected count vectors for orders 1 to 3, sized for the text length.
+        rank_by (str): 'trigram' or 'quadgram'.
+        workers (int): The number of worker processes.
+        batch_size (int): The number of keys each worker scores at a time.
+        top_k (int): If given, each worker returns only its best top_k keys. The overall best top_k keys are
+            always among them.
+        update_status_callback (function): Callback for progress messages.
+
+    Returns:
+        dict: Score tuples (see score_key_batch) by key.
+
+    The ciphertext, the expected counts and the quadgram table are published once in shared memory and
+    mapped by every worker, so the tasks only carry their partition of the keys.
+    """
+    arrays = {'codes': text.codes, **{f'expected_{n}': expected[n] for n in (1, 2, 3)}}
+    if rank_by == 'quadgram':
+        arrays['quadgrams'] = fitness.get_quadgram_table()
+    # A few partitions per worker keeps every core busy while each task still returns a short local top-K
+    partition_size = max(batch_size, -(-len(keys) // (workers * 4)))
+
+    scores = {}
+    with SharedArrays(arrays) as shared, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_scoring_worker,
+                                initargs=(shared.specs, rank_by)) as executor:
+        futures = [executor.submit(_score_partition, keys[start:start + partition_size], batch_size, top_k)
+                   for start in range(0, len(keys), partition_size)]
+        for done, future in enumerate(as_completed(futures), start=1):
+            scores.update(future.result())
+            update_status_callback(f"Scored {done} of {len(futures)} partitions")
+    return scores
+
+
+def vigenere_chi_cryptanalysis(text, all_possible_keys, exp_letter=None, exp_bi=None, exp_tri=None,
+                               update_status_callback=lambda message: None, rank_by='trigram', workers=1, top_k=None, prefix_lengths=None,
+                               prune_margin=pruning.DEFAULT_PRUNE_MARGIN):
     """
     Perform a detailed chi-squared analysis of the given text with all possible keys generated.
     This method assesses how closely the decoded text for each key matches the expected frequency distributions.
 
     Args:
-        text (str): The ciphertext to be analyzed.
+        text (str or CodedText): The ciphertext to be analyzed.
         all_possible_keys (list): List of all possible decryption keys.
-        exp_letter (dict), exp_bi (dict), exp_tri (dict): Expected frequency distributions for letters, bigrams, and trigrams.
+        exp_letter (dict), exp_bi (dict), exp_tri (dict): Expected frequency distributions for letters, bigrams, and trigrams,
+            as dicts or dense arrays (see util.dense_frequencies). None uses the table of the selected model,
+            whose expected counts are cached per text length (see frequency_data.expected_counts).
         update_status_callback (function): Callback to update status in the UI.
+        rank_by (str): 'trigram' to rank by the trigram chi-squared score, or 'quadgram' to rank by
+            quadgram log-likelihood fitness (see analysis.fitness), which is more reliable on short texts.
+        workers (int): The number of processes used to score the keys (see score_keys_parallel).
+        top_k (int): If given, only the best top_k results are returned (and decoded).
+        prefix_lengths (tuple): If given together with top_k, candidates are first scored on these prefixes
+            of the text and only those close to the current top_k reach full-text scoring
+            (see pruning.prune_by_prefix).
+        prune_margin (float): How far behind the top_k-th best prefix score a candidate may be and survive.
 
     Returns:
-        list: A sorted list containing tuples of (key, chi-squared scores, decoded text) ranked by chi-squared values.
+        list: A sorted list containing tuples of (key, chi-squared scores, decoded text, quadgram fitness) ranked by
+        the chosen score. The fitness is None unless ranking by quadgrams.
     """
+    if rank_by not in ('trigram', 'quadgram'):
+        raise ValueError(f"Unknown ranking: {rank_by}")
+    text = as_coded(text)  # Normalize once so each candidate decode works on the letter codes
+    text_length = len(text)
+    if not text_length:
+        return []  # No letters, so no key scores better than another
+    keys = list(all_possible_keys)
+    unique_keys = list(dict.fromkeys(keys))
+    given = {1: exp_letter, 2: exp_bi, 3: exp_tri}
+    tables = [frequency_data.dense_table(n) if given[n] is None else given[n] for n in (1, 2, 3)]
+
+    def expected_counts(length):
+        # Expected counts for a text length, shared by every candidate
+        return {n: frequency_data.expected_counts(n, length) if given[n] is None
+                else util.expected_count_vector(given[n], n, length) for n in (1, 2, 3)}
+
+    def compute(new_keys):
+        expected = expected_counts(text_length)
+        # Score candidates in batches, sized so the decoded rows and the trigram histograms stay bounded
+        batch_size = max(1, SCORING_BATCH_CELLS // max(text_length, 26 ** 3))
+        remaining_keys = new_keys
+
+        if prefix_lengths and top_k:
+            def score_prefix(prefix_keys, prefix_length):
+                prefix = text[:prefix_length]
+                prefix_expected = expected_counts(prefix_length)
+                prefix_batch_size = max(1, SCORING_BATCH_CELLS // max(prefix_length, 26 ** 3))
+                return [rank_value(score, rank_by)
+                        for start in range(0, len(prefix_keys), prefix_batch_size)
+                        for score in score_key_batch(prefix, prefix_keys[start:start + prefix_batch_size],
+                                                     prefix_expected, rank_by)]
+
+            remaining_keys, stats = pruning.prune_by_prefix(new_keys, score_prefix, top_k, text_length,
+                                                            prefix_lengths, prune_margin)
+            update_status_callback(f"Pruning: {pruning.format_stats(stats)}, {len(remaining_keys)} of "
+                                   f"{len(new_keys)} keys left")
+
+        total_keys = len(remaining_keys)  # Total number of keys to analyze
+        if workers > 1 and total_keys > batch_size:
+            new_scores = score_keys_parallel(text, remaining_keys, expected, rank_by, workers, batch_size, top_k,
+                                             update_status_callback)
+        else:
+            new_scores = {}
+            for start in range(0, total_keys, batch_size):
+                batch_keys = remaining_keys[start:start + batch_size]
+                update_status_callback(f"Decoding: {start + len(batch_keys)} of {total_keys}")  # Update the UI with progress
+                new_scores.update(zip(batch_keys, score_key_batch(text, batch_keys, expected, rank_by)))
+        return new_scores
+
+    # Scores are cached per candidate, keyed on the text, the key and the contents of the tables the scores
+    # were computed with, so a re-run with more candidates only scores the new ones and edited or rebuilt
+    # tables never return stale scores. Decoded texts are cheap to re-derive and would make the cache size
+    # depend on the text length.
+    base_key = (text_digest(text), 'candidate', rank_by, tables_digest(tables, rank_by), models.get_model_dir())
+    settings = (top_k, tuple(prefix_lengths) if prefix_lengths and top_k else None, prune_margin)
+    key_set = set(unique_keys)
+    subsets = {}
+
+    def still_pruned(marker):
+        # A candidate that lost against a subset of these candidates, with the same settings, loses again
+        if marker.settings != settings:
+            return False
+        if id(marker.candidates) not in subsets:
+            subsets[id(marker.candidates)] = marker.candidates <= key_set
+        return subsets[id(marker.candidates)]
+
+    known = {}
+    for key in unique_keys:
+        value = analysis_cache.get(base_key + (key,))
+        if value is not None and (not isinstance(value, PrunedCandidate) or still_pruned(value)):
+            known[key] = value
+    new_keys = [key for key in unique_keys if key not in known]
+    if new_keys:
+        update_status_callback(f"Scoring {len(new_keys)} of {len(unique_keys)} keys, the rest are cached")
+        new_scores = compute(new_keys)
+        dropped = PrunedCandidate(settings, frozenset(new_keys))
+        for key in new_keys:
+            known[key] = new_scores.get(key, dropped)
+            analysis_cache.put(base_key + (key,), known[key])
+
+    # One row of scores per candidate. Candidates pruned on a prefix or dropped from a worker's local top-K
+    # can never reach the top_k results and keep a row of NaN.
+    scores = np.full((len(keys), 4), np.nan)
+    for row, key in enumerate(keys):
+        if not isinstance(known[key], PrunedCandidate):
+            scores[row] = [np.nan if value is None else value for value in known[key]]
+
+    # Sort by quadgram fitness, highest (most English-like) first, or by the chi-squared score for trigrams,
+    # which generally gives a good measure of text structure
+    values = -scores[:, 3] if rank_by == 'quadgram' else scores[:, 2]
+    ranked = [row for row in np.argsort(values, kind='stable') if not np.isnan(values[row])]
+    if top_k is not None:
+        ranked = ranked[:top_k]
+
+    # Store the results along with the key and decoded text
     results = []
-    total_keys = len(all_possible_keys)  # Total number of keys to analyze
-
-    for count, key in enumerate(all_possible_keys, start=1):
-        update_status_callback(f"Decoding: {count} of {total_keys}")  # Update the UI with progress
-        decoded_text = decode(text, key,
-                              lambda x: None)  # Decode the text using the current key without updating the terminal
-        # Generate frequency data for the decoded text
-        letter_freqs, bigram_freqs, trigram_freqs = util.generate_frequency_data(decoded_text)
-
-        # Calculate chi-squared values for letters, bigrams, and trigrams
-        chi_letter = util.compute_chi_squared(letter_freqs, exp_letter, len(decoded_text))
-        chi_bi = util.compute_chi_squared(bigram_freqs, exp_bi, len(decoded_text))
-        chi_tri = util.compute_chi_squared(trigram_freqs, exp_tri, len(decoded_text))
-
-        # Store the results along with the key and decoded text
-        results.append((key, chi_letter, chi_bi, chi_tri, decoded_text))
-
-    # Sort the results by the chi-squared score for trigrams, which generally gives a good measure of text structure
-    results.sort(key=lambda x: x[3])
-    return results  # Return the sorted results
+    for row in ranked:
+        chi_letter, chi_bi, chi_tri, quadgram_fitness = scores[row].tolist()
+        results.append((keys[row], chi_letter, chi_bi, chi_tri, decode(text, keys[row], lambda x: None),
+                        quadgram_fitness if rank_by == 'quadgram' else None))
+    return results
 
 
 def display_vigenere_decryption_table(ciphertext, decrypted_text, key, update_terminal_callback):
@@ -217,8 +680,8 @@ def display_vigenere_decryption_table(ciphertext, decrypted_text, key, update_te
     Display a detailed table showing the decryption process using a specific key, character by character.
 
     Args:
-        ciphertext (str): The original encrypted text.
-        decrypted_text (str): The decrypted text based on the chosen key.
+        ciphertext (str or CodedText): The original encrypted text.
+        decrypted_text (str or CodedText): The decrypted text based on the chosen key.
         key (str): The decryption key used.
         update_terminal_callback (function): Callback to update the terminal with the decryption table.
 
@@ -251,7 +714,7 @@ def finalize_cryptanalysis(ciphertext, results, update_terminal_callback):
     Finalize the cryptanalysis process by displaying the results for the best decryption keys.
 
     Args:
-        ciphertext (str): The original encrypted text.
+        ciphertext (str or CodedText): The original encrypted text.
         results (list): Sorted list of analysis results, including keys and their respective chi-squared scores.
         update_terminal_callback (function): Callback to display the final cryptanalysis results.
 
@@ -260,10 +723,96 @@ def finalize_cryptanalysis(ciphertext, results, update_terminal_callback):
     output_str = "Top 3 guesses based on Chi-Squared Letters Score:\n"
     # Iterate over the top three results (or fewer if less available)
     for i in range(min(3, len(results))):
-        key, chi_letter, chi_bi, chi_tri, decoded_text = results[i]
+        key, chi_letter, chi_bi, chi_tri, decoded_text = results[i][:5]
         display_vigenere_decryption_table(ciphertext, decoded_text[:len(key) + 0], key,
                                           update_terminal_callback)  # Display the decryption table for each key
         # Append the results to the output string for display
-        output_str += f"\nKey: {key}\nChi-Squared Score: {chi_letter}\nDecoded Text Preview: {decoded_text[:100]}...\n"
+        output_str += f"\nKey: {key}\nChi-Squared Score: {chi_letter}\nDecoded Text Preview: {decoded_text[:100].to_text()}...\n"
 
     return output_str  # Return the formatted output string with the top guesses
+
+
+# --------------------------------------------------------------------------------
+# BATCH CRACKING
+# --------------------------------------------------------------------------------
+def _column_letter_counts(codes, message_ids, positions, period, count):
+    # Letter histogram of every (message, column) pair for one key length, from a single bincount
+    columns = message_ids * period + positions % period
+    return np.bincount(columns * 26 + codes, minlength=count * period * 26).reshape(count, period, 26)
+
+
+def batch_result_dtype(max_key_length):
+    """Returns the structured dtype of crack_batch results for keys up to max_key_length letters."""
+    return np.dtype([('key', f'U{max_key_length}'), ('key_length', np.int32), ('score', np.float64),
+                     ('ic', np.float64), ('length', np.int64)])
+
+
+def crack_batch(messages, max_key_length, exp_letter=None):
+    """
+    Estimate the key length and the key of many independent Vigenère messages at once.
+
+    Args:
+        messages (list or tuple): The ciphertexts, as a list of str or CodedText or as a (codes, offsets)
+            ragged array from coded_text.pack_texts.
+        max_key_length (int): The longest key length to consider.
+        exp_letter (dict or np.ndarray): Expected letter frequencies as percentages. Defaults to the letter
+            table of the selected model (see frequency_data.dense_table).
+
+    Returns:
+        np.ndarray: A structured array with one row per message (see batch_result_dtype): the key, its
+        length, the normalized Chi-Squared letter score of the decrypted message (lower is better), the
+        pooled column IC at that key length and the number of letters.
+
+    Work is done per key length, never per message. For each length one bincount gives the letter counts
+    of every column of every message, from which the pooled column IC of all messages follows. Each message
+    takes the shortest length whose IC is English-like enough (BATCH_PERIOD_CONFIDENCE), or else the one with
+    the highest IC, and the best shift of every column is then chosen by the letter Chi-Squared score, as in
+    column_shift_scores.
+    """
+    exp_letter = frequency_data.dense_table(1) if exp_letter is None else exp_letter
+    codes, offsets = as_packed(messages)
+    count = len(offsets) - 1
+    lengths = np.diff(offsets)
+    message_ids = np.repeat(np.arange(count), lengths)
+    positions = np.arange(len(codes)) - offsets[:-1][message_ids]
+
+    # Pooled column IC of every message at every key length
+    column_ic = np.full((count, max_key_length), -np.inf)
+    for period in range(1, max_key_length + 1):
+        letter_counts = _column_letter_counts(codes, message_ids, positions, period, count).astype(np.int64)
+        column_lengths = letter_counts.sum(axis=2)
+        coincidences = (letter_counts * (letter_counts - 1)).sum(axis=(1, 2))
+        pairs = (column_lengths * (column_lengths - 1)).sum(axis=1)
+        usable = (lengths >= BATCH_MIN_COLUMN_LETTERS * period) | (period == 1)
+        column_ic[usable, period - 1] = coincidences[usable] / np.maximum(pairs[usable], 1)
+
+    confidence = (column_ic - periodicity.RANDOM_IC) / (periodicity.ENGLISH_IC - periodicity.RANDOM_IC)
+    confident = confidence >= BATCH_PERIOD_CONFIDENCE
+    key_lengths = np.where(confident.any(axis=1), confident.argmax(axis=1), column_ic.argmax(axis=1)) + 1
+
+    results = np.zeros(count, dtype=batch_result_dtype(max_key_length))
+    results['key_length'] = key_lengths
+    results['ic'] = np.maximum(column_ic[np.arange(count), key_lengths - 1], 0)
+    results['length'] = lengths
+    key_codes = np.zeros((count, max_key_length), dtype=np.uint8)
+
+    # Score the columns of each group of messages that share a key length
+    for period in np.unique(key_lengths):
+        group = np.flatnonzero(key_lengths == period)
+        in_group = np.zeros(count, dtype=bool)
+        in_group[group] = True
+        letters = in_group[message_ids]
+        group_ids = np.searchsorted(group, message_ids[letters])
+        letter_counts = _column_letter_counts(codes[letters], group_ids, positions[letters], period, len(group))
+        shift_scores = util.shift_chi_squared_matrix(letter_counts.reshape(-1, 26), exp_letter)
+        shifts = shift_scores.argmin(axis=1).reshape(len(group), period)
+
+        # The decrypted letter histogram is the sum of every column's histogram rotated by its shift
+        rotation = (np.arange(26)[None, None, :] + shifts[:, :, None]) % 26
+        decoded_counts = np.take_along_axis(letter_counts, rotation, axis=2).sum(axis=1)
+        results['score'][group] = util.shift_chi_squared_matrix(decoded_counts, exp_letter)[:, 0]
+        key_codes[group, :period] = shifts + 65
+
+    # Turn the NUL-padded ASCII key rows into strings without a Python loop
+    results['key'] = key_codes.view(f'S{max_key_length}').ravel().astype(f'U{max_key_length}')
+    return results
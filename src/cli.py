@@ -0,0 +1,257 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+# Only the cipher and analysis modules are imported, never the GUI, so this runs where tkinter is unavailable
+from analysis import utility as util
+from analysis.coded_text import CodedText
+from analysis.ingest import ingest_file
+from ciphers import caesar, hill, vigenere
+
+CIPHERS = ('caesar', 'vigenere', 'hill')
+COMMANDS = ('encode', 'decode', 'cryptanalyse')
+STDIN_NAME = '-'
+
+
+def _quiet(message):
+    # Callback for the cipher functions' progress messages, which have no place in JSON output
+    pass
+
+
+# --------------------------------------------------------------------------------
+# KEY PARSING
+# --------------------------------------------------------------------------------
+def parse_key(cipher, key):
+    """
+    Converts a key given on the command line to the form the cipher functions expect.
+
+    Args:
+        cipher (str): 'caesar', 'vigenere' or 'hill'.
+        key (str): The key text: a shift, a keyword, or the Hill matrix entries row by row ("3 3 2 5").
+
+    Returns:
+        int, str or np.ndarray: The parsed key.
+
+    Raises:
+        ValueError: If the key is missing or not valid for the cipher.
+    """
+    if key is None:
+        raise ValueError(f"A key is required to encode or decode with the {cipher} cipher.")
+    if cipher == 'caesar':
+        return int(key) % 26
+    if cipher == 'vigenere':
+        if not key.isalpha():
+            raise ValueError("A Vigenère key must contain letters only.")
+        return key.upper()
+    valid, key_matrix = util.validate_and_convert_hill_key(key)
+    if not valid:
+        raise ValueError("A Hill key must be a square matrix that is invertible modulo 26.")
+    return key_matrix
+
+
+def _key_to_json(key):
+    # Keys are ints, strings or matrices; JSON has no arrays of NumPy integers
+    if isinstance(key, np.ndarray):
+        return key.tolist()
+    if isinstance(key, np.integer):
+        return int(key)
+    return key
+
+
+# --------------------------------------------------------------------------------
+# JOBS
+# --------------------------------------------------------------------------------
+def run_cipher(command, cipher, text, options):
+    """
+    Runs one command on one text.
+
+    Args:
+        command (str): 'encode', 'decode' or 'cryptanalyse'.
+        cipher (str): 'caesar', 'vigenere' or 'hill'.
+        text (CodedText): The normalized input text.
+        options (dict): The parsed key ('key') and the cryptanalysis settings ('max_key_length', 'key_size',
+            'crib', 'key_sizes').
+
+    Returns:
+        dict: The fields of the output record: the key and the resulting text, plus the score of the key
+        found when cryptanalysing.
+    """
+    if command in ('encode', 'decode'):
+        function = getattr({'caesar': caesar, 'vigenere': vigenere, 'hill': hill}[cipher], command)
+        return {'key': _key_to_json(options['key']), 'text': function(text, options['key'], _quiet).to_text()}
+
+    if cipher == 'caesar':
+        result = caesar.crack_batch([text])[0]
+        key = int(result['shift'])
+        return {'key': key, 'score': float(result['score']), 'text': caesar.decode(text, key, _quiet).to_text()}
+    if cipher == 'vigenere':
+        result = vigenere.crack_batch([text], options['max_key_length'])[0]
+        key = str(result['key'])
+        return {'key': key, 'score': float(result['score']),
+                'text': vigenere.decode(text, key, _quiet).to_text()}
+
+    if options.get('crib'):
+        found = hill.crib_search(options['crib'], text, options['key_sizes'], top_keys=1)
+        if not found:
+            raise ValueError("The crib does not give a valid Hill key at any position.")
+        _, start_index, key_matrix, score = found[0]
+        record = {'crib_index': start_index}
+    else:
+        codes = text.codes.astype(np.int64)
+        rows, _ = hill.search_decryption_rows(codes, options['key_size'], workers=1)
+        found = hill.combine_rows(codes, rows, options['key_size'], top_keys=1)
+        if not found:
+            raise ValueError("No invertible Hill key was found.")
+        key_matrix, _, score = found[0]
+        record = {}
+    record.update({'key': key_matrix.tolist(), 'score': float(score),
+                   'text': hill.decode(text, key_matrix, _quiet).to_text()})
+    return record
+
+
+def process_file(command, cipher, path, options):
+    """
+    Reads one input file and runs the command on it, turning any failure into an error record.
+
+    Args:
+        command (str): The command.
+        cipher (str): The cipher.
+        path (str): The input file.
+        options (dict): See run_cipher.
+
+    Returns:
+        dict: One output record, with 'input', 'cipher' and 'command' and either the results or 'error'.
+    """
+    record = {'input': path, 'cipher': cipher, 'command': command}
+    try:
+        # ingest_file reports a missing file on stdout, which would corrupt the records
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"File not found: {path}")
+        text = ingest_file(path, use_cache=False)
+        record.update(run_cipher(command, cipher, text, options))
+    except Exception as error:
+        record['error'] = f"{type(error).__name__}: {error}"
+    return record
+
+
+def expand_inputs(inputs):
+    """
+    Expands the input arguments into the list of files to process.
+
+    Args:
+        inputs (list): Files, directories (searched recursively, in sorted order) or '-' for standard input.
+
+    Returns:
+        list: The file paths, with '-' kept in place for standard input.
+    """
+    paths = []
+    for item in inputs or [STDIN_NAME]:
+        if item != STDIN_NAME and os.path.isdir(item):
+            for directory, subdirectories, files in os.walk(item):
+                subdirectories.sort()
+                paths.extend(os.path.join(directory, name) for name in sorted(files))
+        else:
+            paths.append(item)
+    return paths
+
+
+def iter_records(command, cipher, paths, options, workers=1):
+    """
+    Runs the command on every input and yields each record as soon as its job finishes.
+
+    Args:
+        command (str): The command.
+        cipher (str): The cipher.
+        paths (list): Input files, '-' reading standard input in this process.
+        options (dict): See run_cipher.
+        workers (int): The number of worker processes for the files. 1 runs everything in this process.
+
+    Yields:
+        dict: One record per input. With several workers records come in completion order, not input order.
+    """
+    files = [path for path in paths if path != STDIN_NAME]
+    if STDIN_NAME in paths:
+        record = {'input': STDIN_NAME, 'cipher': cipher, 'command': command}
+        try:
+            record.update(run_cipher(command, cipher, CodedText.from_text(sys.stdin.read()), options))
+        except Exception as error:
+            record['error'] = f"{type(error).__name__}: {error}"
+        yield record
+
+    if workers <= 1 or len(files) <= 1:
+        for path in files:
+            yield process_file(command, cipher, path, options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(process_file, command, cipher, path, options) for path in files]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+# --------------------------------------------------------------------------------
+# COMMAND LINE
+# --------------------------------------------------------------------------------
+def build_parser():
+    """Returns the argument parser of the command line interface."""
+    parser = argparse.ArgumentParser(
+        description="Encode, decode and cryptanalyse Caesar, Vigenère and Hill ciphers without the GUI. "
+                    "Writes one JSON record per input (JSON Lines) as each input finishes.")
+    parser.add_argument('command', choices=COMMANDS)
+    parser.add_argument('cipher', choices=CIPHERS)
+    parser.add_argument('inputs', nargs='*',
+                        help="Input files or directories; '-' or no input reads standard input.")
+    parser.add_argument('-k', '--key', help="Caesar shift, Vigenère keyword, or Hill matrix entries row by row.")
+    parser.add_argument('-o', '--output', help="Write the records to this file instead of standard output.")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for the input files (default: one per CPU).")
+    parser.add_argument('--max-key-length', type=int, default=12,
+                        help="Longest Vigenère key length to consider when cryptanalysing.")
+    parser.add_argument('--key-size', type=int, default=2,
+                        help="Hill key size for ciphertext-only cryptanalysis.")
+    parser.add_argument('--crib', help="Known Hill plaintext at an unknown position, for a crib search.")
+    parser.add_argument('--key-sizes', type=int, nargs='+', default=[2, 3, 4],
+                        help="Hill key sizes tried by the crib search.")
+    return parser
+
+
+def main(argv=None):
+    """
+    Runs the command line interface.
+
+    Args:
+        argv (list): The arguments, without the program name. None reads them from sys.argv.
+
+    Returns:
+        int: The exit status: 0 if every input succeeded, 1 if any record has an error, 2 for bad arguments.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    options = {'max_key_length': args.max_key_length, 'key_size': args.key_size, 'crib': args.crib,
+               'key_sizes': args.key_sizes}
+    if args.command != 'cryptanalyse':
+        try:
+            options['key'] = parse_key(args.cipher, args.key)
+        except ValueError as error:
+            parser.error(str(error))
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    failed = False
+    try:
+        for record in iter_records(args.command, args.cipher, expand_inputs(args.inputs), options, args.workers):
+            failed |= 'error' in record
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
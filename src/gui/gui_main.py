@@ -4,8 +4,7 @@ from tkinter import filedialog
 
 # Import cipher functions and analysis utilities
 import analysis.utility as util
-from analysis.frequency_data import letter_frequencies as exp_letter, bigram_frequencies as exp_bi, \
-    trigram_frequencies as exp_tri
+from analysis import frequency_data
 from ciphers.caesar import encode as encode_caesar, decode as decode_caesar, chi_cryptanalysis as cryptanalyse_caesar
 from ciphers.hill import (encode as encode_hill, decode as decode_hill, cryptanalyse as cryptanalyse_hill, \
                           generate_key as generate_hill, extract_and_trim as extract_known)
@@ -107,7 +106,8 @@ def perform_operation():
         start_operation_in_thread(operations[cipher][1], update_output_text, text, key, update_terminal)
     elif operation == 'Cryptanalyse':
         if cipher == 'Caesar':
-            start_operation_in_thread(operations[cipher][2], update_output_text, text, exp_letter, exp_bi, exp_tri)
+            start_operation_in_thread(operations[cipher][2], update_output_text, text,
+                                      *frequency_data.dense_tables())
         elif cipher == 'Vigenere':
             # Validate and retrieve additional inputs for Vigenere cipher cryptanalysis
             try:
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The application modules import each other as top-level packages (e.g. "from analysis import utility"),
+# so every test imports them the same way ("from ciphers import vigenere", never "src.ciphers"), which loads
+# each module once. The repository root is on the path too, for the benchmarks package.
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT_DIR, 'src'), ROOT_DIR]
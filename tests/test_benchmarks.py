@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from benchmarks import run_benchmarks
+
+
+class TestBenchmarkRunner(unittest.TestCase):
+    def test_sizes_and_texts(self):
+        """
+        Test size parsing and that both text sources give exactly the requested number of letters.
+        """
+        self.assertEqual([run_benchmarks.parse_size(size) for size in ('1K', '100MB', '4096')],
+                         [1024, 100 << 20, 4096])
+        for source in run_benchmarks.SOURCES:
+            self.assertEqual(len(run_benchmarks.make_text(source, 5000)), 5000)
+        self.assertEqual(run_benchmarks.make_text('synthetic', 100), run_benchmarks.make_text('synthetic', 100))
+
+    def test_regressions_are_detected_against_history(self):
+        """
+        Test that a run is recorded in the history and that only slow-downs beyond the threshold fail.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            history = os.path.join(directory, 'history.json')
+            arguments = ['--sizes', '1K', '--sources', 'hobbit', '--filter', 'caesar.decode', '--repeat', '1',
+                         '--history', history]
+            self.assertEqual(run_benchmarks.main(arguments), 0)
+            runs = run_benchmarks.load_history(history)
+            self.assertEqual(len(runs), 1)
+            self.assertEqual(runs[0]['results'][0]['case'], 'caesar.decode')
+
+            result = dict(runs[0]['results'][0])
+            result['seconds'] *= 1.2
+            self.assertEqual(run_benchmarks.find_regressions([result], runs, threshold=0.25), [])
+            result['seconds'] *= 2
+            self.assertEqual(len(run_benchmarks.find_regressions([result], runs, threshold=0.25)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import tempfile
+import unittest
+
+from analysis import fitness, frequency_data, models
+from analysis.cache import StageCache
+from analysis.coded_text import as_coded
+from analysis.model_builder import build_models
+from ciphers import vigenere
+
+
+class TestStageCache(unittest.TestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        """
+        Test that the cache evicts the least recently used entry and counts hits, misses and evictions.
+        """
+        cache = StageCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)  # 'a' is now the most recently used
+        cache.put('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'evictions': 1, 'entries': 2, 'max_entries': 2})
+
+    def test_get_or_compute_only_computes_once(self):
+        """
+        Test that a cached stage is computed once and then served from the cache.
+        """
+        cache = StageCache()
+        calls = []
+        for _ in range(3):
+            self.assertEqual(cache.get_or_compute(('digest', 'ic', 5), lambda: calls.append(1) or 0.07), 0.07)
+        self.assertEqual(len(calls), 1)
+
+
+class TestVigenereCache(unittest.TestCase):
+    def setUp(self):
+        vigenere.clear_cache()
+        plain = ("In a hole in the ground there lived a hobbit. Not a nasty, dirty, wet hole, filled with the ends "
+                 "of worms and an oozy smell, nor yet a dry, bare, sandy hole with nothing in it to sit down on")
+        self.cipher_text = vigenere.encode(plain, "LEMON", lambda x: None)
+
+    def test_rerun_with_larger_parameters_reuses_earlier_stages(self):
+        """
+        Test that re-running with a larger max key length, shift guess or key guess only computes the new
+        key lengths and candidate keys.
+        """
+        quiet = lambda x: None
+        first = vigenere.cryptanalyse(self.cipher_text, 6, 2, 1, quiet, None, quiet)
+        misses = vigenere.cache_stats()['misses']
+        second = vigenere.cryptanalyse(self.cipher_text, 6, 2, 1, quiet, None, quiet)
+        self.assertEqual(first, second)
+        self.assertEqual(vigenere.cache_stats()['misses'], misses)
+
+        vigenere.cryptanalyse(self.cipher_text, 8, 2, 1, quiet, None, quiet)
+        self.assertGreater(vigenere.cache_stats()['hits'], 0)
+        self.assertLessEqual(vigenere.cache_stats()['misses'] - misses, 4)
+
+        # Each run hits the coincidence and Kasiski stages, the shift scores of every key length already seen
+        # and the keys already scored, and misses only the new key lengths and keys
+        key_count = self.count_keys(8, 2, 1)
+        for key_guess, shift_guess, new_lengths in ((2, 2, 0), (3, 2, 1)):
+            before = vigenere.cache_stats()
+            new_key_count = self.count_keys(8, key_guess, shift_guess)
+            after = vigenere.cache_stats()
+            self.assertGreater(new_key_count, key_count)
+            self.assertEqual(after['hits'] - before['hits'], 2 + key_guess - new_lengths + key_count)
+            self.assertEqual(after['misses'] - before['misses'], new_lengths + new_key_count - key_count)
+            key_count = new_key_count
+
+    def count_keys(self, max_key_length, key_guess, shift_guess):
+        # Runs the cryptanalysis and returns the number of candidate keys it generated
+        messages = []
+        vigenere.cryptanalyse(self.cipher_text, max_key_length, key_guess, shift_guess, messages.append, None,
+                              lambda x: None)
+        return next(int(message.split()[1]) for message in messages if message.endswith(" keys!"))
+
+    def test_candidate_scores_are_cached_per_key(self):
+        """
+        Test that the score of every candidate, pruned candidates included, is stored and reused as its own
+        entry, and that a smaller candidate set ranks the same with cached entries as without.
+        """
+        quiet = lambda x: None
+        shift_scores = vigenere.column_shift_scores(as_coded(self.cipher_text), 5)
+        keys = [key for key, _ in vigenere.best_first_keys(shift_scores, 8, budget=10000)]
+        tables = frequency_data.dense_tables()
+        for prefix_lengths in (None, (40, 80)):
+            vigenere.clear_cache()
+            smaller = vigenere.vigenere_chi_cryptanalysis(self.cipher_text, keys[:100], *tables, quiet, top_k=3,
+                                                          prefix_lengths=prefix_lengths)
+            vigenere.clear_cache()
+            first = vigenere.vigenere_chi_cryptanalysis(self.cipher_text, keys, *tables, quiet, top_k=3,
+                                                        prefix_lengths=prefix_lengths)
+            self.assertEqual(vigenere.cache_stats()['entries'], len(keys))
+            second = vigenere.vigenere_chi_cryptanalysis(self.cipher_text, keys, *tables, quiet, top_k=3,
+                                                         prefix_lengths=prefix_lengths)
+            self.assertEqual(first, second)
+            self.assertEqual({name: vigenere.cache_stats()[name] for name in ('hits', 'misses', 'entries')},
+                             {'hits': len(keys), 'misses': len(keys), 'entries': len(keys)})
+
+            # Candidates dropped against keys outside the smaller set are scored again
+            self.assertEqual(vigenere.vigenere_chi_cryptanalysis(self.cipher_text, keys[:100], *tables, quiet,
+                                                                 top_k=3, prefix_lengths=prefix_lengths), smaller)
+
+    def test_larger_shift_guess_only_scores_new_keys(self):
+        """
+        Test that raising the shift guess serves the keys of the earlier run from the cache and only scores
+        the new ones.
+        """
+        quiet = lambda x: None
+        shift_scores = vigenere.column_shift_scores(as_coded(self.cipher_text), 5)
+        fewer = [key for key, _ in vigenere.best_first_keys(shift_scores, 2, budget=10000)]
+        more = [key for key, _ in vigenere.best_first_keys(shift_scores, 3, budget=10000)]
+        self.assertTrue(set(fewer) < set(more))
+        tables = frequency_data.dense_tables()
+        expected = vigenere.vigenere_chi_cryptanalysis(self.cipher_text, more, *tables, quiet, top_k=3)
+
+        vigenere.clear_cache()
+        vigenere.vigenere_chi_cryptanalysis(self.cipher_text, fewer, *tables, quiet, top_k=3)
+        before = vigenere.cache_stats()
+        self.assertEqual(vigenere.vigenere_chi_cryptanalysis(self.cipher_text, more, *tables, quiet, top_k=3),
+                         expected)
+        after = vigenere.cache_stats()
+        self.assertEqual(after['hits'] - before['hits'], len(fewer))
+        self.assertEqual(after['misses'] - before['misses'], len(more) - len(fewer))
+
+    def test_changed_table_is_not_served_from_the_cache(self):
+        """
+        Test that switching to a model with other tables between two runs changes the scores instead of
+        reusing cached ones.
+        """
+        quiet = lambda x: None
+        first = vigenere.cryptanalyse(self.cipher_text, 6, 2, 1, quiet, None, quiet)
+        with tempfile.TemporaryDirectory() as model_dir:
+            build_models([fitness.DEFAULT_CORPUS], model_dir, max_order=3, workers=1)
+            models.set_model_dir(model_dir)
+            try:
+                second = vigenere.cryptanalyse(self.cipher_text, 6, 2, 1, quiet, None, quiet)
+            finally:
+                models.set_model_dir(None)
+        self.assertNotEqual(first, second)
+        self.assertEqual(vigenere.cryptanalyse(self.cipher_text, 6, 2, 1, quiet, None, quiet), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
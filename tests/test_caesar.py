@@ -1,13 +1,19 @@
 import unittest
 from unittest.mock import patch
 
+import numpy as np
+
 # Adjusted imports for the project structure
-from src.ciphers.caesar import encode, decode
+from ciphers.caesar import encode, decode, shift_chi_scores, shift_quadgram_scores, chi_cryptanalysis, \
+    crack_batch
+from analysis import fitness
+from analysis.coded_text import as_coded
+from analysis.frequency_data import letter_frequencies, bigram_frequencies, trigram_frequencies
 
 
 class TestCipherMethods(unittest.TestCase):
-    # @patch('src.analysis.utility.prepare_text', return_value="HELLOWORLD")
-    @patch('src.gui.gui_main.update_terminal')
+    # @patch('analysis.utility.prepare_text', return_value="HELLOWORLD")
+    @patch('gui.gui_main.update_terminal')
     def test_encode_basic(self, mock_update_terminal):
         """
         Test the encode function with a basic example.
@@ -15,8 +21,8 @@ class TestCipherMethods(unittest.TestCase):
         result = encode("hello world", 3, lambda x: x)
         self.assertEqual(result, "KHOORZRUOG")
 
-    # @patch('src.analysis.utility.prepare_text', return_value="HELLOWORLD")
-    @patch('src.gui.gui_main.update_terminal')
+    # @patch('analysis.utility.prepare_text', return_value="HELLOWORLD")
+    @patch('gui.gui_main.update_terminal')
     def test_decode_basic(self, mock_update_terminal):
         """
         Test the decode function with a basic example.
@@ -24,8 +30,8 @@ class TestCipherMethods(unittest.TestCase):
         result = decode("khoor zruog", 3, lambda x: x)
         self.assertEqual(result, "HELLOWORLD")
 
-    # @patch('src.analysis.utility.prepare_text', return_value="HELLOWORLD")
-    @patch('src.gui.gui_main.update_terminal')
+    # @patch('analysis.utility.prepare_text', return_value="HELLOWORLD")
+    @patch('gui.gui_main.update_terminal')
     def test_encode_with_special_chars(self, mock_update_terminal):
         """
         Test the encode function to ensure it properly handles texts with special characters.
@@ -33,8 +39,8 @@ class TestCipherMethods(unittest.TestCase):
         result = encode("hello@world!", 3, lambda x: x)
         self.assertEqual(result, "KHOORZRUOG")
 
-    # @patch('src.analysis.utility.prepare_text', return_value="HELLOWORLD")
-    @patch('src.gui.gui_main.update_terminal')
+    # @patch('analysis.utility.prepare_text', return_value="HELLOWORLD")
+    @patch('gui.gui_main.update_terminal')
     def test_decode_with_flag(self, mock_update_terminal):
         """
         Test the decode function with the flag parameter set to True to ensure the callback is used.
@@ -48,7 +54,7 @@ class TestCipherMethods(unittest.TestCase):
         # Assert that the callback was called
         mock_update_terminal.assert_called()
 
-    @patch('src.gui.gui_main.update_terminal')
+    @patch('gui.gui_main.update_terminal')
     def test_encode_zero_key(self, mock_update_terminal):
         """
         Test encoding with a key of 0, expecting no change to the input text.
@@ -56,7 +62,7 @@ class TestCipherMethods(unittest.TestCase):
         result = encode("hello world", 0, lambda x: x)
         self.assertEqual(result, "HELLOWORLD")
 
-    @patch('src.gui.gui_main.update_terminal')
+    @patch('gui.gui_main.update_terminal')
     def test_decode_zero_key(self, mock_update_terminal):
         """
         Test decoding with a key of 0, expecting no change to the input text.
@@ -64,7 +70,7 @@ class TestCipherMethods(unittest.TestCase):
         result = decode("hello world", 0, lambda x: x)
         self.assertEqual(result, "HELLOWORLD")
 
-    @patch('src.gui.gui_main.update_terminal')
+    @patch('gui.gui_main.update_terminal')
     def test_encode_negative_key(self, mock_update_terminal):
         """
         Test encoding with a negative key.
@@ -73,7 +79,7 @@ class TestCipherMethods(unittest.TestCase):
         # Assuming your cipher correctly handles negative shifts:
         self.assertEqual(result, "EBIILTLOIA")
 
-    @patch('src.gui.gui_main.update_terminal')
+    @patch('gui.gui_main.update_terminal')
     def test_decode_large_key(self, mock_update_terminal):
         """
         Test decoding with a key larger than 26.
@@ -81,7 +87,7 @@ class TestCipherMethods(unittest.TestCase):
         result = decode("khoor zruog", 29, lambda x: x)  # 29 % 26 is effectively 3
         self.assertEqual(result, "HELLOWORLD")
 
-    @patch('src.gui.gui_main.update_terminal')
+    @patch('gui.gui_main.update_terminal')
     def test_encode_empty_string(self, mock_update_terminal):
         """
         Test encoding an empty string.
@@ -89,7 +95,7 @@ class TestCipherMethods(unittest.TestCase):
         result = encode("", 3, lambda x: x)
         self.assertEqual(result, "")
 
-    @patch('src.gui.gui_main.update_terminal')
+    @patch('gui.gui_main.update_terminal')
     def test_decode_empty_string(self, mock_update_terminal):
         """
         Test decoding an empty string.
@@ -97,7 +103,7 @@ class TestCipherMethods(unittest.TestCase):
         result = decode("", 3, lambda x: x)
         self.assertEqual(result, "")
 
-    @patch('src.gui.gui_main.update_terminal')
+    @patch('gui.gui_main.update_terminal')
     def test_encode_non_english_chars(self, mock_update_terminal):
         """
         Test encoding with non-English characters.
@@ -106,6 +112,61 @@ class TestCipherMethods(unittest.TestCase):
         # Assuming non-English chars are either removed by prepare_text or handled in some way:
         self.assertNotEqual(result, "KHOORZRUOG")  # Adjust assertion based on your handling
 
+    def test_shift_scores_find_key(self):
+        """
+        Test that scoring the rotated letter histogram ranks the correct shift first.
+        """
+        plain = "It had a perfectly round door like a porthole, painted green, with a shiny yellow brass knob"
+        scores = shift_chi_scores(encode(plain, 11, lambda x: None), letter_frequencies)
+        self.assertEqual(len(scores), 26)
+        self.assertEqual(int(scores.argmin()), 11)
+
+    def test_chi_cryptanalysis_previews_best_key(self):
+        """
+        Test that the cryptanalysis summary lists the correct key and its decoded preview first.
+        """
+        plain = "In a hole in the ground there lived a hobbit. Not a nasty, dirty, wet hole"
+        result = chi_cryptanalysis(encode(plain, 5, lambda x: None), letter_frequencies, bigram_frequencies,
+                                   trigram_frequencies)
+        self.assertIn("Key: 5\nDecoded Text Preview: INAHOLEINTHEGROUND", result)
+
+
+class TestCaesarBatchCrack(unittest.TestCase):
+    def test_crack_batch_finds_every_shift(self):
+        """
+        Test that the batch cracker returns the shift of every message in a structured array.
+        """
+        plain_texts = ["Meet me near the old bridge after the sun has set tonight",
+                       "The supplies will arrive by train on the morning of the third day",
+                       "Nothing"]
+        messages = [encode(text, shift, lambda x: x) for text, shift in zip(plain_texts, (3, 17, 0))] + [""]
+        results = crack_batch(messages, letter_frequencies)
+        self.assertEqual(results.dtype.names, ('shift', 'score', 'length'))
+        self.assertEqual(results['shift'][:2].tolist(), [3, 17])
+        self.assertEqual(results['length'].tolist(), [46, 53, 7, 0])
+
+
+class TestCaesarQuadgramScoring(unittest.TestCase):
+    def test_chunked_scores_match_whole_text(self):
+        """
+        Test that scoring in small chunks gives the same fitness as scoring the whole text at once.
+        """
+        text = as_coded(encode("The quick brown fox jumps over the lazy dog " * 20, 5, lambda x: x))
+        shifts = np.arange(26)
+        decoded = (text.codes[None, :] + (26 - shifts[:, None])) % 26
+        expected = fitness.quadgram_score_batch(decoded)
+        np.testing.assert_allclose(shift_quadgram_scores(text, shifts, chunk_cells=26 * 7), expected)
+        np.testing.assert_allclose(shift_quadgram_scores(text, shifts), expected)
+
+    def test_header_follows_top_n(self):
+        """
+        Test that the summary header states the number of guesses actually shown.
+        """
+        cipher_text = encode("Meet me near the old bridge after the sun has set tonight", 3, lambda x: x)
+        result = chi_cryptanalysis(cipher_text, letter_frequencies, None, None, top_n=2, rank_by='quadgram')
+        self.assertTrue(result.startswith("Top 2 guesses"))
+        self.assertEqual(result.count("Key:"), 2)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,98 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import cli
+from analysis import fitness
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+
+class TestCommandLine(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        with open(fitness.DEFAULT_CORPUS, 'r', encoding='utf-8') as file:
+            self.plain_text = file.read()[:3000]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_input(self, name, text):
+        path = os.path.join(self.directory.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(text)
+        return path
+
+    def run_cli(self, *args):
+        output = os.path.join(self.directory.name, 'records.jsonl')
+        status = cli.main(list(args) + ['-o', output])
+        with open(output, 'r', encoding='utf-8') as file:
+            return status, [json.loads(line) for line in file]
+
+    def test_encode_directory_with_workers_then_cryptanalyse(self):
+        """
+        Test that every file of a directory is encoded across worker processes and the key is recovered.
+        """
+        for index in range(3):
+            self.write_input(os.path.join('plain', 'sub' if index else '', f'{index}.txt'),
+                             self.plain_text[index * 1000:(index + 1) * 1000])
+        status, records = self.run_cli('encode', 'vigenere', os.path.join(self.directory.name, 'plain'),
+                                       '-k', 'lemon', '-j', '2')
+        self.assertEqual(status, 0)
+        self.assertEqual(len(records), 3)
+        self.assertTrue(all(record['key'] == 'LEMON' for record in records))
+
+        cipher_path = self.write_input('cipher.txt', records[0]['text'])
+        status, records = self.run_cli('cryptanalyse', 'vigenere', cipher_path, '-j', '1')
+        self.assertEqual((status, records[0]['key']), (0, 'LEMON'))
+
+    def test_errors_become_records(self):
+        """
+        Test that a missing file gives an error record and a failing exit status instead of stopping the run.
+        """
+        path = self.write_input('plain.txt', "Attack at dawn")
+        status, records = self.run_cli('encode', 'hill', path, os.path.join(self.directory.name, 'missing.txt'),
+                                       '-k', '3 3 2 5', '-j', '1')
+        self.assertEqual(status, 1)
+        self.assertEqual(records[0]['key'], [[3, 3], [2, 5]])
+        self.assertIn('error', records[1])
+
+    def test_crib_that_gives_no_key_is_an_error_record(self):
+        """
+        Test that a crib longer than the text, and a crib that fits no key, each give an error record.
+        """
+        status, records = self.run_cli('encode', 'hill', self.write_input('plain.txt', self.plain_text[:600]),
+                                       '-k', '3 3 2 5', '-j', '1')
+        cipher_path = self.write_input('cipher.txt', records[0]['text'])
+        for crib in (self.plain_text[:2000], "ZQXJZQXJZQXJZQXJ"):
+            status, records = self.run_cli('cryptanalyse', 'hill', cipher_path, '--crib', crib,
+                                           '--key-sizes', '2', '3', '-j', '1')
+            self.assertEqual(status, 1)
+            self.assertIn("does not give a valid Hill key", records[0]['error'])
+
+        status, records = self.run_cli('cryptanalyse', 'hill', cipher_path, '--crib', self.plain_text[100:140],
+                                       '--key-sizes', '2', '3', '-j', '1')
+        self.assertEqual((status, records[0]['key']), (0, [[3, 3], [2, 5]]))
+
+    def test_runs_headless_from_stdin(self):
+        """
+        Test the script end to end on standard input, and that the GUI and tkinter are never imported.
+        """
+        script = ("import runpy, sys; sys.argv = ['cli.py', 'decode', 'caesar', '-k', '3']; "
+                  "sys.modules['tkinter'] = None\n"
+                  "try:\n    runpy.run_path('cli.py', run_name='__main__')\n"
+                  "except SystemExit as exit:\n"
+                  "    assert not any('gui' in name for name in sys.modules), 'GUI imported'\n"
+                  "    sys.exit(exit.code)")
+        result = subprocess.run([sys.executable, '-c', script], input="Khoor, zruog!", capture_output=True,
+                                text=True, cwd=SRC_DIR, env=dict(os.environ, PYTHONPATH=SRC_DIR))
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(json.loads(result.stdout)['text'], "HELLOWORLD")
+
+
+if __name__ == '__main__':
+    unittest.main()
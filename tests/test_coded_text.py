@@ -0,0 +1,114 @@
+import unittest
+
+import numpy as np
+
+from analysis import utility as util
+from analysis.coded_text import CodedText, as_coded, as_packed, codes_to_text, pack_texts
+from ciphers import caesar, hill, vigenere
+
+
+class TestCodedText(unittest.TestCase):
+    def test_from_text_matches_prepare_text(self):
+        """
+        Test that coded text normalizes raw text the same way as prepare_text.
+        """
+        raw = "It’s a “test” — of 3 things… ok?"
+        coded = CodedText.from_text(raw)
+        expected = ''.join(c for c in util.prepare_text(raw) if 'A' <= c <= 'Z')
+        self.assertEqual(coded.to_text(), expected)
+
+    def test_codes_are_read_only(self):
+        """
+        Test that the underlying code array cannot be modified.
+        """
+        coded = CodedText.from_text("hello")
+        with self.assertRaises(ValueError):
+            coded.codes[0] = 1
+
+    def test_slicing_and_indexing(self):
+        """
+        Test that slices stay coded and single indexes return letters.
+        """
+        coded = CodedText.from_text("hello world")
+        self.assertIsInstance(coded[:5], CodedText)
+        self.assertEqual(coded[:5], "HELLO")
+        self.assertEqual(coded[1], "E")
+
+    def test_equal_str_has_equal_hash(self):
+        """
+        Test that coded text equal to a string also hashes like it, so dict and set lookups may mix the two.
+        """
+        coded = CodedText.from_text("hello")
+        self.assertEqual(coded, "HELLO")
+        self.assertEqual(hash(coded), hash("HELLO"))
+        self.assertIn("HELLO", {coded})
+        self.assertEqual({"HELLO": 1}[coded], 1)
+
+    def test_as_coded_does_not_renormalize(self):
+        """
+        Test that already coded text is passed through untouched.
+        """
+        coded = CodedText.from_text("hello")
+        self.assertIs(as_coded(coded), coded)
+
+    def test_invalid_codes_rejected(self):
+        """
+        Test that codes outside 0-25 are rejected.
+        """
+        with self.assertRaises(ValueError):
+            CodedText(np.array([0, 26]))
+
+    def test_ciphers_keep_coded_input_coded(self):
+        """
+        Test that every cipher returns coded text for coded input and matches the string results.
+        """
+        plain = CodedText.from_text("attack at dawn")
+        key_matrix = np.array([[3, 3], [2, 5]])
+        self.assertEqual(caesar.encode(plain, 3, lambda x: None), caesar.encode("attack at dawn", 3, lambda x: None))
+        self.assertIsInstance(vigenere.encode(plain, "lemon", lambda x: None), CodedText)
+        encoded = hill.encode(plain, key_matrix, lambda x: None)
+        self.assertIsInstance(encoded, CodedText)
+        self.assertEqual(hill.decode(encoded, key_matrix, lambda x: None), "ATTACKATDAWN")
+
+    def test_utility_statistics_accept_coded_text(self):
+        """
+        Test that the frequency statistics give the same results for coded and raw text.
+        """
+        raw = "The quick brown fox jumps over the lazy dog"
+        coded = CodedText.from_text(raw)
+        self.assertEqual(util.frequency_analysis(coded), util.frequency_analysis(raw))
+        self.assertAlmostEqual(util.compute_ic(coded), util.compute_ic(raw))
+        self.assertEqual(util.generate_frequency_data(coded), util.generate_frequency_data(raw))
+
+
+class TestPackTexts(unittest.TestCase):
+    def test_pack_matches_individual_normalization(self):
+        """
+        Test that packing many texts gives the same codes as normalizing each one, including empty ones.
+        """
+        texts = ["Attack at dawn!", "", "123", "Déjà vu, mañana", CodedText.from_text("xyz")]
+        codes, offsets = pack_texts(texts)
+        self.assertEqual(len(offsets), len(texts) + 1)
+        for index, text in enumerate(texts):
+            np.testing.assert_array_equal(codes[offsets[index]:offsets[index + 1]], as_coded(text).codes)
+
+    def test_texts_may_contain_nul(self):
+        """
+        Test that a NUL character inside a text does not split it into two messages.
+        """
+        codes, offsets = pack_texts(['ab\x00c', 'def', ''])
+        np.testing.assert_array_equal(offsets, [0, 3, 6, 6])
+        self.assertEqual(codes_to_text(codes), "ABCDEF")
+
+    def test_packed_input_is_passed_through(self):
+        """
+        Test that an already packed ragged array is returned as is.
+        """
+        packed = pack_texts([CodedText.from_text("abc"), CodedText.from_text("de")])
+        codes, offsets = as_packed(packed)
+        self.assertIs(codes, packed[0])
+        np.testing.assert_array_equal(offsets, [0, 3, 5])
+
+
+if __name__ == '__main__':
+    unittest.main()
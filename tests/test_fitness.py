@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from analysis import fitness
+from analysis.coded_text import CodedText
+
+
+class TestQuadgramFitness(unittest.TestCase):
+    def test_english_scores_higher_than_noise(self):
+        """
+        Test that English text is fitter than a random string of the same length.
+        """
+        english = "ITHADAPERFECTLYROUNDDOORLIKEAPORTHOLE"
+        noise = "QXZJVKWQPXZJQKVWXZQJPKXVWQZJKXPQVZWJX"
+        self.assertGreater(fitness.quadgram_score(english), fitness.quadgram_score(noise))
+
+    def test_batch_matches_single_scores(self):
+        """
+        Test that batch scoring agrees with scoring each candidate separately.
+        """
+        texts = ["INAHOLEINTHEGROUND", "THEREWASAHOBBITHOLE", "ZZZZZZZZZZZZZZZZZZZ"]
+        width = min(len(t) for t in texts)
+        rows = np.array([CodedText.from_text(t).codes[:width] for t in texts])
+        batch = fitness.quadgram_score_batch(rows)
+        for row, score in zip(rows, batch):
+            self.assertAlmostEqual(score, fitness.quadgram_score(row), places=3)
+
+    def test_table_round_trip(self):
+        """
+        Test that a saved table loads back unchanged without replacing the default table.
+        """
+        table = fitness.build_quadgram_table("THEQUICKBROWNFOXJUMPSOVERTHELAZYDOG")
+        self.assertEqual(table.dtype, np.float32)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'quadgrams.npy')
+            fitness.save_quadgram_table(table, path)
+            loaded = fitness.load_quadgram_table(path, set_default=False)
+            np.testing.assert_array_equal(loaded, table)
+            del loaded
+
+    def test_short_text_scores_zero(self):
+        """
+        Test that texts without a full quadgram score zero.
+        """
+        self.assertEqual(fitness.quadgram_score("ABC"), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+
+import numpy as np
+
+from analysis import fitness, modular
+from ciphers import hill
+
+
+class TestHillBatch(unittest.TestCase):
+    def setUp(self):
+        self.keys = np.array([[[3, 3], [2, 5]], [[5, 8], [17, 3]], [[1, 2], [3, 5]]])
+        self.text = "Attack at dawn, then retreat to the hills"
+
+    def test_encode_batch_matches_encode(self):
+        """
+        Test that every row of a batch encode equals encoding with that key alone.
+        """
+        encoded = hill.encode_batch(self.text, self.keys)
+        self.assertEqual(encoded.shape[0], len(self.keys))
+        for key, row in zip(self.keys, encoded):
+            self.assertEqual(hill.vector_to_text(row), hill.encode(self.text, key, lambda x: None))
+
+    def test_decode_batch_recovers_plaintext(self):
+        """
+        Test that decoding a ciphertext under a stack of keys recovers the plaintext in the row of the right key.
+        """
+        cipher_text = hill.encode(self.text, self.keys[1], lambda x: None)
+        decoded = hill.decode_batch(cipher_text, self.keys)
+        self.assertEqual(hill.vector_to_text(hill.remove_padding_codes(decoded[1])),
+                         "ATTACKATDAWNTHENRETREATTOTHEHILLS")
+        self.assertNotEqual(hill.vector_to_text(decoded[0][:10]), "ATTACKATDA")
+
+    def test_decode_batch_rejects_singular_keys(self):
+        """
+        Test that a key that is not invertible modulo 26 is reported.
+        """
+        with self.assertRaises(ValueError):
+            hill.decode_batch("ABCD", np.array([[[2, 0], [0, 1]]]))
+
+
+class TestHillCiphertextOnly(unittest.TestCase):
+    def setUp(self):
+        with open(fitness.DEFAULT_CORPUS, 'r', encoding='utf-8') as file:
+            self.plain = file.read()[:2000]
+
+    def test_recovers_2x2_key(self):
+        """
+        Test that the row search recovers a 2x2 key from ciphertext alone.
+        """
+        key = np.array([[3, 3], [2, 5]])
+        cipher_text = hill.encode(self.plain[:500], key, lambda x: None)
+        result = hill.cryptanalyse_ciphertext_only(cipher_text, 2, lambda x: None, lambda x: None, workers=1)
+        self.assertIn(f"Found key: {hill.matrix_to_string(key)}", result.split("Fitness")[0])
+
+    def test_recovers_3x3_key_with_worker_processes(self):
+        """
+        Test that the row search split across processes recovers a 3x3 key.
+        """
+        key = np.array([[6, 24, 1], [13, 16, 10], [20, 17, 15]])
+        cipher_text = hill.encode(self.plain, key, lambda x: None)
+        rows, _ = hill.search_decryption_rows(hill.text_to_vector(cipher_text), 3, workers=2)
+        decryption_matrix = modular.matrix_mod_inverse(key)
+        found = {tuple(row) for row in rows.tolist()}
+        self.assertTrue(all(tuple(row) in found for row in decryption_matrix.tolist()))
+        best_key = hill.combine_rows(hill.text_to_vector(cipher_text), rows, 3)[0][0]
+        np.testing.assert_array_equal(best_key, key)
+
+
+class TestHillCribSearch(unittest.TestCase):
+    def setUp(self):
+        with open(fitness.DEFAULT_CORPUS, 'r', encoding='utf-8') as file:
+            self.plain = hill.as_coded(file.read()[:3000])
+
+    def test_finds_key_size_and_offset(self):
+        """
+        Test that a crib at an unknown, unaligned position recovers the key, its size and the crib position.
+        """
+        key = np.array([[6, 24, 1], [13, 16, 10], [20, 17, 15]])
+        cipher_text = hill.encode(self.plain, key, lambda x: None)
+        key_size, start_index, found_key, _ = hill.crib_search(self.plain[1001:1041], cipher_text)[0]
+        self.assertEqual((key_size, start_index), (3, 1001))
+        np.testing.assert_array_equal(found_key, key)
+
+    def test_crib_not_in_text(self):
+        """
+        Test that a crib which does not occur in the plaintext yields no keys.
+        """
+        cipher_text = hill.encode(self.plain, np.array([[3, 3], [2, 5]]), lambda x: None)
+        self.assertEqual(hill.crib_search("QQQQZZZZJJJJXXXXKKKKVVVV", cipher_text), [])
+
+
+class TestHillKnownPlaintext(unittest.TestCase):
+    def test_recovers_key_from_all_blocks(self):
+        """
+        Test that the stacked known-plaintext solve recovers a 3x3 key from an aligned crib.
+        """
+        key = np.array([[6, 24, 1], [13, 16, 10], [20, 17, 15]])
+        plain_text = "THEHILLCIPHERISALINEARSUBSTITUTIONOVERBLOCKS"
+        cipher_text = hill.encode(plain_text, key, lambda x: None)
+        keys = hill.perform_cryptanalysis(plain_text, cipher_text, 3, None, lambda x: None)
+        self.assertEqual(keys, [key.tolist()])
+
+
+if __name__ == '__main__':
+    unittest.main()
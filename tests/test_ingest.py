@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from analysis.coded_text import CodedText
+from analysis.ingest import cache_path, ingest_file
+
+
+class TestIngestFile(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.directory.name, 'cache')
+        self.text = "It’s a “hobbit-hole”, and that means comfort.\nNot a nasty, dirty, wet hole… ÉTÉ\n" * 50
+        self.file_path = os.path.join(self.directory.name, 'input.txt')
+        with open(self.file_path, 'w', encoding='utf-8') as file:
+            file.write(self.text)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_chunked_ingestion_matches_in_memory_normalization(self):
+        """
+        Test that normalizing in small byte chunks gives the same codes as normalizing the whole text.
+        """
+        coded = ingest_file(self.file_path, self.cache_dir, chunk_size=7)
+        self.assertEqual(coded, CodedText.from_text(self.text))
+        self.assertEqual(ingest_file(self.file_path, use_cache=False, chunk_size=5), coded)
+
+    def test_non_ascii_letters_normalize_like_from_text(self):
+        """
+        Test that file ingestion and CodedText.from_text drop the same non-ASCII letters, 'ß' included.
+        """
+        text = "Straße, Ærø, façade, ﬁne ı ſ"
+        path = os.path.join(self.directory.name, 'non_ascii.txt')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(text)
+        self.assertEqual(CodedText.from_text(text).to_text(), "STRAERFAADENE")
+        self.assertEqual(ingest_file(path, use_cache=False, chunk_size=3), CodedText.from_text(text))
+
+    def test_cache_keeps_under_its_size_limit(self):
+        """
+        Test that writing a new normalized copy removes the least recently used ones beyond the size limit.
+        """
+        paths = []
+        for name in ('a', 'b', 'c'):
+            paths.append(os.path.join(self.directory.name, f'{name}.txt'))
+            with open(paths[-1], 'w', encoding='utf-8') as file:
+                file.write(name * 100)
+        ingest_file(paths[0], self.cache_dir, cache_max_bytes=250)
+        ingest_file(paths[1], self.cache_dir, cache_max_bytes=250)
+        ingest_file(paths[0], self.cache_dir, cache_max_bytes=250)  # 'a' is now the most recently used
+        ingest_file(paths[2], self.cache_dir, cache_max_bytes=250)
+        self.assertEqual([os.path.exists(cache_path(path, self.cache_dir)) for path in paths], [True, False, True])
+
+    def test_second_ingestion_uses_cache(self):
+        """
+        Test that the normalized copy is written once and reused by later ingestions.
+        """
+        first = ingest_file(self.file_path, self.cache_dir)
+        path = cache_path(self.file_path, self.cache_dir)
+        self.assertTrue(os.path.exists(path))
+        modified = os.path.getmtime(path)
+        second = ingest_file(self.file_path, self.cache_dir)
+        self.assertEqual(first, second)
+        self.assertEqual(os.path.getmtime(path), modified)
+
+    def test_missing_and_empty_files(self):
+        """
+        Test that a missing file gives None and an empty file gives empty coded text.
+        """
+        self.assertIsNone(ingest_file(os.path.join(self.directory.name, 'missing.txt'), self.cache_dir))
+        empty_path = os.path.join(self.directory.name, 'empty.txt')
+        open(empty_path, 'w').close()
+        self.assertEqual(len(ingest_file(empty_path, self.cache_dir)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from analysis import fitness, frequency_data, models, ngrams
+from analysis import utility as util
+from analysis.coded_text import CodedText
+from analysis.model_builder import build_models
+
+
+class TestModelBuilder(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        corpus_dir = os.path.join(self.directory.name, 'corpus')
+        os.makedirs(corpus_dir)
+        self.texts = ["In a hole in the ground there lived a hobbit. " * 20,
+                      "Not a nasty, dirty, wet hole, filled with the ends of worms. " * 15]
+        for i, text in enumerate(self.texts):
+            with open(os.path.join(corpus_dir, f"part{i}.txt"), 'w', encoding='utf-8') as file:
+                file.write(text)
+        self.corpus_dir = corpus_dir
+        self.model_dir = os.path.join(self.directory.name, 'models')
+
+    def tearDown(self):
+        models.set_model_dir(None)
+        self.directory.cleanup()
+
+    def test_chunked_counts_match_direct_counts(self):
+        """
+        Test that counting in small chunks across a process pool loses no n-grams at chunk boundaries.
+        """
+        manifest = build_models([self.corpus_dir], self.model_dir, max_order=4, chunk_size=37, workers=2)
+        self.assertEqual(manifest['version'], models.MODEL_FORMAT_VERSION)
+
+        models.set_model_dir(self.model_dir)
+        for n in range(1, 5):
+            expected = sum(ngrams.count_ngrams(CodedText.from_text(text).codes, n, sparse=False)
+                           for text in self.texts)
+            np.testing.assert_array_equal(models.load_counts(n), expected)
+
+    def test_frequency_tables_load_from_models(self):
+        """
+        Test that the expected frequency tables are memory-mapped from a built model when available.
+        """
+        build_models([self.corpus_dir], self.model_dir, max_order=4, chunk_size=1000, workers=1)
+        models.set_model_dir(self.model_dir)
+        self.assertIsInstance(models.load_counts(2), np.memmap)
+        self.assertAlmostEqual(frequency_data.dense_table(1).sum(), 100)
+        self.assertIs(fitness.get_quadgram_table(), models.load_quadgram_table())
+
+    def test_selecting_a_model_switches_every_table(self):
+        """
+        Test that models are opt-in, and that selecting or rebuilding one switches the n-gram tables, the
+        cached expected counts and the quadgram table together.
+        """
+        build_models([self.corpus_dir], self.model_dir, max_order=4, chunk_size=1000, workers=1)
+        built_in = util.dense_frequencies(frequency_data.letter_frequencies, 1)
+        built_in_counts = frequency_data.expected_counts(1, 100)
+        np.testing.assert_array_equal(frequency_data.dense_table(1), built_in)
+        self.assertIsNone(models.load_counts(1))
+
+        models.set_model_dir(self.model_dir)
+        model_table = frequency_data.dense_table(1)
+        self.assertFalse(np.allclose(model_table, built_in))
+        np.testing.assert_allclose(frequency_data.expected_counts(1, 100), model_table)
+        self.assertIs(fitness.get_quadgram_table(), models.load_quadgram_table())
+
+        # Rebuilding the selected model from another corpus is picked up without selecting it again
+        with open(os.path.join(self.corpus_dir, 'part0.txt'), 'w', encoding='utf-8') as file:
+            file.write("Zebras quiz the jazz band at the zoo. " * 30)
+        build_models([self.corpus_dir], self.model_dir, max_order=4, chunk_size=1000, workers=1)
+        self.assertFalse(np.allclose(frequency_data.dense_table(1), model_table))
+
+        models.set_model_dir(None)
+        np.testing.assert_array_equal(frequency_data.dense_table(1), built_in)
+        np.testing.assert_array_equal(frequency_data.expected_counts(1, 100), built_in_counts)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+from fractions import Fraction
+
+import numpy as np
+
+from analysis import modular
+
+
+class TestModularInverse(unittest.TestCase):
+    def test_batch_inverses_multiply_to_identity(self):
+        """
+        Test that every matrix reported invertible times its inverse is the identity mod 26.
+        """
+        for size in (2, 3, 4):
+            matrices = np.random.default_rng(size).integers(0, 26, (300, size, size))
+            inverses, invertible = modular.inverse_mod_matrices(matrices)
+            products = np.einsum('kij,kjl->kil', matrices[invertible], inverses[invertible]) % 26
+            self.assertTrue((products == np.eye(size, dtype=int)).all())
+            # A matrix is invertible mod 26 exactly when its determinant is odd and not a multiple of 13
+            determinants = np.rint(np.linalg.det(matrices)).astype(np.int64)
+            expected = (determinants % 2 != 0) & (determinants % 13 != 0)
+            np.testing.assert_array_equal(invertible, expected)
+
+    def test_known_inverse_and_singular_matrix(self):
+        """
+        Test a textbook Hill key inverse, and that a singular key gives None.
+        """
+        np.testing.assert_array_equal(modular.matrix_mod_inverse([[3, 3], [2, 5]]), [[15, 17], [20, 9]])
+        self.assertIsNone(modular.matrix_mod_inverse([[2, 4], [1, 2]]))
+        self.assertIsNone(modular.matrix_mod_inverse([[13, 0], [0, 1]]))
+
+    def test_inverse_cache_is_keyed_by_contents(self):
+        """
+        Test that inverting an equal matrix again is served from the cache.
+        """
+        modular.matrix_mod_inverse(np.array([[5, 8], [17, 3]]))
+        hits = modular.cache_info().hits
+        modular.matrix_mod_inverse([[5, 8], [17, 3]])
+        self.assertEqual(modular.cache_info().hits, hits + 1)
+
+    def test_non_squarefree_modulus_is_rejected(self):
+        """
+        Test that a modulus with a repeated prime factor is rejected.
+        """
+        with self.assertRaises(ValueError):
+            modular.inverse_mod_matrices(np.eye(2, dtype=int), 18)
+
+
+class TestModularSolve(unittest.TestCase):
+    def test_solves_when_no_square_subsystem_is_invertible(self):
+        """
+        Test that stacking all equations finds X even though each pair of rows alone is singular.
+        """
+        coefficients = np.array([[1, 0], [1, 0], [0, 1], [0, 1]])
+        key = np.array([[3, 3], [2, 5]])
+        values = coefficients @ key.T % 26
+        self.assertFalse(modular.inverse_mod_matrices(coefficients[:2])[1])
+        np.testing.assert_array_equal(modular.solve_mod(coefficients, values), key.T)
+
+    def test_inconsistent_and_underdetermined_systems(self):
+        """
+        Test that contradictory equations and rank-deficient systems give None.
+        """
+        self.assertIsNone(modular.solve_mod(np.array([[1, 0], [1, 0], [0, 1]]), np.array([[1], [2], [3]])))
+        self.assertIsNone(modular.solve_mod(np.array([[2, 0], [0, 1], [4, 1]]), np.array([[0], [1], [1]])))
+
+
+def _exact_det(rows):
+    # Reference determinant by Gaussian elimination over the rationals
+    rows = [[Fraction(value) for value in row] for row in rows]
+    result = Fraction(1)
+    for column in range(len(rows)):
+        pivot = next((row for row in range(column, len(rows)) if rows[row][column]), None)
+        if pivot is None:
+            return 0
+        if pivot != column:
+            rows[column], rows[pivot] = rows[pivot], rows[column]
+            result = -result
+        result *= rows[column][column]
+        for row in range(column + 1, len(rows)):
+            factor = rows[row][column] / rows[column][column]
+            rows[row] = [a - factor * b for a, b in zip(rows[row], rows[column])]
+    return int(result)
+
+
+class TestDeterminantsAndKeyTables(unittest.TestCase):
+    def test_bareiss_determinants_are_exact(self):
+        """
+        Test exact determinants, including an 8x8 stack whose values exceed float precision.
+        """
+        np.testing.assert_array_equal(modular.determinants(np.array([[[3, 3], [2, 5]], [[0, 1], [1, 0]]])), [9, -1])
+        self.assertEqual(modular.determinants(np.array([[1, 2, 3], [4, 5, 6], [7, 8, 9]])), 0)
+        matrices = np.random.RandomState(1).randint(-25, 26, (20, 8, 8))
+        expected = [_exact_det(matrix.tolist()) for matrix in matrices]
+        self.assertEqual([int(value) for value in modular.determinants(matrices)], expected)
+
+    def test_invertible_2x2_table(self):
+        """
+        Test the size of the 2x2 table and that lookups agree with the determinant.
+        """
+        self.assertEqual(modular.invertible_2x2_mask(26).sum(), 157248)
+        self.assertTrue(modular.is_invertible(np.array([[3, 3], [2, 5]])))
+        self.assertFalse(modular.is_invertible(np.array([[2, 4], [1, 3]])))
+
+    def test_bulk_sampler_draws_invertible_keys(self):
+        """
+        Test that sampled keys respect the entry range and are all invertible.
+        """
+        for size in (2, 3, 5):
+            keys = modular.random_invertible_matrices(size, 500, 26, low=1)
+            self.assertEqual(keys.shape, (500, size, size))
+            self.assertGreaterEqual(keys.min(), 1)
+            self.assertTrue(modular.inverse_mod_matrices(keys)[1].all())
+
+
+if __name__ == '__main__':
+    unittest.main()
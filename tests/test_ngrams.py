@@ -0,0 +1,114 @@
+import unittest
+
+import numpy as np
+
+from analysis import frequency_data, ngrams
+from analysis import utility as util
+from analysis.coded_text import CodedText
+
+
+class TestNgramCounting(unittest.TestCase):
+    def test_index_round_trip(self):
+        """
+        Test that n-gram strings and base-26 indexes convert back and forth.
+        """
+        self.assertEqual(ngrams.ngram_index("THE"), 19 * 676 + 7 * 26 + 4)
+        self.assertEqual(ngrams.ngram_string(ngrams.ngram_index("QUIZ"), 4), "QUIZ")
+
+    def test_dense_counts_match_slicing(self):
+        """
+        Test that the dense bigram counts agree with counting string slices.
+        """
+        text = "THEQUICKBROWNFOXJUMPSOVERTHELAZYDOGTHE"
+        counts = ngrams.count_ngrams(CodedText.from_text(text), 2)
+        self.assertEqual(counts.shape, (676,))
+        self.assertEqual(counts[ngrams.ngram_index("TH")], 3)
+        self.assertEqual(counts.sum(), len(text) - 1)
+
+    def test_sparse_counts_for_higher_orders(self):
+        """
+        Test that 4-grams and above default to the sparse representation.
+        """
+        counts = ngrams.count_ngrams("ABCDABCDA", 4)
+        self.assertIsInstance(counts, ngrams.SparseCounts)
+        lookup = dict(zip(counts.indices.tolist(), counts.counts.tolist()))
+        self.assertEqual(lookup[ngrams.ngram_index("ABCD")], 2)
+        self.assertEqual(counts.counts.sum(), 6)
+
+    def test_batch_counts_match_single_counts(self):
+        """
+        Test that batched counting gives one row per text equal to counting each text alone.
+        """
+        rows = np.array([CodedText.from_text(t).codes for t in ("HELLOWORLD", "ABCDEFGHIJ")])
+        batch = ngrams.count_ngrams_batch(rows, 3)
+        for row, counts in zip(rows, batch):
+            np.testing.assert_array_equal(counts, ngrams.count_ngrams(row, 3))
+
+    def test_frequency_data_and_arrays_agree(self):
+        """
+        Test that the dict frequency data is a view of the dense frequency arrays.
+        """
+        text = "In a hole in the ground there lived a hobbit"
+        letters, bigrams, trigrams = util.generate_frequency_data(text)
+        letter_array, bigram_array, trigram_array = util.generate_frequency_arrays(text)
+        self.assertAlmostEqual(bigrams["TH"], bigram_array[ngrams.ngram_index("TH")])
+        self.assertAlmostEqual(trigrams["THE"], trigram_array[ngrams.ngram_index("THE")])
+        self.assertAlmostEqual(sum(letters.values()), 100)
+        expected = {"TH": 5.0, "HE": 2.0}
+        self.assertAlmostEqual(util.compute_chi_squared(bigrams, expected, len(text)),
+                               util.compute_chi_squared(bigram_array, expected, len(text)))
+
+
+class TestChiSquaredScoring(unittest.TestCase):
+    def test_batch_matches_dict_scorer(self):
+        """
+        Test that scoring a matrix of histograms matches the per-text dict scorer row by row.
+        """
+        texts = ["THEHOBBITLIVEDINAHOLE", "QWERTYUIOPASDFGHJKLZX"]
+        rows = np.array([CodedText.from_text(t).codes for t in texts])
+        length = rows.shape[1]
+        scores = util.compute_chi_squared_batch(ngrams.count_ngrams_batch(rows, 2),
+                                                frequency_data.expected_counts(2, length), length)
+        for text, score in zip(texts, scores):
+            counts = ngrams.dense_to_dict(ngrams.count_ngrams(text, 2), 2)
+            self.assertAlmostEqual(score, util.compute_chi_squared(counts, frequency_data.bigram_frequencies, length))
+
+    def test_dict_and_array_tables_agree(self):
+        """
+        Test that the chi-squared score is the same whichever of its arguments are dicts or dense arrays.
+        """
+        text = "THEHOBBITLIVEDINAHOLE"
+        dense_counts = ngrams.count_ngrams(text, 2)
+        counts = ngrams.dense_to_dict(dense_counts, 2)
+        length = len(text) - 1
+        score = util.compute_chi_squared(counts, frequency_data.bigram_frequencies, length)
+        for observed, expected in ((dense_counts, frequency_data.bigram_frequencies),
+                                   (counts, frequency_data.dense_table(2)),
+                                   (dense_counts, frequency_data.dense_table(2))):
+            self.assertAlmostEqual(util.compute_chi_squared(observed, expected, length), score)
+
+    def test_expected_counts_are_cached(self):
+        """
+        Test that expected counts are scaled once per text length and shared.
+        """
+        first = frequency_data.expected_counts(1, 500)
+        self.assertIs(first, frequency_data.expected_counts(1, 500))
+        self.assertAlmostEqual(first.sum(), 500, places=2)
+        self.assertFalse(first.flags.writeable)
+
+    def test_shift_matrix_matches_rotated_histograms(self):
+        """
+        Test that the circulant shift scores equal scoring each rotated histogram separately.
+        """
+        columns = [CodedText.from_text("THEHOBBITLIVEDINAHOLE"), CodedText.from_text("ZEPHYRQUIZ")]
+        counts = np.array([np.bincount(column.codes, minlength=26) for column in columns])
+        scores = util.shift_chi_squared_matrix(counts, frequency_data.letter_frequencies)
+        for row, column in enumerate(columns):
+            for shift in (0, 3, 25):
+                rotated = counts[row][(np.arange(26) + shift) % 26]
+                self.assertAlmostEqual(scores[row, shift], util.compute_chi_squared(
+                    rotated, frequency_data.letter_frequencies, len(column)))
+
+
+if __name__ == '__main__':
+    unittest.main()
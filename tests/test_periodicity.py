@@ -0,0 +1,72 @@
+import unittest
+
+import numpy as np
+
+from analysis import fitness, periodicity
+from analysis.coded_text import CodedText
+from ciphers import vigenere
+
+
+class TestPeriodicity(unittest.TestCase):
+    def setUp(self):
+        with open(fitness.DEFAULT_CORPUS, 'r', encoding='utf-8') as file:
+            self.plain = CodedText.from_text(file.read()[:6000])
+        self.cipher = vigenere.encode(self.plain, "LEMON", lambda x: None)
+
+    def test_coincidence_counts_match_direct_comparison(self):
+        """
+        Test that the FFT coincidence counts equal comparing the text with shifted copies of itself.
+        """
+        codes = self.cipher.codes[:500]
+        counts = periodicity.coincidence_counts(CodedText(codes))
+        for shift in (1, 2, 5, 17, 499):
+            self.assertEqual(counts[shift], np.count_nonzero(codes[:-shift] == codes[shift:]))
+
+    def test_column_ic_matches_column_counts(self):
+        """
+        Test that the column IC equals the pooled IC of the columns counted directly.
+        """
+        codes = self.cipher.codes[:1001]
+        column_ic, _ = periodicity.period_statistics(periodicity.coincidence_counts(CodedText(codes)), 7)
+        for period in (1, 3, 7):
+            columns = [np.bincount(codes[i::period], minlength=26) for i in range(period)]
+            pairs = sum(int(np.dot(column, column - 1)) for column in columns)
+            total = sum(int(column.sum()) * (int(column.sum()) - 1) for column in columns)
+            self.assertAlmostEqual(column_ic[period - 1], pairs / total)
+
+    def test_key_length_ranks_first(self):
+        """
+        Test that the ranked table puts a multiple of the key length first with high confidence.
+        """
+        table = periodicity.estimate_key_lengths(self.cipher, 40)
+        self.assertEqual(len(table), 40)
+        length, _, _, confidence = table[0]
+        self.assertEqual(length % 5, 0)
+        self.assertGreater(confidence, 0.7)
+        self.assertLess(dict((row[0], row[3]) for row in table)[3], 0.3)
+
+    def test_repeat_spacings_match_naive_search(self):
+        """
+        Test that the indexed repeat search finds the same spacings as comparing every trigram position.
+        """
+        text = self.cipher[:400].to_text()
+        expected = []
+        for start in range(len(text) - 2):
+            following = text.find(text[start:start + 3], start + 1)
+            if following != -1:
+                expected.append(following - start)
+        self.assertEqual(sorted(periodicity.repeat_spacings(text).tolist()), sorted(expected))
+
+    def test_kasiski_separates_key_length_from_its_multiples(self):
+        """
+        Test that the Kasiski ranking prefers the key length over its factors and multiples.
+        """
+        cipher = vigenere.encode(self.plain, "LEMONADE", lambda x: None)
+        table = periodicity.kasiski_key_lengths(cipher, 30)
+        self.assertEqual(table[0][0], 8)
+        ic_table = periodicity.estimate_key_lengths(cipher, 30)
+        self.assertEqual(periodicity.combine_rankings(ic_table, table)[0], 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+
+from analysis import fitness, frequency_data, pruning
+from ciphers import caesar, vigenere
+
+
+class TestPrefixPruning(unittest.TestCase):
+    def test_best_candidates_survive_and_stages_are_reported(self):
+        """
+        Test that the best candidates always survive and that each stage reports how many were pruned.
+        """
+        values = np.concatenate([[1.0, 2.0, 3.0], np.full(97, 50.0)])
+        survivors, stats = pruning.prune_by_prefix(list(range(100)), lambda candidates, length: values[candidates],
+                                                   3, 10000, (100, 1000))
+        self.assertEqual(survivors, [0, 1, 2])
+        self.assertEqual(stats, [{'prefix_length': 100, 'candidates': 100, 'pruned': 97}])
+
+    def test_prefixes_as_long_as_the_text_are_skipped(self):
+        """
+        Test that no stage runs when the prefixes are not shorter than the text.
+        """
+        survivors, stats = pruning.prune_by_prefix(list(range(10)), lambda candidates, length: candidates, 1, 500,
+                                                   (500, 1000))
+        self.assertEqual((survivors, stats), (list(range(10)), []))
+
+    def test_pruned_cryptanalysis_finds_the_same_keys(self):
+        """
+        Test that pruning on prefixes gives the same top keys as scoring every candidate on the full text.
+        """
+        with open(fitness.DEFAULT_CORPUS, 'r', encoding='utf-8') as file:
+            plain = file.read() * 2
+        tables = (frequency_data.letter_frequencies, frequency_data.bigram_frequencies,
+                  frequency_data.trigram_frequencies)
+        cipher_text = vigenere.as_coded(vigenere.encode(plain, "LEMONADE", lambda x: None))
+        keys = [key for key, _ in vigenere.best_first_keys(vigenere.column_shift_scores(cipher_text, 8), 3, 500)]
+        results = []
+        for prefix_lengths in (None, pruning.DEFAULT_PREFIX_LENGTHS):
+            vigenere.clear_cache()
+            messages = []
+            results.append(vigenere.vigenere_chi_cryptanalysis(cipher_text, keys, *tables, messages.append,
+                                                               rank_by='quadgram', top_k=3,
+                                                               prefix_lengths=prefix_lengths))
+        self.assertEqual([row[0] for row in results[0]], [row[0] for row in results[1]])
+        self.assertTrue(any(message.startswith("Pruning:") for message in messages))
+
+        caesar_text = caesar.encode(plain, 11, lambda x: None)
+        self.assertIn("Key: 11", caesar.chi_cryptanalysis(caesar_text, tables[0], None, None, rank_by='quadgram'))
+
+
+if __name__ == '__main__':
+    unittest.main()
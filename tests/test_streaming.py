@@ -0,0 +1,49 @@
+import io
+import unittest
+
+import numpy as np
+
+from ciphers import caesar, hill, vigenere
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.text = "In a hole in the ground there lived a hobbit. Not a nasty, dirty, wet hole, filled with ends of worms " * 20
+        self.hill_key = np.array([[3, 3], [2, 5]])
+
+    def test_caesar_stream_matches_whole_text(self):
+        """
+        Test that streaming Caesar output joined together equals encoding the whole text.
+        """
+        expected = caesar.encode(self.text, 7, lambda message: None)
+        self.assertEqual(''.join(caesar.encode_stream(chunked(self.text, 13), 7)), expected)
+        self.assertEqual(''.join(caesar.decode_stream(io.StringIO(expected), 7, chunk_size=11)),
+                         caesar.decode(expected, 7, lambda message: None))
+
+    def test_vigenere_stream_carries_key_position(self):
+        """
+        Test that the Vigenère key position carries across chunks whose lengths are not multiples of the key.
+        """
+        expected = vigenere.encode(self.text, "LEMON", lambda message: None)
+        self.assertEqual(''.join(vigenere.encode_stream(chunked(self.text, 7), "LEMON")), expected)
+        stream = io.BytesIO(expected.encode('ascii'))
+        self.assertEqual(''.join(vigenere.decode_stream(stream, "LEMON", chunk_size=3)),
+                         vigenere.decode(expected, "LEMON", lambda message: None))
+
+    def test_hill_stream_carries_block_remainder(self):
+        """
+        Test that Hill blocks split across chunks are reassembled and padding is only handled at the end.
+        """
+        for text in (self.text, self.text + "a", "helloxx xxxxxxxxx worldx"):
+            expected = hill.encode(text, self.hill_key, lambda message: None)
+            self.assertEqual(''.join(hill.encode_stream(chunked(text, 5), self.hill_key)), expected)
+            self.assertEqual(''.join(hill.decode_stream(chunked(expected, 3), self.hill_key)),
+                             hill.decode(expected, self.hill_key, lambda message: None))
+
+
+if __name__ == '__main__':
+    unittest.main()